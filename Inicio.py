@@ -1,13 +1,13 @@
 # kpi_equipamentos/Início.py
 
 import streamlit as st
-from PIL import Image
+from interface.pagina import carregar_logo, logo_na_barra_lateral
 
 # --- Configuração INICIAL da Página ---
 # Deve ser o primeiro comando para funcionar corretamente na tela de login
 st.set_page_config(
     page_title="KPI Equipamentos",
-    page_icon="assets/logo.png",
+    page_icon=carregar_logo() or "📈",
     layout="centered" # Começa centralizado para a tela de login
 )
 
@@ -74,15 +74,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Adiciona o logo no topo da barra lateral
-try:
-    logo = Image.open("assets/logo.png")
-    st.sidebar.image(logo, use_container_width=True)
-except FileNotFoundError:
-    st.sidebar.error("Logo não encontrado. Verifique o caminho 'assets/logo.png'.")
-
-st.sidebar.markdown("---")
-st.sidebar.header("Navegação")
+# Adiciona o logo no topo da barra lateral (decodificado uma única vez por processo)
+logo_na_barra_lateral()
 
 # --- Conteúdo da Página Principal ---
 st.title("📈 Plataforma de KPI de Equipamentos Analíticos")
@@ -107,20 +100,23 @@ with col1:
         st.write("""
         - **Cadastro de Equipamento:** Adicione novos ativos ao sistema.
         - **Cadastro de Manutenção:** Registre eventos de manutenção corretiva ou preventiva.
+        - **Importar Dados:** Carregue equipamentos ou manutenções em lote a partir de CSV/XLSX.
         """)
 
     with st.container(border=True):
         st.markdown("##### 🗂️ Gerenciamento")
         st.write("""
         - **Gerenciar Dados:** Edite ou exclua registros de equipamentos e manutenções de forma segura e controlada.
+        - **Diagnóstico:** Acompanhe o tempo das consultas ao banco, das páginas e o aproveitamento dos caches.
         """)
 
 with col2:
     with st.container(border=True):
         st.markdown("##### 📊 Análise e KPIs")
         st.write("""
-        - **Dashboard de KPIs:** Visualize os principais indicadores de custo, status e operação em um painel interativo.
+        - **Dashboard de KPIs:** Visualize os indicadores de custo, status, confiabilidade e as coortes de aquisição em um painel interativo.
         - **Detalhes do Equipamento:** Consulte um dossiê completo de qualquer ativo, incluindo seu histórico de manutenções e status de garantia.
+        - **Buscar Manutenções:** Encontre falhas e soluções já registradas pelo texto do motivo das manutenções.
         """)
 
 st.markdown("---")
@@ -0,0 +1,188 @@
+# kpi_equipamentos/benchmarks/executar.py
+
+import argparse
+import datetime
+import inspect
+import json
+import platform
+import statistics
+import sys
+import time
+import pandas as pd
+from sqlalchemy import text
+from database.connection import get_engine
+from database import database_manager, kpi_queries
+from database.exportacao import exportar
+
+# Benchmarks dos caminhos críticos da camada de dados.
+# Cada caso chama a função real SEM o cache do Streamlit (via __wrapped__), então mede o custo de uma
+# invalidação/primeira carga. Os resultados saem em JSON e podem ser comparados a uma execução de referência:
+# o processo termina com código 1 quando algum caso fica mais lento que a referência além da tolerância.
+#
+# Uso:
+#   python -m benchmarks.gerador --escala 100k --limpar      (banco de benchmark)
+#   python -m benchmarks.executar --saida base.json
+#   python -m benchmarks.executar --saida atual.json --referencia base.json [--tolerancia 0.25]
+
+REPETICOES_PADRAO = 5
+TOLERANCIA_PADRAO = 0.25
+
+def _sem_cache(funcao):
+    """
+    Retorna a função original, sem nenhum decorador de cache: o local (@cache_por_tabela) e, por baixo
+    dele, o compartilhado entre réplicas (@cache_compartilhado), que também expõe __wrapped__.
+    """
+    return inspect.unwrap(funcao)
+
+def _parametros_dashboard():
+    """Filtros equivalentes ao estado inicial do dashboard: todo o período e todos os sistemas."""
+    resumo = _sem_cache(kpi_queries.obter_resumo_geral)()
+    sistemas = tuple(_sem_cache(kpi_queries.listar_sistemas)())
+    return resumo['data_minima'], resumo['data_maxima'], sistemas
+
+def _parametros_periodo_parcial():
+    """Período que começa e termina no meio do mês, exercitando as pontas lidas das tabelas."""
+    data_inicio, data_fim, sistemas = _parametros_dashboard()
+    return data_inicio + datetime.timedelta(days=45), data_fim - datetime.timedelta(days=45), sistemas
+
+def _pipeline_dashboard(data_inicio, data_fim, sistemas):
+    """Executa, sem cache, todas as consultas feitas na primeira renderização do Dashboard de KPIs."""
+    _sem_cache(kpi_queries.obter_resumo_geral)()
+    _sem_cache(kpi_queries.listar_sistemas)()
+    _sem_cache(kpi_queries.calcular_custos_periodo)(data_inicio, data_fim, sistemas)
+    _sem_cache(kpi_queries.contar_status)(sistemas)
+    tendencia = _sem_cache(kpi_queries.tendencia_mensal)(data_inicio, data_fim, sistemas)
+    _sem_cache(kpi_queries.tco_por_descricao)(data_inicio, data_fim, sistemas)
+    _sem_cache(kpi_queries.custo_manutencao_por)('Equipamento', data_inicio, data_fim, sistemas)
+    _sem_cache(kpi_queries.ranking_tco_equipamentos)(sistemas)
+    return tendencia
+
+def _carga_completa_manutencoes():
+    """Descarta a cópia base e recarrega todas as manutenções."""
+    database_manager._estado_manutencoes()['df'] = None
+    return _sem_cache(database_manager.listar_manutencoes_df)()
+
+def _exportar_equipamentos(data_inicio, data_fim, sistemas):
+    return exportar(*kpi_queries.consulta_equipamentos_filtrados(data_inicio, data_fim, sistemas), 'CSV')
+
+def _exportar_manutencoes(data_inicio, data_fim, sistemas):
+    return exportar(*kpi_queries.consulta_manutencoes_filtradas(data_inicio, data_fim, sistemas), 'CSV')
+
+def _exportar_manutencoes_parquet(data_inicio, data_fim, sistemas):
+    return exportar(*kpi_queries.consulta_manutencoes_filtradas(data_inicio, data_fim, sistemas), 'Parquet')
+
+def _dossie(equipamento_id):
+    _sem_cache(database_manager.obter_equipamento)(equipamento_id)
+    return _sem_cache(database_manager.listar_manutencoes_por_equipamento)(equipamento_id)
+
+def montar_casos():
+    """Retorna a lista de casos (nome, função sem argumentos) a medir."""
+    filtros = _parametros_dashboard()
+    parcial = _parametros_periodo_parcial()
+    with get_engine().connect() as conn:
+        # O equipamento com mais manutenções é o pior caso do dossiê
+        equipamento_id = conn.execute(text(
+            "SELECT equipamento_id FROM manutencoes GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1"
+        )).scalar()
+    # A carga incremental parte de uma cópia base já existente
+    _carga_completa_manutencoes()
+    return [
+        ('listar_equipamentos_df', _sem_cache(database_manager.listar_equipamentos_df)),
+        ('listar_manutencoes_df (carga completa)', _carga_completa_manutencoes),
+        ('listar_manutencoes_df (incremental)', _sem_cache(database_manager.listar_manutencoes_df)),
+        ('dashboard (período completo)', lambda: _pipeline_dashboard(*filtros)),
+        ('dashboard (período parcial)', lambda: _pipeline_dashboard(*parcial)),
+        ('exportar equipamentos (CSV)', lambda: _exportar_equipamentos(*filtros)),
+        ('exportar manutenções (CSV)', lambda: _exportar_manutencoes(*filtros)),
+        ('exportar manutenções (Parquet)', lambda: _exportar_manutencoes_parquet(*filtros)),
+        ('dossiê do equipamento', lambda: _dossie(equipamento_id)),
+        ('página de manutenções', lambda: _sem_cache(database_manager.listar_manutencoes_pagina)()),
+    ]
+
+def _linhas(resultado):
+    """Número de linhas/bytes do resultado, para conferir que as execuções comparadas usaram os mesmos dados."""
+    if isinstance(resultado, tuple):
+        resultado = resultado[0]
+    if isinstance(resultado, (pd.DataFrame, bytes)):
+        return len(resultado)
+    return None
+
+def medir(funcao, repeticoes):
+    """Executa a função uma vez para aquecimento e depois 'repeticoes' vezes, retornando as estatísticas em ms."""
+    resultado = funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'min_ms': round(tempos[0], 3),
+        'max_ms': round(tempos[-1], 3),
+        'repeticoes': repeticoes,
+        'tamanho_resultado': _linhas(resultado),
+    }
+
+def _ambiente():
+    """Metadados da execução: versões e volume de dados do banco."""
+    with get_engine().connect() as conn:
+        return {
+            'data': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'postgres': conn.execute(text("SHOW server_version")).scalar(),
+            'equipamentos': conn.execute(text("SELECT COUNT(*) FROM equipamentos")).scalar(),
+            'manutencoes': conn.execute(text("SELECT COUNT(*) FROM manutencoes")).scalar(),
+        }
+
+def executar(repeticoes=REPETICOES_PADRAO, filtro=None):
+    """Roda todos os casos (ou apenas os que contêm 'filtro' no nome) e retorna o relatório."""
+    if get_engine() is None:
+        raise RuntimeError("Falha ao conectar ao banco de dados.")
+    resultados = {}
+    for nome, funcao in montar_casos():
+        if filtro and filtro not in nome:
+            continue
+        resultados[nome] = medir(funcao, repeticoes)
+        print(f"{nome:<42} {resultados[nome]['mediana_ms']:>10.1f} ms")
+    return {'ambiente': _ambiente(), 'resultados': resultados}
+
+def comparar(atual, referencia, tolerancia=TOLERANCIA_PADRAO):
+    """Compara as medianas com a referência. Retorna o DataFrame da comparação e a lista de regressões."""
+    for chave in ('equipamentos', 'manutencoes'):
+        if atual['ambiente'][chave] != referencia['ambiente'].get(chave):
+            print(f"AVISO: volume de '{chave}' difere da referência ({atual['ambiente'][chave]} x {referencia['ambiente'].get(chave)}).")
+    linhas = []
+    for nome, medida in atual['resultados'].items():
+        base = referencia['resultados'].get(nome)
+        if base is None:
+            continue
+        razao = medida['mediana_ms'] / base['mediana_ms'] if base['mediana_ms'] else float('inf')
+        linhas.append({'caso': nome, 'referencia_ms': base['mediana_ms'], 'atual_ms': medida['mediana_ms'],
+                       'razao': round(razao, 2), 'regressao': razao > 1 + tolerancia})
+    comparacao = pd.DataFrame(linhas, columns=['caso', 'referencia_ms', 'atual_ms', 'razao', 'regressao'])
+    return comparacao, comparacao.loc[comparacao['regressao'], 'caso'].tolist()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mede os caminhos críticos da camada de dados.")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO, help="Execuções medidas por caso (após 1 de aquecimento).")
+    parser.add_argument('--filtro', help="Roda apenas os casos cujo nome contém este texto.")
+    parser.add_argument('--saida', help="Arquivo JSON onde gravar os resultados.")
+    parser.add_argument('--referencia', help="Arquivo JSON de uma execução anterior, para comparação.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help="Aumento relativo aceito na mediana (0.25 = 25%%).")
+    args = parser.parse_args()
+
+    relatorio = executar(args.repeticoes, args.filtro)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    if args.referencia:
+        with open(args.referencia, encoding='utf-8') as arquivo:
+            referencia = json.load(arquivo)
+        comparacao, regressoes = comparar(relatorio, referencia, args.tolerancia)
+        print()
+        print(comparacao.to_string(index=False))
+        if regressoes:
+            print(f"\nRegressões acima de {args.tolerancia:.0%}: {', '.join(regressoes)}")
+            sys.exit(1)
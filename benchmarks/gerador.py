@@ -0,0 +1,100 @@
+# kpi_equipamentos/benchmarks/gerador.py
+
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from database.connection import get_engine
+from database.importacao import importar_equipamentos, importar_manutencoes
+from database.rollups import atualizar_rollups
+
+# Gerador determinístico de uma frota sintética para os benchmarks.
+# A mesma escala e semente produzem sempre os mesmos dados, então resultados de execuções
+# diferentes são comparáveis. A carga usa o mesmo caminho da importação em lote (COPY).
+# ATENÇÃO: aponte DB_NAME (ou os segredos) para um banco de benchmark; --limpar apaga as tabelas.
+
+# Número de manutenções por escala; a frota tem uma fração disso em equipamentos
+ESCALAS = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+MANUTENCOES_POR_EQUIPAMENTO = 20
+SEMENTE_PADRAO = 42
+
+SISTEMAS = ['Radiologia', 'UTI Adulto', 'UTI Neonatal', 'Centro Cirúrgico', 'Laboratório', 'Hemodiálise', 'Emergência', 'Ambulatório']
+DESCRICOES = ['Monitor Multiparamétrico', 'Ventilador Pulmonar', 'Bomba de Infusão', 'Desfibrilador', 'Tomógrafo',
+              'Ultrassom', 'Autoclave', 'Eletrocardiógrafo', 'Centrífuga', 'Máquina de Hemodiálise']
+STATUS = ['Operacional', 'Em Manutenção', 'Fora de Operação']
+MOTIVOS = ['Troca de sensor', 'Calibração periódica', 'Falha na fonte', 'Atualização de firmware', 'Substituição de peça', 'Inspeção de segurança']
+
+def gerar_frota(escala, semente=SEMENTE_PADRAO):
+    """Gera os DataFrames de equipamentos e manutenções (no formato da importação em lote) para a escala informada."""
+    n_manutencoes = ESCALAS[escala]
+    n_equipamentos = max(50, n_manutencoes // MANUTENCOES_POR_EQUIPAMENTO)
+    rng = np.random.default_rng(semente)
+
+    inicio = np.datetime64('2015-01-01')
+    aquisicao = inicio + rng.integers(0, 365 * 8, n_equipamentos).astype('timedelta64[D]')
+    garantia = rng.choice([365, 730, 1095], n_equipamentos).astype('timedelta64[D]')
+    equipamentos = pd.DataFrame({
+        'numero_serie': [f"BENCH-{i:07d}" for i in range(n_equipamentos)],
+        'descricao': rng.choice(DESCRICOES, n_equipamentos),
+        'modelo': [f"Modelo {m}" for m in rng.integers(1, 40, n_equipamentos)],
+        'status': rng.choice(STATUS, n_equipamentos, p=[0.85, 0.1, 0.05]),
+        'sistema_alocado': rng.choice(SISTEMAS, n_equipamentos),
+        'pedido_compra': [f"PC-{p:06d}" for p in rng.integers(0, 999_999, n_equipamentos)],
+        'data_aquisicao': pd.to_datetime(aquisicao).date,
+        'custo_aquisicao': rng.uniform(5_000, 500_000, n_equipamentos).round(2),
+        'inicio_garantia': pd.to_datetime(aquisicao).date,
+        'fim_garantia': pd.to_datetime(aquisicao + garantia).date,
+    })
+
+    # Cada manutenção ocorre depois da aquisição do seu equipamento, até o fim de 2025
+    alvo = rng.integers(0, n_equipamentos, n_manutencoes)
+    fim = np.datetime64('2025-12-31')
+    janela = (fim - aquisicao[alvo]).astype('int64')
+    data = aquisicao[alvo] + (rng.random(n_manutencoes) * janela).astype('int64').astype('timedelta64[D]')
+    manutencoes = pd.DataFrame({
+        'numero_serie': equipamentos['numero_serie'].to_numpy()[alvo],
+        'data_manutencao': pd.to_datetime(data).date,
+        'motivo_manutencao': rng.choice(MOTIVOS, n_manutencoes),
+        'tipo_manutencao': rng.choice(['Corretiva', 'Preventiva'], n_manutencoes, p=[0.4, 0.6]),
+        'custo_manutencao': rng.uniform(100, 20_000, n_manutencoes).round(2),
+    })
+    return equipamentos, manutencoes
+
+def contar_registros():
+    """Retorna quantos equipamentos já existem no banco configurado."""
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM equipamentos")).scalar()
+
+def limpar_tabelas():
+    """Apaga todos os equipamentos e manutenções (e o registro de exclusões) do banco configurado."""
+    with get_engine().begin() as conn:
+        conn.execute(text("TRUNCATE manutencoes, manutencoes_excluidas, equipamentos RESTART IDENTITY"))
+
+def carregar_frota(escala, semente=SEMENTE_PADRAO, limpar=False):
+    """Gera e grava a frota sintética, atualizando estatísticas e rollups. Retorna (equipamentos, manutenções)."""
+    if limpar:
+        limpar_tabelas()
+    elif contar_registros() > 0:
+        raise RuntimeError("O banco já possui equipamentos. Use um banco de benchmark e --limpar para recriar os dados.")
+
+    equipamentos, manutencoes = gerar_frota(escala, semente)
+    importar_equipamentos(equipamentos)
+    # Em lotes, para limitar a memória do COPY nas escalas maiores
+    for inicio in range(0, len(manutencoes), 200_000):
+        importar_manutencoes(manutencoes.iloc[inicio:inicio + 200_000])
+    with get_engine().begin() as conn:
+        conn.exec_driver_sql("ANALYZE equipamentos")
+        conn.exec_driver_sql("ANALYZE manutencoes")
+    atualizar_rollups()
+    return len(equipamentos), len(manutencoes)
+
+# Uso: python -m benchmarks.gerador --escala 10k [--semente 42] [--limpar]
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera uma frota sintética determinística para os benchmarks.")
+    parser.add_argument('--escala', choices=list(ESCALAS), default='10k', help="Número de manutenções a gerar.")
+    parser.add_argument('--semente', type=int, default=SEMENTE_PADRAO, help="Semente do gerador aleatório.")
+    parser.add_argument('--limpar', action='store_true', help="Apaga os dados existentes antes de gerar.")
+    args = parser.parse_args()
+
+    n_equipamentos, n_manutencoes = carregar_frota(args.escala, args.semente, args.limpar)
+    print(f"Frota '{args.escala}' gerada: {n_equipamentos} equipamentos e {n_manutencoes} manutenções.")
@@ -0,0 +1,124 @@
+# kpi_equipamentos/benchmarks/inicializacao.py
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.executar import _ambiente, comparar, TOLERANCIA_PADRAO
+
+# Benchmark da partida a frio: tempo de importação dos módulos e da primeira renderização de cada página.
+# Cada medição roda em um processo Python novo (nada importado, nenhum cache do Streamlit, nenhum engine),
+# como uma réplica recém-criada; a renderização usa o AppTest do Streamlit, com o login já feito.
+# O relatório tem o mesmo formato do benchmarks.executar e pode ser comparado a uma execução de referência.
+#
+# Uso:
+#   python -m benchmarks.inicializacao --saida base.json
+#   python -m benchmarks.inicializacao --saida atual.json --referencia base.json [--tolerancia 0.25]
+
+REPETICOES_PADRAO = 3
+MODULOS = ['database.connection', 'database.database_manager', 'interface.pagina']
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CODIGO_IMPORTACAO = """
+import importlib, sys, time
+inicio = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print((time.perf_counter() - inicio) * 1000)
+"""
+
+# A primeira execução inclui as importações da página, a criação do engine e as cargas sem cache;
+# a segunda, no mesmo processo, é o custo de um rerun comum
+_CODIGO_RENDERIZACAO = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.session_state["password_correct"] = True
+tempos = []
+for _ in range(2):
+    inicio = time.perf_counter()
+    app.run()
+    tempos.append((time.perf_counter() - inicio) * 1000)
+print(json.dumps({'tempos': tempos, 'erros': [str(e.value) for e in app.exception]}))
+"""
+
+def _executar_processo(codigo, argumento):
+    """Roda o código em um processo novo, a partir da raiz do projeto, e retorna a última linha impressa."""
+    processo = subprocess.run(
+        [sys.executable, '-c', codigo, argumento], cwd=RAIZ, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONPATH': RAIZ}
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao medir '{argumento}': {processo.stderr.strip()[-500:]}")
+    return processo.stdout.strip().splitlines()[-1]
+
+def _estatisticas(tempos):
+    tempos = sorted(tempos)
+    return {
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'min_ms': round(tempos[0], 3),
+        'max_ms': round(tempos[-1], 3),
+        'repeticoes': len(tempos),
+        'tamanho_resultado': None,
+    }
+
+def medir_importacao(modulo, repeticoes):
+    """Tempo de 'import modulo' em processos novos."""
+    return _estatisticas([float(_executar_processo(_CODIGO_IMPORTACAO, modulo)) for _ in range(repeticoes)])
+
+def medir_renderizacao(pagina, repeticoes):
+    """Tempos da primeira renderização e do rerun seguinte da página, em processos novos."""
+    primeiras, reruns = [], []
+    for _ in range(repeticoes):
+        medida = json.loads(_executar_processo(_CODIGO_RENDERIZACAO, pagina))
+        if medida['erros']:
+            raise RuntimeError(f"A página '{pagina}' terminou com erro: {medida['erros'][0]}")
+        primeiras.append(medida['tempos'][0])
+        reruns.append(medida['tempos'][1])
+    return _estatisticas(primeiras), _estatisticas(reruns)
+
+def executar(repeticoes=REPETICOES_PADRAO, filtro=None):
+    """Mede as importações e todas as páginas (ou apenas os casos que contêm 'filtro' no nome)."""
+    resultados = {}
+
+    def registrar(nome, medida):
+        resultados[nome] = medida
+        print(f"{nome:<60} {medida['mediana_ms']:>10.1f} ms")
+
+    for modulo in MODULOS:
+        nome = f"import {modulo}"
+        if not filtro or filtro in nome:
+            registrar(nome, medir_importacao(modulo, repeticoes))
+    for pagina in sorted(glob.glob(os.path.join('pages', '*.py'), root_dir=RAIZ)):
+        nome = os.path.basename(pagina)
+        if filtro and filtro not in nome:
+            continue
+        primeira, rerun = medir_renderizacao(pagina, repeticoes)
+        registrar(f"{nome} (primeira renderização)", primeira)
+        registrar(f"{nome} (rerun)", rerun)
+    return {'ambiente': _ambiente(), 'resultados': resultados}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mede a partida a frio: importações e primeira renderização das páginas.")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO, help="Processos novos por caso.")
+    parser.add_argument('--filtro', help="Roda apenas os casos cujo nome contém este texto.")
+    parser.add_argument('--saida', help="Arquivo JSON onde gravar os resultados.")
+    parser.add_argument('--referencia', help="Arquivo JSON de uma execução anterior, para comparação.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help="Aumento relativo aceito na mediana (0.25 = 25%%).")
+    args = parser.parse_args()
+
+    relatorio = executar(args.repeticoes, args.filtro)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    if args.referencia:
+        with open(args.referencia, encoding='utf-8') as arquivo:
+            referencia = json.load(arquivo)
+        comparacao, regressoes = comparar(relatorio, referencia, args.tolerancia)
+        print()
+        print(comparacao.to_string(index=False))
+        if regressoes:
+            print(f"\nRegressões acima de {args.tolerancia:.0%}: {', '.join(regressoes)}")
+            sys.exit(1)
@@ -0,0 +1,232 @@
+# kpi_equipamentos/database/analitico.py
+
+import json
+import os
+import threading
+import time
+import streamlit as st
+from .connection import get_engine
+from .cache import invalidar
+from .leitura import ler_em_lotes
+from .cache_compartilhado import versoes_banco
+
+# Backend analítico opcional (DuckDB sobre Parquet) para as agregações do Dashboard de KPIs.
+# Um snapshot de 'equipamentos' e 'manutencoes' é gravado em arquivos Parquet locais e consultado por
+# uma conexão DuckDB em processo, compartilhada pelas sessões; as varreduras analíticas rodam
+# vetorizadas e em várias threads, fora do PostgreSQL, que continua sendo a fonte da verdade.
+# O snapshot é refeito pelo mesmo agendador dos rollups (após escritas e periodicamente) e guarda as versões
+# das tabelas (versoes_dados) que copiou: com alguma escrita mais nova, o dashboard volta ao PostgreSQL até a próxima cópia.
+#
+# Ativação: KPI_ANALITICO=duckdb (requer o pacote 'duckdb'). Opcionais: KPI_ANALITICO_DIRETORIO, KPI_ANALITICO_THREADS.
+# Fora do Streamlit (cron, scripts): python -m database.analitico
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+HABILITADO = os.environ.get("KPI_ANALITICO", "").strip().lower() == "duckdb" and duckdb is not None
+DIRETORIO = os.environ.get("KPI_ANALITICO_DIRETORIO", "dados_analiticos")
+THREADS = os.environ.get("KPI_ANALITICO_THREADS")
+LINHAS_POR_LOTE = 100_000
+
+# Colunas copiadas para o snapshot: apenas o que as agregações do dashboard usam
+SNAPSHOTS = {
+    'equipamentos': "SELECT id, descricao, numero_serie, status, COALESCE(sistema_alocado, '') AS sistema_alocado, data_aquisicao, custo_aquisicao::float8 AS custo_aquisicao FROM equipamentos",
+    'manutencoes': "SELECT id, equipamento_id, data_manutencao, tipo_manutencao, custo_manutencao::float8 AS custo_manutencao FROM manutencoes",
+}
+
+# Tipos das colunas de cada snapshot, na ordem das consultas acima: definidos explicitamente para que
+# o Parquet de uma tabela vazia tenha o mesmo esquema (e as consultas do DuckDB não falhem sobre ele)
+ESQUEMAS = {
+    'equipamentos': "id INTEGER, descricao VARCHAR, numero_serie VARCHAR, status VARCHAR, sistema_alocado VARCHAR, data_aquisicao DATE, custo_aquisicao DOUBLE",
+    'manutencoes': "id INTEGER, equipamento_id INTEGER, data_manutencao DATE, tipo_manutencao VARCHAR, custo_manutencao DOUBLE",
+}
+
+if duckdb is None and os.environ.get("KPI_ANALITICO"):
+    print("AVISO: KPI_ANALITICO definido, mas o pacote 'duckdb' não está instalado. Usando o PostgreSQL.")
+
+def _caminho(tabela):
+    return os.path.join(DIRETORIO, f"{tabela}.parquet")
+
+def _literal(texto):
+    """Literal de texto SQL (aspas simples duplicadas), para caminhos de arquivo nos comandos do DuckDB."""
+    return "'" + texto.replace("'", "''") + "'"
+
+def _caminho_versoes():
+    return os.path.join(DIRETORIO, "versoes.json")
+
+def snapshot_disponivel():
+    """Indica se todos os arquivos do snapshot já existem."""
+    return all(os.path.exists(_caminho(tabela)) for tabela in SNAPSHOTS)
+
+def _versoes_snapshot():
+    """Versões das tabelas copiadas no snapshot atual (None se desconhecidas)."""
+    try:
+        with open(_caminho_versoes(), encoding='utf-8') as arquivo:
+            return tuple(json.load(arquivo))
+    except (OSError, ValueError, TypeError):
+        return None
+
+def snapshot_em_dia():
+    """Indica se o snapshot já contém todas as escritas registradas no banco."""
+    versoes = versoes_banco(list(SNAPSHOTS))
+    return versoes is not None and None not in versoes and _versoes_snapshot() == versoes
+
+def atualizar_snapshot(forcar=False):
+    """
+    Copia as tabelas do PostgreSQL para Parquet, em lotes (memória limitada), e troca os arquivos atomicamente.
+    Sem escritas desde a última cópia (e sem forcar=True), não faz nada. Retorna True em caso de sucesso.
+    """
+    if duckdb is None: return False
+    engine = get_engine()
+    if engine is None: return False
+    os.makedirs(DIRETORIO, exist_ok=True)
+    try:
+        # Lidas antes da cópia: uma escrita que confirmar durante ela deixa o snapshot defasado até a próxima
+        versoes = versoes_banco(list(SNAPSHOTS))
+        if not forcar and snapshot_disponivel() and versoes is not None and _versoes_snapshot() == versoes:
+            return True
+        for tabela, query in SNAPSHOTS.items():
+            temporario = _caminho(tabela) + ".tmp"
+            # DuckDB grava o Parquet a partir de cada lote do cursor no servidor (ver database/leitura.py)
+            _gravar_parquet(ler_em_lotes(query, tamanho_lote=LINHAS_POR_LOTE), temporario, ESQUEMAS[tabela])
+            os.replace(temporario, _caminho(tabela))
+        temporario = _caminho_versoes() + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(versoes, arquivo)
+        os.replace(temporario, _caminho_versoes())
+        invalidar('analitico')
+        return True
+    except Exception as e:
+        print(f"Ocorreu um erro ao atualizar o snapshot analítico: {e}")
+        return False
+
+def _gravar_parquet(lotes, destino, esquema):
+    """Concatena os lotes em uma tabela DuckDB temporária com o esquema informado e a exporta como Parquet."""
+    conn = duckdb.connect()
+    try:
+        conn.execute(f"CREATE TABLE dados ({esquema})")
+        for lote in lotes:
+            conn.register('lote', lote)
+            conn.execute("INSERT INTO dados SELECT * FROM lote")
+            conn.unregister('lote')
+        conn.execute(f"COPY dados TO {_literal(destino)} (FORMAT parquet)")
+    finally:
+        conn.close()
+
+@st.cache_resource
+def _conexao():
+    """Conexão DuckDB em memória, criada uma vez por processo, com views sobre os arquivos Parquet."""
+    conn = duckdb.connect()
+    if THREADS:
+        conn.execute(f"SET threads = {int(THREADS)}")
+    for tabela in SNAPSHOTS:
+        # A view relê o arquivo a cada consulta, então um snapshot novo é visto sem recriar a conexão
+        conn.execute(f"CREATE OR REPLACE VIEW {tabela} AS SELECT * FROM read_parquet({_literal(_caminho(tabela))})")
+    return {'conn': conn, 'lock': threading.Lock()}
+
+def _consultar_df(query, params):
+    """Executa a consulta em um cursor próprio (os cursores do DuckDB podem ser usados em threads diferentes)."""
+    estado = _conexao()
+    with estado['lock']:
+        cursor = estado['conn'].cursor()
+    try:
+        return cursor.execute(query, params).df()
+    finally:
+        cursor.close()
+
+def _params(data_inicio, data_fim, sistemas):
+    return {'data_inicio': data_inicio, 'data_fim': data_fim, 'sistemas': list(sistemas)}
+
+FILTRO_MANUTENCOES = """
+    m.data_manutencao BETWEEN $data_inicio AND $data_fim
+    AND list_contains($sistemas::VARCHAR[], e.sistema_alocado)
+"""
+
+FILTRO_EQUIPAMENTOS = """
+    e.data_aquisicao BETWEEN $data_inicio AND $data_fim
+    AND list_contains($sistemas::VARCHAR[], e.sistema_alocado)
+"""
+
+# --- Agregações do Dashboard (mesmos resultados das versões em database/kpi_queries.py) ---
+# Os custos são somados como DECIMAL(18, 2), exatamente como o NUMERIC do PostgreSQL.
+# Cada função retorna None em caso de erro, para que o chamador recorra ao PostgreSQL.
+
+def calcular_custos_periodo(data_inicio, data_fim, sistemas):
+    try:
+        query = f"""
+            SELECT
+                (SELECT COALESCE(SUM(e.custo_aquisicao::DECIMAL(18, 2)), 0) FROM equipamentos e WHERE {FILTRO_EQUIPAMENTOS})::DOUBLE AS custo_aquisicao,
+                (SELECT COALESCE(SUM(m.custo_manutencao::DECIMAL(18, 2)), 0) FROM manutencoes m JOIN equipamentos e ON m.equipamento_id = e.id
+                 WHERE {FILTRO_MANUTENCOES})::DOUBLE AS custo_manutencao
+        """
+        linha = _consultar_df(query, _params(data_inicio, data_fim, sistemas)).iloc[0]
+        return {'custo_aquisicao': float(linha['custo_aquisicao']), 'custo_manutencao': float(linha['custo_manutencao'])}
+    except Exception as e:
+        print(f"Ocorreu um erro no backend analítico (custos do período): {e}")
+        return None
+
+def tendencia_mensal(data_inicio, data_fim, sistemas):
+    try:
+        query = f"""
+            SELECT strftime(date_trunc('month', m.data_manutencao), '%Y-%m') AS mes_ano, COUNT(*) AS contagem
+            FROM manutencoes m
+            JOIN equipamentos e ON m.equipamento_id = e.id
+            WHERE {FILTRO_MANUTENCOES}
+            GROUP BY 1
+            ORDER BY 1
+        """
+        return _consultar_df(query, _params(data_inicio, data_fim, sistemas))
+    except Exception as e:
+        print(f"Ocorreu um erro no backend analítico (tendência mensal): {e}")
+        return None
+
+def tco_por_descricao(data_inicio, data_fim, sistemas):
+    try:
+        query = f"""
+            WITH aquisicao AS (
+                SELECT e.descricao, SUM(COALESCE(e.custo_aquisicao::DECIMAL(18, 2), 0)) AS custo
+                FROM equipamentos e WHERE {FILTRO_EQUIPAMENTOS} GROUP BY 1
+            ),
+            manutencao AS (
+                SELECT e.descricao, SUM(COALESCE(m.custo_manutencao::DECIMAL(18, 2), 0)) AS custo
+                FROM manutencoes m JOIN equipamentos e ON m.equipamento_id = e.id
+                WHERE {FILTRO_MANUTENCOES} GROUP BY 1
+            )
+            SELECT
+                COALESCE(a.descricao, mt.descricao) AS descricao,
+                COALESCE(a.custo, 0)::DOUBLE AS "Custo Aquisição",
+                COALESCE(mt.custo, 0)::DOUBLE AS "Custo Manutenção"
+            FROM aquisicao a
+            FULL OUTER JOIN manutencao mt ON a.descricao = mt.descricao
+            ORDER BY 1
+        """
+        return _consultar_df(query, _params(data_inicio, data_fim, sistemas))
+    except Exception as e:
+        print(f"Ocorreu um erro no backend analítico (TCO por descrição): {e}")
+        return None
+
+def custo_manutencao_por(coluna, data_inicio, data_fim, sistemas):
+    """'coluna' é o nome de uma coluna de equipamentos (ver AGRUPADORES_CUSTO em kpi_queries)."""
+    try:
+        query = f"""
+            SELECT e.{coluna} AS "Agrupador", COALESCE(SUM(m.custo_manutencao::DECIMAL(18, 2)), 0)::DOUBLE AS "Custo Total"
+            FROM manutencoes m
+            JOIN equipamentos e ON m.equipamento_id = e.id
+            WHERE {FILTRO_MANUTENCOES}
+            GROUP BY 1
+            ORDER BY 2 DESC
+        """
+        return _consultar_df(query, _params(data_inicio, data_fim, sistemas))
+    except Exception as e:
+        print(f"Ocorreu um erro no backend analítico (custo de manutenção): {e}")
+        return None
+
+if __name__ == '__main__':
+    if duckdb is None:
+        print("O pacote 'duckdb' não está instalado.")
+    else:
+        inicio = time.perf_counter()
+        if atualizar_snapshot(forcar=True):
+            print(f"Snapshot analítico gravado em '{DIRETORIO}' em {time.perf_counter() - inicio:.2f}s.")
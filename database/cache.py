@@ -0,0 +1,138 @@
+# kpi_equipamentos/database/cache.py
+
+import functools
+import os
+import threading
+import time
+import streamlit as st
+from sqlalchemy import text
+from .connection import get_engine
+from .instrumentacao import registrar_cache
+
+# Camada de cache versionada por tabela.
+# Cada tabela tem um contador de versão compartilhado por todas as sessões do processo.
+# As funções em cache recebem as versões das tabelas das quais dependem como parte da chave,
+# então uma escrita em 'manutencoes' invalida apenas o que deriva de 'manutencoes'.
+# Consultas de um único registro (ex.: dossiê de um equipamento) usam versões por registro,
+# '<prefixo>:<id>', para que uma escrita em um equipamento não invalide o cache dos demais.
+# A versão de cada tabela também inclui a mantida pelo banco (tabela 'versoes_dados', incrementada por
+# trigger a cada escrita e pela atualização dos rollups; migrações 5 e 8), relida no máximo a cada
+# KPI_VERSOES_TTL segundos (padrão 2): escritas feitas por outras réplicas invalidam o cache local em seguida.
+# As versões por registro são apenas locais: em outras réplicas, o dossiê é atualizado quando a entrada sai do cache.
+# Cada chamada e cada execução real (falha de cache) são contadas na instrumentação.
+
+VERSOES_BANCO_TTL_S = float(os.environ.get("KPI_VERSOES_TTL", 2))
+
+@st.cache_resource
+def _estado_versoes():
+    """Retorna o estado (contadores e trava) compartilhado entre as sessões."""
+    return {'lock': threading.Lock(), 'versoes': {}}
+
+@st.cache_resource
+def _estado_versoes_banco():
+    """Última leitura de 'versoes_dados' no processo e o instante (monotônico) em que foi feita."""
+    return {'lock': threading.Lock(), 'versoes': {}, 'lidas_em': None}
+
+def _ler_versoes_banco():
+    engine = get_engine()
+    if engine is None: return {}
+    try:
+        with engine.connect() as conn:
+            return dict(conn.execute(text("SELECT tabela, versao FROM versoes_dados")).all())
+    except Exception as e:
+        print(f"Ocorreu um erro ao ler as versões dos dados: {e}")
+        return {}
+
+def versoes_banco_recentes():
+    """Versões de 'versoes_dados' lidas há no máximo VERSOES_BANCO_TTL_S segundos ({} se indisponíveis)."""
+    estado = _estado_versoes_banco()
+    with estado['lock']:
+        agora = time.monotonic()
+        if estado['lidas_em'] is None or agora - estado['lidas_em'] >= VERSOES_BANCO_TTL_S:
+            estado['versoes'] = _ler_versoes_banco()
+            estado['lidas_em'] = agora
+        return estado['versoes']
+
+def obter_versoes(tabelas):
+    """Retorna uma tupla com a versão atual de cada tabela informada: (contador local, versão no banco ou None)."""
+    banco = versoes_banco_recentes()
+    estado = _estado_versoes()
+    with estado['lock']:
+        return tuple((estado['versoes'].get(tabela, 0), banco.get(tabela)) for tabela in tabelas)
+
+def invalidar(*tabelas):
+    """Incrementa a versão das tabelas informadas, invalidando os caches que dependem delas."""
+    estado = _estado_versoes()
+    with estado['lock']:
+        for tabela in tabelas:
+            estado['versoes'][tabela] = estado['versoes'].get(tabela, 0) + 1
+
+def _nome_funcao(func):
+    """Nome curto ('modulo.funcao') usado nos contadores de cache."""
+    return f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+def cache_por_tabela(*tabelas, **opcoes_cache):
+    """
+    Decorador equivalente ao @st.cache_data, mas cuja validade depende das versões das tabelas informadas.
+    As opções extras (ttl, max_entries, show_spinner...) são repassadas ao st.cache_data.
+    """
+    def decorador(func):
+        nome = _nome_funcao(func)
+
+        @functools.wraps(func)
+        def _executar(*args, versoes_tabelas=None, **kwargs):
+            registrar_cache(nome, 'falhas')
+            return func(*args, **kwargs)
+
+        executar_em_cache = st.cache_data(**opcoes_cache)(_executar)
+        ultima = {'versoes': None}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            versoes = obter_versoes(tabelas)
+            # Quando as tabelas mudam, todas as entradas desta função ficam obsoletas: descarta-as para liberar memória
+            if ultima['versoes'] is not None and ultima['versoes'] != versoes:
+                executar_em_cache.clear()
+            ultima['versoes'] = versoes
+            registrar_cache(nome, 'chamadas')
+            return executar_em_cache(*args, versoes_tabelas=versoes, **kwargs)
+
+        wrapper.clear = executar_em_cache.clear
+        return wrapper
+    return decorador
+
+def invalidar_registros(prefixo, *ids):
+    """
+    Invalida os caches por registro do prefixo informado (ex.: 'equipamento', 5, 7).
+    Sem ids (cargas em lote), invalida todos os registros do prefixo de uma só vez.
+    """
+    if ids:
+        invalidar(*(f"{prefixo}:{id_registro}" for id_registro in ids))
+    else:
+        invalidar(f"{prefixo}:*")
+
+def cache_por_registro(prefixo, max_entries=256, **opcoes_cache):
+    """
+    Decorador para funções cujo primeiro argumento é o id de um registro.
+    A validade de cada entrada depende da versão '<prefixo>:<id>' (e da versão '<prefixo>:*' das cargas em lote);
+    as entradas antigas não são descartadas em bloco, apenas deixam de ser usadas e saem por max_entries.
+    """
+    def decorador(func):
+        nome = _nome_funcao(func)
+
+        @functools.wraps(func)
+        def _executar(id_registro, *args, versoes_registro=None, **kwargs):
+            registrar_cache(nome, 'falhas')
+            return func(id_registro, *args, **kwargs)
+
+        executar_em_cache = st.cache_data(max_entries=max_entries, **opcoes_cache)(_executar)
+
+        @functools.wraps(func)
+        def wrapper(id_registro, *args, **kwargs):
+            versoes = obter_versoes([f"{prefixo}:{id_registro}", f"{prefixo}:*"])
+            registrar_cache(nome, 'chamadas')
+            return executar_em_cache(id_registro, *args, versoes_registro=versoes, **kwargs)
+
+        wrapper.clear = executar_em_cache.clear
+        return wrapper
+    return decorador
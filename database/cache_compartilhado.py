@@ -0,0 +1,262 @@
+# kpi_equipamentos/database/cache_compartilhado.py
+
+import functools
+import hashlib
+import io
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from .connection import get_engine
+from .cache import _nome_funcao
+from .instrumentacao import registrar_cache
+
+# Cache de resultados compartilhado entre processos/réplicas, abaixo do cache local (@cache_por_tabela).
+# Quando o cache local de uma carga falha (processo novo, réplica recém-criada, dados alterados), o
+# resultado é procurado em um backend comum antes de ir ao PostgreSQL: só a primeira réplica paga a carga.
+# A chave inclui a versão das tabelas mantida pelo próprio banco (tabela 'versoes_dados', incrementada
+# por trigger a cada comando de escrita; migração 5), então qualquer escrita, de qualquer réplica,
+# faz as próximas leituras usarem uma entrada nova. O cache local acima dele também inclui essas versões
+# (relidas a cada poucos segundos, ver database/cache.py), então uma réplica não continua servindo a própria
+# cópia depois de uma escrita feita em outra. Os DataFrames são gravados como Parquet (tipos preservados).
+#
+# Backends (KPI_CACHE_COMPARTILHADO):
+#   disco               arquivos em KPI_CACHE_DIRETORIO (volume comum às réplicas), com TTL e despejo LRU
+#                       quando passam de KPI_CACHE_MAX_MB
+#   redis://host:porta/db   qualquer servidor compatível com o protocolo do Redis (RESP); o TTL vai em cada
+#                       chave e o despejo LRU fica a cargo do servidor (maxmemory + maxmemory-policy allkeys-lru)
+# Vazio (padrão): desabilitado. KPI_CACHE_TTL define a validade padrão das entradas, em segundos.
+
+CONFIGURACAO = os.environ.get("KPI_CACHE_COMPARTILHADO", "").strip()
+TTL_PADRAO = int(os.environ.get("KPI_CACHE_TTL", 3600))
+DIRETORIO = os.environ.get("KPI_CACHE_DIRETORIO", "cache_compartilhado")
+MAX_BYTES_DISCO = int(os.environ.get("KPI_CACHE_MAX_MB", 512)) * 1024 * 1024
+TIMEOUT_REDIS = float(os.environ.get("KPI_CACHE_TIMEOUT", 2))
+PREFIXO_CHAVE = "kpi_equipamentos"
+
+# --- Backend em Disco ---
+
+class CacheDisco:
+    """
+    Um arquivo por entrada. A validade fica no mtime do arquivo e o último acesso no atime,
+    ambos definidos explicitamente (independem das opções de montagem do volume).
+    """
+
+    def __init__(self, diretorio, max_bytes):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.parquet")
+
+    def ler(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            expira_em = os.stat(caminho).st_mtime
+            if expira_em < time.time():
+                os.remove(caminho)
+                return None
+            with open(caminho, 'rb') as arquivo:
+                dados = arquivo.read()
+            os.utime(caminho, (time.time(), expira_em))
+            return dados
+        except FileNotFoundError:
+            return None
+
+    def gravar(self, chave, dados, ttl):
+        caminho = self._caminho(chave)
+        # Grava em arquivo temporário e troca atomicamente: outra réplica nunca lê um arquivo pela metade
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(dados)
+        agora = time.time()
+        os.utime(temporario, (agora, agora + ttl))
+        os.replace(temporario, caminho)
+        self._despejar()
+
+    def _despejar(self):
+        """Remove as entradas vencidas e, se ainda passar do limite, as menos usadas recentemente."""
+        agora = time.time()
+        entradas = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith('.parquet'):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                info = os.stat(caminho)
+                if info.st_mtime < agora:
+                    os.remove(caminho)
+                else:
+                    entradas.append((info.st_atime, info.st_size, caminho))
+            except FileNotFoundError:
+                continue
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+
+# --- Backend Redis (protocolo RESP) ---
+
+class CacheRedis:
+    """Cliente mínimo do protocolo do Redis (GET/SET com PX), com uma conexão reaproveitada por processo."""
+
+    def __init__(self, url, timeout=TIMEOUT_REDIS):
+        partes = urlparse(url)
+        self.host = partes.hostname or 'localhost'
+        self.porta = partes.port or 6379
+        self.senha = partes.password
+        self.banco = int(partes.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._socket = None
+        self._leitor = None
+
+    def _conectar(self):
+        self._socket = socket.create_connection((self.host, self.porta), timeout=self.timeout)
+        self._leitor = self._socket.makefile('rb')
+        if self.senha:
+            self._comando('AUTH', self.senha)
+        if self.banco:
+            self._comando('SELECT', str(self.banco))
+
+    def _fechar(self):
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = self._leitor = None
+
+    def _comando(self, *partes):
+        """Envia um comando e lê a resposta."""
+        argumentos = [p if isinstance(p, bytes) else str(p).encode('utf-8') for p in partes]
+        pacote = b"*%d\r\n" % len(argumentos) + b"".join(b"$%d\r\n%s\r\n" % (len(a), a) for a in argumentos)
+        self._socket.sendall(pacote)
+        return self._ler_resposta()
+
+    def _ler_resposta(self):
+        linha = self._leitor.readline()
+        if not linha:
+            raise ConnectionError("Conexão encerrada pelo servidor de cache.")
+        tipo, conteudo = linha[:1], linha[1:-2]
+        if tipo == b'+':
+            return conteudo
+        if tipo == b'-':
+            raise RuntimeError(f"Erro do servidor de cache: {conteudo.decode('utf-8', 'replace')}")
+        if tipo == b':':
+            return int(conteudo)
+        if tipo == b'$':
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            dados = self._leitor.read(tamanho + 2)
+            return dados[:-2]
+        if tipo == b'*':
+            quantidade = int(conteudo)
+            return None if quantidade < 0 else [self._ler_resposta() for _ in range(quantidade)]
+        raise RuntimeError(f"Resposta inesperada do servidor de cache: {linha!r}")
+
+    def _executar(self, *partes):
+        """Executa o comando, reconectando uma vez se a conexão reaproveitada tiver caído."""
+        with self._lock:
+            for tentativa in range(2):
+                try:
+                    if self._socket is None:
+                        self._conectar()
+                    return self._comando(*partes)
+                except (ConnectionError, OSError):
+                    self._fechar()
+                    if tentativa:
+                        raise
+
+    def ler(self, chave):
+        return self._executar('GET', chave)
+
+    def gravar(self, chave, dados, ttl):
+        self._executar('SET', chave, dados, 'PX', int(ttl * 1000))
+
+# --- Decorador ---
+
+@st.cache_resource
+def _backend():
+    """Cria, uma vez por processo, o backend configurado (ou None se desabilitado)."""
+    if not CONFIGURACAO:
+        return None
+    if CONFIGURACAO == 'disco':
+        return CacheDisco(DIRETORIO, MAX_BYTES_DISCO)
+    if CONFIGURACAO.startswith('redis://'):
+        return CacheRedis(CONFIGURACAO)
+    print(f"AVISO: KPI_CACHE_COMPARTILHADO='{CONFIGURACAO}' não reconhecido. Cache compartilhado desabilitado.")
+    return None
+
+def versoes_banco(tabelas):
+    """Versões das tabelas registradas no banco (None se a tabela 'versoes_dados' não estiver disponível)."""
+    engine = get_engine()
+    if engine is None: return None
+    try:
+        with engine.connect() as conn:
+            versoes = dict(conn.execute(
+                text("SELECT tabela, versao FROM versoes_dados WHERE tabela = ANY(:tabelas)"), {'tabelas': list(tabelas)}
+            ).all())
+        return tuple(versoes.get(tabela) for tabela in tabelas)
+    except Exception as e:
+        print(f"Ocorreu um erro ao ler as versões dos dados: {e}")
+        return None
+
+def _serializar(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, engine='pyarrow', compression='zstd')
+    return buffer.getvalue()
+
+def _desserializar(dados):
+    return pd.read_parquet(io.BytesIO(dados), engine='pyarrow')
+
+def cache_compartilhado(*tabelas, ttl=None):
+    """
+    Decorador para cargas que retornam DataFrames, aplicado por baixo do @cache_por_tabela.
+    Sem backend configurado, chama a função diretamente. Falhas do backend nunca impedem a carga:
+    o resultado é buscado no banco como se a entrada não existisse.
+    """
+    def decorador(func):
+        nome = _nome_funcao(func)
+        nome_contador = f"{nome} (compartilhado)"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = _backend()
+            if backend is None:
+                return func(*args, **kwargs)
+            versoes = versoes_banco(tabelas)
+            if versoes is None or None in versoes:
+                return func(*args, **kwargs)
+            assinatura = hashlib.sha256(repr((args, sorted(kwargs.items()), versoes)).encode('utf-8')).hexdigest()[:32]
+            chave = f"{PREFIXO_CHAVE}.{nome}.{assinatura}"
+            registrar_cache(nome_contador, 'chamadas')
+            try:
+                dados = backend.ler(chave)
+                if dados is not None:
+                    return _desserializar(dados)
+            except Exception as e:
+                print(f"Ocorreu um erro ao ler do cache compartilhado: {e}")
+            registrar_cache(nome_contador, 'falhas')
+            resultado = func(*args, **kwargs)
+            # DataFrames sem colunas são o retorno das cargas que falharam: não são compartilhados
+            if isinstance(resultado, pd.DataFrame) and len(resultado.columns):
+                try:
+                    backend.gravar(chave, _serializar(resultado), TTL_PADRAO if ttl is None else ttl)
+                except Exception as e:
+                    print(f"Ocorreu um erro ao gravar no cache compartilhado: {e}")
+            return resultado
+
+        return wrapper
+    return decorador
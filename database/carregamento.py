@@ -0,0 +1,48 @@
+# kpi_equipamentos/database/carregamento.py
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from .instrumentacao import MedicaoPagina
+
+# Carga concorrente de conjuntos de dados independentes.
+# Cada consulta roda em uma thread com sua própria conexão do pool, então o tempo de uma carga "fria"
+# (caches vazios) passa a ser o da consulta mais lenta, e não a soma de todas; com os caches quentes
+# as funções retornam imediatamente e o custo das threads é desprezível.
+# As threads recebem o contexto da execução da página (ScriptRunContext do Streamlit e as ContextVars,
+# como a medição em curso), para que os caches, o spinner e a atribuição do tempo de SQL funcionem
+# como na thread principal. KPI_CARGA_THREADS limita as threads por carga (padrão 4), mantendo
+# várias sessões simultâneas dentro do tamanho do pool de conexões.
+
+MAX_THREADS = int(os.environ.get("KPI_CARGA_THREADS", 4))
+
+def _executar_cronometrado(contexto_script, funcao, args):
+    add_script_run_ctx(threading.current_thread(), contexto_script)
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, round((time.perf_counter() - inicio) * 1000, 2)
+
+def carregar_em_paralelo(tarefas):
+    """
+    Executa as funções em paralelo e espera todas terminarem.
+    'tarefas' mapeia um nome para (funcao, *argumentos), por exemplo:
+        resultados, tempos = carregar_em_paralelo({'status': (contar_status, sistemas), 'resumo': (obter_resumo_geral,)})
+    Retorna dois dicionários com as mesmas chaves: os resultados e a duração de cada tarefa em ms.
+    Uma exceção em qualquer tarefa é relançada na thread que chamou.
+    """
+    if not tarefas:
+        return {}, {}
+    contexto_script = get_script_run_ctx(suppress_warning=True)
+    with ThreadPoolExecutor(max_workers=min(MAX_THREADS, len(tarefas)), thread_name_prefix="kpi_carga") as executor:
+        futuros = {
+            nome: executor.submit(contextvars.copy_context().run, _executar_cronometrado, contexto_script, funcao, args)
+            for nome, (funcao, *args) in tarefas.items()
+        }
+        concluidos = {nome: futuro.result() for nome, futuro in futuros.items()}
+    resultados = {nome: resultado for nome, (resultado, _) in concluidos.items()}
+    tempos = {nome: duracao for nome, (_, duracao) in concluidos.items()}
+    MedicaoPagina.registrar_tarefas(tempos)
+    return resultados, tempos
@@ -0,0 +1,162 @@
+# kpi_equipamentos/database/confiabilidade.py
+
+import numpy as np
+import pandas as pd
+from .cache import cache_por_tabela
+from .kpi_queries import BASE_MANUTENCOES_MENSAL, _consultar_df, _params_rollup
+
+# Indicadores de confiabilidade do Dashboard de KPIs, por equipamento e por sistema.
+# Os intervalos entre manutenções corretivas são calculados no PostgreSQL com uma função de janela
+# (LAG por equipamento, em ordem de data), e o banco devolve uma linha por equipamento com as somas e
+# contagens; as razões (MTBF, taxa de falhas, preventiva/corretiva) e o resumo por sistema são operações
+# vetorizadas do pandas sobre essas colunas. Nenhuma etapa percorre equipamentos ou eventos em Python.
+#
+# - MTBF: média, em dias, dos intervalos entre corretivas consecutivas do mesmo equipamento no período.
+# - Taxa de falhas: corretivas no período por ano de exposição, contada a partir da aquisição
+#   (ou do início do período, se posterior) até o fim do período.
+# - Razão preventiva/corretiva: preventivas no período por corretiva.
+# - Custo móvel de 12 meses: custo de manutenção dos 12 meses encerrados no fim do período.
+# MTTR e disponibilidade exigiriam a duração de cada parada, que não é registrada nas manutenções.
+
+TIPO_CORRETIVA = 'Corretiva'
+TIPO_PREVENTIVA = 'Preventiva'
+DIAS_POR_ANO = 365.25
+TABELAS_CONFIABILIDADE = ('equipamentos', 'manutencoes', 'rollups')
+
+QUERY_CONFIABILIDADE_EQUIPAMENTOS = """
+    WITH corretivas AS (
+        SELECT m.equipamento_id,
+               m.data_manutencao - LAG(m.data_manutencao) OVER (
+                   PARTITION BY m.equipamento_id ORDER BY m.data_manutencao, m.id
+               ) AS intervalo_dias
+        FROM manutencoes m
+        JOIN equipamentos e ON m.equipamento_id = e.id
+        WHERE m.tipo_manutencao = :corretiva
+          AND m.data_manutencao BETWEEN :data_inicio AND :data_fim
+          AND e.sistema_alocado = ANY(:sistemas)
+    ),
+    intervalos AS (
+        SELECT equipamento_id, COUNT(intervalo_dias) AS intervalos, SUM(intervalo_dias) AS soma_intervalos_dias
+        FROM corretivas
+        GROUP BY equipamento_id
+    ),
+    eventos AS (
+        SELECT m.equipamento_id,
+               COUNT(*) FILTER (WHERE m.tipo_manutencao = :corretiva AND m.data_manutencao >= :data_inicio) AS corretivas,
+               COUNT(*) FILTER (WHERE m.tipo_manutencao = :preventiva AND m.data_manutencao >= :data_inicio) AS preventivas,
+               COALESCE(SUM(m.custo_manutencao) FILTER (WHERE m.data_manutencao > :inicio_12m), 0) AS custo_12m
+        FROM manutencoes m
+        JOIN equipamentos e ON m.equipamento_id = e.id
+        WHERE m.data_manutencao BETWEEN LEAST(CAST(:data_inicio AS DATE), CAST(:inicio_12m AS DATE)) AND :data_fim
+          AND e.sistema_alocado = ANY(:sistemas)
+        GROUP BY m.equipamento_id
+    )
+    SELECT e.id AS equipamento_id, e.descricao, e.numero_serie, e.sistema_alocado, e.data_aquisicao,
+           COALESCE(ev.corretivas, 0) AS corretivas,
+           COALESCE(ev.preventivas, 0) AS preventivas,
+           COALESCE(i.intervalos, 0) AS intervalos,
+           COALESCE(i.soma_intervalos_dias, 0) AS soma_intervalos_dias,
+           (CAST(:data_fim AS DATE) - GREATEST(COALESCE(e.data_aquisicao, CAST(:data_inicio AS DATE)), CAST(:data_inicio AS DATE)) + 1)
+               / :dias_por_ano AS anos_exposicao,
+           COALESCE(ev.custo_12m, 0) AS custo_12m
+    FROM equipamentos e
+    LEFT JOIN eventos ev ON ev.equipamento_id = e.id
+    LEFT JOIN intervalos i ON i.equipamento_id = e.id
+    -- Equipamentos adquiridos depois do período não têm exposição e ficam de fora
+    WHERE e.sistema_alocado = ANY(:sistemas)
+      AND COALESCE(e.data_aquisicao, CAST(:data_inicio AS DATE)) <= :data_fim
+"""
+
+def _inicio_janela_12_meses(data_fim):
+    """Véspera do início da janela de 12 meses encerrada em data_fim (a janela é (inicio, data_fim])."""
+    try:
+        return data_fim.replace(year=data_fim.year - 1)
+    except ValueError:
+        # 29 de fevereiro
+        return data_fim.replace(year=data_fim.year - 1, day=28)
+
+def _calcular_indicadores(df):
+    """Acrescenta MTBF, taxa de falhas e razão preventiva/corretiva a partir das somas e contagens (vetorizado)."""
+    intervalos = df['intervalos'].astype('float64')
+    corretivas = df['corretivas'].astype('float64')
+    df['mtbf_dias'] = (df['soma_intervalos_dias'].astype('float64') / intervalos.replace(0, np.nan))
+    df['taxa_falhas_ano'] = corretivas / df['anos_exposicao'].astype('float64').where(df['anos_exposicao'] > 0)
+    df['razao_preventiva_corretiva'] = df['preventivas'].astype('float64') / corretivas.replace(0, np.nan)
+    return df
+
+@cache_por_tabela(*TABELAS_CONFIABILIDADE)
+def confiabilidade_por_equipamento(data_inicio, data_fim, sistemas):
+    """Indicadores de confiabilidade de cada equipamento dos sistemas selecionados, no período."""
+    try:
+        df = _consultar_df(QUERY_CONFIABILIDADE_EQUIPAMENTOS, {
+            'data_inicio': data_inicio, 'data_fim': data_fim, 'sistemas': list(sistemas),
+            'inicio_12m': _inicio_janela_12_meses(data_fim), 'dias_por_ano': DIAS_POR_ANO,
+            'corretiva': TIPO_CORRETIVA, 'preventiva': TIPO_PREVENTIVA,
+        })
+        if df.empty: return df
+        df['data_aquisicao'] = pd.to_datetime(df['data_aquisicao'])
+        df['custo_12m'] = df['custo_12m'].astype('float64')
+        return _calcular_indicadores(df).sort_values(['taxa_falhas_ano', 'equipamento_id'], ascending=[False, True], ignore_index=True)
+    except Exception as e:
+        print(f"Ocorreu um erro ao calcular a confiabilidade por equipamento: {e}")
+        return pd.DataFrame()
+
+# Numeradores e denominadores dos indicadores: somados, dão os indicadores de qualquer grupo de equipamentos
+COLUNAS_SOMAVEIS = ['corretivas', 'preventivas', 'intervalos', 'soma_intervalos_dias', 'anos_exposicao', 'custo_12m']
+
+def resumir_por_sistema(df_equipamentos):
+    """
+    Agrega os indicadores por sistema somando numeradores e denominadores de cada equipamento
+    (o MTBF do sistema é a média de todos os seus intervalos, e não a média dos MTBFs).
+    """
+    resumo = df_equipamentos.groupby('sistema_alocado', sort=True, observed=True).agg(
+        equipamentos=('equipamento_id', 'size'), **{coluna: (coluna, 'sum') for coluna in COLUNAS_SOMAVEIS}
+    ).reset_index()
+    return _calcular_indicadores(resumo)
+
+def resumir_frota(df_equipamentos):
+    """Indicadores de todos os equipamentos juntos (Series), calculados como em resumir_por_sistema."""
+    return _calcular_indicadores(df_equipamentos[COLUNAS_SOMAVEIS].sum().to_frame().T).iloc[0]
+
+@cache_por_tabela(*TABELAS_CONFIABILIDADE)
+def custo_movel_12_meses(data_inicio, data_fim, sistemas):
+    """
+    Custo de manutenção de cada mês do período e o acumulado dos 12 meses encerrados nele, por sistema.
+    Os meses sem manutenção entram com custo zero, para que a janela de 12 linhas cubra sempre 12 meses;
+    os 11 meses anteriores ao período são lidos apenas para compor a janela dos primeiros meses.
+    """
+    try:
+        primeiro_mes = data_inicio.replace(day=1)
+        inicio_serie = (pd.Timestamp(primeiro_mes) - pd.DateOffset(months=11)).date()
+        query = f"""
+            WITH {BASE_MANUTENCOES_MENSAL},
+            mensal AS (
+                SELECT mes, sistema_alocado, SUM(custo) AS custo FROM base GROUP BY mes, sistema_alocado
+            ),
+            meses AS (
+                SELECT CAST(generate_series(CAST(:inicio_serie AS DATE), CAST(:fim_serie AS DATE), INTERVAL '1 month') AS DATE) AS mes
+            ),
+            grade AS (
+                SELECT meses.mes, s.sistema_alocado, COALESCE(mensal.custo, 0) AS custo
+                FROM meses
+                CROSS JOIN (SELECT DISTINCT sistema_alocado FROM mensal) s
+                LEFT JOIN mensal ON mensal.mes = meses.mes AND mensal.sistema_alocado = s.sistema_alocado
+            ),
+            movel AS (
+                SELECT mes, sistema_alocado, custo AS custo_mes,
+                       SUM(custo) OVER (PARTITION BY sistema_alocado ORDER BY mes ROWS BETWEEN 11 PRECEDING AND CURRENT ROW) AS custo_12m
+                FROM grade
+            )
+            SELECT mes, sistema_alocado, custo_mes, custo_12m FROM movel
+            WHERE mes >= :primeiro_mes
+            ORDER BY sistema_alocado, mes
+        """
+        params = _params_rollup(inicio_serie, data_fim, sistemas)
+        params.update(inicio_serie=inicio_serie, fim_serie=data_fim.replace(day=1), primeiro_mes=primeiro_mes)
+        df = _consultar_df(query, params)
+        if df.empty: return df
+        df['mes'] = pd.to_datetime(df['mes'])
+        return df.astype({'custo_mes': 'float64', 'custo_12m': 'float64'})
+    except Exception as e:
+        print(f"Ocorreu um erro ao calcular o custo móvel de 12 meses: {e}")
+        return pd.DataFrame()
@@ -1,57 +1,159 @@
 # kpi_equipamentos/database/connection.py
 
 import os
+import threading
+import time
 import streamlit as st
-from sqlalchemy import create_engine, exc
-
-# Tenta carregar dos segredos do Streamlit (quando em produção na nuvem)
-try:
-    # Esta verificação agora é segura por causa da lógica abaixo
-    if hasattr(st, 'secrets') and "postgres" in st.secrets:
-        DB_USER = st.secrets["postgres"]["user"]
-        DB_PASS = st.secrets["postgres"]["password"]
-        DB_HOST = st.secrets["postgres"]["host"]
-        DB_PORT = st.secrets["postgres"]["port"]
-        DB_NAME = st.secrets["postgres"]["dbname"]
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.pool import QueuePool
+from .instrumentacao import instrumentar_engine
+
+# As credenciais são lidas e o engine é criado apenas no primeiro acesso ao banco (get_engine), e não na
+# importação deste módulo: páginas e scripts que só importam a camada de dados não pagam a leitura dos
+# segredos nem a criação do engine.
+
+def _usa_segredos():
+    """Indica se há uma seção [postgres] nos segredos do Streamlit (produção)."""
+    try:
+        return hasattr(st, 'secrets') and "postgres" in st.secrets
+    except (FileNotFoundError, st.errors.StreamlitAPIException):
+        return False
+
+def montar_url_conexao():
+    """Monta a string de conexão a partir dos segredos do Streamlit (produção) ou das variáveis de ambiente (local)."""
+    try:
+        segredos = st.secrets["postgres"] if _usa_segredos() else {}
+        DB_USER, DB_PASS = segredos["user"], segredos["password"]
+        DB_HOST, DB_PORT, DB_NAME = segredos["host"], segredos["port"], segredos["dbname"]
         print("INFO: Credenciais carregadas dos segredos do Streamlit (Modo Produção).")
-    else:
-        # Força a queda para o except se st.secrets não tiver a chave
-        raise KeyError("Chave 'postgres' não encontrada nos segredos.")
-
-# Se der erro (porque st.secrets não existe ou não tem a chave), usa as credenciais locais.
-except (KeyError, FileNotFoundError, st.errors.StreamlitAPIException):
-    print("INFO: Segredos do Streamlit não encontrados ou incompletos. Carregando credenciais locais (Modo Desenvolvimento).")
-    
-    DB_USER = os.environ.get("DB_USER", "postgres")
-    DB_PASS = os.environ.get("DB_PASS", "purplebelt2025") # <<< IMPORTANTE: Coloque a senha do seu banco LOCAL aqui
-    DB_HOST = os.environ.get("DB_HOST", "localhost")
-    DB_PORT = int(os.environ.get("DB_PORT", 5432))
-    DB_NAME = os.environ.get("DB_NAME", "kpi_equipamentos_db")
-
-# --- Cria a String de Conexão e o Engine ---
-
-# String de conexão base
-db_url = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-
-# ADICIONA O PARÂMETRO SSL QUANDO EM PRODUÇÃO
-if hasattr(st, 'secrets') and "postgres" in st.secrets:
-    db_url += "?sslmode=require"
-    print("INFO: SSL mode 'require' adicionado à URL de conexão (Modo Produção).")
-
-# Cria o engine do SQLAlchemy
-try:
-    engine = create_engine(db_url)
+    # Sem a seção [postgres] (ou com ela incompleta), usa as credenciais locais.
+    except KeyError:
+        print("INFO: Segredos do Streamlit não encontrados ou incompletos. Carregando credenciais locais (Modo Desenvolvimento).")
+        DB_USER = os.environ.get("DB_USER", "postgres")
+        DB_PASS = os.environ.get("DB_PASS", "purplebelt2025") # <<< IMPORTANTE: Coloque a senha do seu banco LOCAL aqui
+        DB_HOST = os.environ.get("DB_HOST", "localhost")
+        DB_PORT = int(os.environ.get("DB_PORT", 5432))
+        DB_NAME = os.environ.get("DB_NAME", "kpi_equipamentos_db")
+
+    db_url = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    # ADICIONA O PARÂMETRO SSL QUANDO EM PRODUÇÃO
+    if _usa_segredos():
+        db_url += "?sslmode=require"
+        print("INFO: SSL mode 'require' adicionado à URL de conexão (Modo Produção).")
+    return db_url
+
+# --- Configuração do Pool de Conexões ---
+# Cada opção pode vir da seção [postgres] dos segredos ou da variável de ambiente DB_<OPÇÃO> (ex: DB_POOL_SIZE).
+def _ler_opcao(chave, padrao, conversor=int):
+    """Lê uma opção de configuração do pool, com valor padrão."""
+    valor = st.secrets["postgres"].get(chave) if _usa_segredos() else None
+    if valor is None:
+        valor = os.environ.get(f"DB_{chave.upper()}")
+    if valor is None or valor == "":
+        return padrao
+    if conversor is bool and isinstance(valor, str):
+        return valor.strip().lower() in ("1", "true", "sim", "yes", "on")
+    return conversor(valor)
+
+def _carregar_config_pool():
+    """Retorna as opções do pool de conexões (tamanho, overflow, reciclagem, pre-ping e timeouts)."""
+    return {
+        'pool_size': _ler_opcao('pool_size', 5),
+        'max_overflow': _ler_opcao('max_overflow', 10),
+        'pool_timeout': _ler_opcao('pool_timeout', 30),
+        'pool_recycle': _ler_opcao('pool_recycle', 1800),
+        'pool_pre_ping': _ler_opcao('pool_pre_ping', True, bool),
+        'statement_timeout_ms': _ler_opcao('statement_timeout_ms', None),
+    }
+
+# --- Estatísticas do Pool ---
+
+@st.cache_resource
+def _estatisticas_pool():
+    """Contadores do pool compartilhados por todas as sessões do processo."""
+    return {
+        'lock': threading.Lock(), 'conexoes_abertas': 0, 'invalidacoes': 0,
+        'obtencoes': 0, 'espera_total_s': 0.0, 'espera_max_s': 0.0,
+    }
+
+def _registrar_evento(chave, espera=None):
+    """Atualiza os contadores do pool de forma segura entre threads."""
+    stats = _estatisticas_pool()
+    with stats['lock']:
+        stats[chave] += 1
+        if espera is not None:
+            stats['espera_total_s'] += espera
+            stats['espera_max_s'] = max(stats['espera_max_s'], espera)
+
+class PoolMedido(QueuePool):
+    """QueuePool que mede quanto tempo cada pedido espera para obter uma conexão."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _registrar_evento('obtencoes', time.perf_counter() - inicio)
+
+def criar_engine(url, pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800, pool_pre_ping=True, statement_timeout_ms=None):
+    """
+    Cria um engine do SQLAlchemy com pool configurável.
+    - pool_pre_ping descarta conexões mortas (ex: após longos períodos ociosos) antes de entregá-las.
+    - pool_recycle renova conexões mais antigas que o limite (em segundos).
+    - statement_timeout_ms, se informado, limita a duração de cada comando no servidor.
+    """
+    connect_args = {}
+    if statement_timeout_ms:
+        connect_args['options'] = f"-c statement_timeout={int(statement_timeout_ms)}"
+
+    novo_engine = create_engine(
+        url, poolclass=PoolMedido, pool_size=pool_size, max_overflow=max_overflow,
+        pool_timeout=pool_timeout, pool_recycle=pool_recycle, pool_pre_ping=pool_pre_ping,
+        connect_args=connect_args
+    )
+    event.listen(novo_engine, "connect", lambda *args: _registrar_evento('conexoes_abertas'))
+    event.listen(novo_engine, "invalidate", lambda *args: _registrar_evento('invalidacoes'))
+    instrumentar_engine(novo_engine)
+    return novo_engine
+
+@st.cache_resource
+def _engine_compartilhado():
+    """Cria uma única vez, por processo, o engine usado por todas as sessões."""
+    novo_engine = criar_engine(montar_url_conexao(), **_carregar_config_pool())
     print("INFO: Engine do SQLAlchemy criado com sucesso.")
-except Exception as e:
-    print(f"ERRO: Falha ao criar o engine do SQLAlchemy. Erro: {e}")
-    engine = None
+    return novo_engine
 
 def get_engine():
-    """Retorna a instância do engine do SQLAlchemy."""
-    return engine
+    """Retorna a instância compartilhada do engine do SQLAlchemy (ou None se não puder ser criada)."""
+    try:
+        return _engine_compartilhado()
+    except Exception as e:
+        print(f"ERRO: Falha ao criar o engine do SQLAlchemy. Erro: {e}")
+        return None
+
+def estatisticas_pool():
+    """Retorna um resumo do uso do pool: conexões em uso, ociosas, overflow e tempo de espera."""
+    engine = get_engine()
+    if engine is None: return {}
+    stats = _estatisticas_pool()
+    with stats['lock']:
+        obtencoes = stats['obtencoes']
+        resumo = {
+            'tamanho_pool': engine.pool.size(),
+            'em_uso': engine.pool.checkedout(),
+            'ociosas': engine.pool.checkedin(),
+            'overflow': max(engine.pool.overflow(), 0),
+            'conexoes_abertas': stats['conexoes_abertas'],
+            'invalidacoes': stats['invalidacoes'],
+            'obtencoes': obtencoes,
+            'espera_media_ms': (stats['espera_total_s'] / obtencoes * 1000) if obtencoes else 0.0,
+            'espera_max_ms': stats['espera_max_s'] * 1000,
+        }
+    return resumo
 
 def get_db_connection():
     """Estabelece e retorna uma nova conexão com o banco de dados."""
+    engine = get_engine()
     if engine is None:
         st.error("Falha ao conectar ao banco de dados. A aplicação pode não funcionar corretamente.")
         return None
@@ -61,5 +163,3 @@ def get_db_connection():
     except exc.OperationalError as e:
         st.error(f"Falha ao conectar ao banco de dados. A aplicação pode não funcionar corretamente. Erro: {e}")
         return None
-
-
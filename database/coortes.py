@@ -0,0 +1,147 @@
+# kpi_equipamentos/database/coortes.py
+
+import pandas as pd
+from .cache import cache_por_tabela
+from .kpi_queries import _consultar_df
+
+# Análise de coortes de aquisição do Dashboard de KPIs.
+# Os equipamentos são agrupados pelo ano ou trimestre de aquisição, e o custo das suas manutenções é somado
+# pela idade do equipamento na data da manutenção. O acumulado de cada coorte conforme os ativos envelhecem
+# é uma soma de janela no PostgreSQL, e só a curva já resumida (coorte x idade) chega à aplicação.
+# As aquisições e as manutenções têm filtros de data independentes: a coorte é escolhida pela data de
+# aquisição, e o período de manutenção limita apenas os custos somados.
+# A situação da garantia de cada manutenção é a da data em que foi feita (entre inicio_garantia e fim_garantia).
+# Já 'em_garantia_hoje' depende da data de referência recebida como parâmetro (e não de CURRENT_DATE):
+# ela faz parte da chave do cache, então o resumo guardado não fica preso ao dia em que foi calculado.
+
+# Granularidade -> (unidade do date_trunc, meses por unidade de idade, formato do rótulo da coorte)
+GRANULARIDADES_COORTE = {
+    'Ano': ('year', 12, 'YYYY'),
+    'Trimestre': ('quarter', 3, 'YYYY"-T"Q'),
+}
+TABELAS_COORTES = ('equipamentos', 'manutencoes')
+
+# Equipamentos adquiridos no período de aquisição, com a coorte a que pertencem
+BASE_COORTES = """
+    coortes AS (
+        SELECT e.id, e.data_aquisicao, e.custo_aquisicao, e.inicio_garantia, e.fim_garantia,
+               CAST(date_trunc(:unidade, e.data_aquisicao) AS DATE) AS coorte
+        FROM equipamentos e
+        WHERE e.data_aquisicao BETWEEN :aquisicao_inicio AND :aquisicao_fim
+          AND e.sistema_alocado = ANY(:sistemas)
+    ),
+    tamanhos AS (
+        SELECT coorte, COUNT(*) AS equipamentos, COALESCE(SUM(custo_aquisicao), 0) AS custo_aquisicao
+        FROM coortes
+        GROUP BY coorte
+    ),
+    eventos AS (
+        SELECT c.coorte, m.custo_manutencao,
+               -- Idade na data da manutenção, em anos ou trimestres completos desde a aquisição
+               GREATEST(CAST(EXTRACT(YEAR FROM age(m.data_manutencao, c.data_aquisicao)) * 12
+                             + EXTRACT(MONTH FROM age(m.data_manutencao, c.data_aquisicao)) AS INTEGER), 0) / :meses_por_idade AS idade,
+               CASE
+                   WHEN c.fim_garantia IS NULL THEN 'nao_informada'
+                   WHEN m.data_manutencao BETWEEN COALESCE(c.inicio_garantia, c.data_aquisicao) AND c.fim_garantia THEN 'em_garantia'
+                   ELSE 'fora_garantia'
+               END AS situacao_garantia
+        FROM manutencoes m
+        JOIN coortes c ON m.equipamento_id = c.id
+        WHERE m.data_manutencao BETWEEN :manutencao_inicio AND :manutencao_fim
+    )
+"""
+
+QUERY_CUSTO_ACUMULADO_COORTES = f"""
+    WITH {BASE_COORTES},
+    custos AS (
+        SELECT coorte, idade, SUM(custo_manutencao) AS custo FROM eventos GROUP BY coorte, idade
+    ),
+    -- Todas as idades já alcançadas pela coorte até o fim do período de manutenção, mesmo sem custo
+    grade AS (
+        SELECT t.coorte, t.equipamentos, idade
+        FROM tamanhos t
+        CROSS JOIN LATERAL generate_series(
+            0, GREATEST(CAST(EXTRACT(YEAR FROM age(CAST(:manutencao_fim AS DATE), t.coorte)) * 12
+                             + EXTRACT(MONTH FROM age(CAST(:manutencao_fim AS DATE), t.coorte)) AS INTEGER), 0) / :meses_por_idade
+        ) AS idade
+    )
+    SELECT to_char(g.coorte, :formato) AS coorte, g.idade, g.equipamentos,
+           CAST(COALESCE(c.custo, 0) AS float8) AS custo_idade,
+           CAST(SUM(COALESCE(c.custo, 0)) OVER (PARTITION BY g.coorte ORDER BY g.idade) AS float8) AS custo_acumulado,
+           CAST(SUM(COALESCE(c.custo, 0)) OVER (PARTITION BY g.coorte ORDER BY g.idade) / g.equipamentos AS float8) AS custo_acumulado_por_equipamento
+    FROM grade g
+    LEFT JOIN custos c ON c.coorte = g.coorte AND c.idade = g.idade
+    ORDER BY g.coorte, g.idade;
+"""
+
+QUERY_RESUMO_COORTES = f"""
+    WITH {BASE_COORTES},
+    manutencao AS (
+        SELECT coorte, COUNT(*) AS manutencoes, COALESCE(SUM(custo_manutencao), 0) AS custo_manutencao,
+               COALESCE(SUM(custo_manutencao) FILTER (WHERE situacao_garantia = 'em_garantia'), 0) AS custo_em_garantia,
+               COALESCE(SUM(custo_manutencao) FILTER (WHERE situacao_garantia = 'fora_garantia'), 0) AS custo_fora_garantia,
+               COALESCE(SUM(custo_manutencao) FILTER (WHERE situacao_garantia = 'nao_informada'), 0) AS custo_garantia_nao_informada
+        FROM eventos
+        GROUP BY coorte
+    ),
+    garantia AS (
+        SELECT coorte, COUNT(*) FILTER (WHERE fim_garantia >= :referencia) AS em_garantia_hoje FROM coortes GROUP BY coorte
+    )
+    SELECT RANK() OVER (ORDER BY COALESCE(mt.custo_manutencao, 0) / t.equipamentos DESC) AS posicao,
+           to_char(t.coorte, :formato) AS coorte, t.equipamentos, g.em_garantia_hoje,
+           COALESCE(mt.manutencoes, 0) AS manutencoes,
+           CAST(t.custo_aquisicao AS float8) AS custo_aquisicao,
+           CAST(COALESCE(mt.custo_manutencao, 0) AS float8) AS custo_manutencao,
+           CAST(COALESCE(mt.custo_manutencao, 0) / t.equipamentos AS float8) AS custo_manutencao_por_equipamento,
+           CAST(COALESCE(mt.custo_em_garantia, 0) AS float8) AS custo_em_garantia,
+           CAST(COALESCE(mt.custo_fora_garantia, 0) AS float8) AS custo_fora_garantia,
+           CAST(COALESCE(mt.custo_garantia_nao_informada, 0) AS float8) AS custo_garantia_nao_informada
+    FROM tamanhos t
+    JOIN garantia g ON g.coorte = t.coorte
+    LEFT JOIN manutencao mt ON mt.coorte = t.coorte
+    ORDER BY posicao, t.coorte;
+"""
+
+def _params_coortes(granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas):
+    """Monta os parâmetros comuns às consultas de coortes."""
+    unidade, meses_por_idade, formato = GRANULARIDADES_COORTE[granularidade]
+    return {
+        'unidade': unidade, 'meses_por_idade': meses_por_idade, 'formato': formato,
+        'aquisicao_inicio': aquisicao_inicio, 'aquisicao_fim': aquisicao_fim,
+        'manutencao_inicio': manutencao_inicio, 'manutencao_fim': manutencao_fim, 'sistemas': list(sistemas),
+    }
+
+@cache_por_tabela(*TABELAS_COORTES)
+def custo_acumulado_coortes(granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas):
+    """
+    Custo de manutenção acumulado de cada coorte por idade (0, 1, 2... anos ou trimestres desde a aquisição),
+    total e por equipamento, para comparar safras de tamanhos diferentes na mesma idade.
+    """
+    try:
+        return _consultar_df(QUERY_CUSTO_ACUMULADO_COORTES, _params_coortes(
+            granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas
+        ))
+    except Exception as e:
+        print(f"Ocorreu um erro ao calcular o custo acumulado por coorte: {e}")
+        return pd.DataFrame(columns=['coorte', 'idade', 'equipamentos', 'custo_idade', 'custo_acumulado', 'custo_acumulado_por_equipamento'])
+
+def consulta_resumo_coortes(granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas, referencia):
+    """
+    Retorna (SQL, parâmetros) do resumo por coorte, para exportação em lotes (ver database/exportacao.py).
+    'referencia' é a data em que 'em_garantia_hoje' é avaliada (normalmente a data atual).
+    """
+    return QUERY_RESUMO_COORTES, {
+        **_params_coortes(granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas),
+        'referencia': referencia,
+    }
+
+@cache_por_tabela(*TABELAS_COORTES)
+def resumo_coortes(granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas, referencia):
+    """Uma linha por coorte, da que mais custou em manutenção por equipamento para a que menos custou."""
+    try:
+        return _consultar_df(*consulta_resumo_coortes(
+            granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas, referencia
+        ))
+    except Exception as e:
+        print(f"Ocorreu um erro ao resumir as coortes: {e}")
+        return pd.DataFrame()
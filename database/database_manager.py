@@ -3,8 +3,24 @@
 import pandas as pd
 from sqlalchemy import text
 from .connection import get_db_connection, get_engine
+from .cache import cache_por_tabela, cache_por_registro, invalidar, invalidar_registros
+from .cache_compartilhado import cache_compartilhado
+from .rollups import solicitar_atualizacao
+from .esquema import tipar_equipamentos, tipar_manutencoes, concatenar_tipados, ESQUEMA_EQUIPAMENTOS, ESQUEMA_MANUTENCOES
+from .leitura import ler_em_lotes, consultar_em_lotes
 import datetime
-import streamlit as st # IMPORTANTE: Adicionar esta importação
+import threading
+import streamlit as st
+
+def _registrar_escrita(*tabelas, equipamentos=()):
+    """
+    Invalida os caches das tabelas alteradas e os caches por registro dos equipamentos afetados,
+    e agenda a atualização dos rollups do dashboard.
+    """
+    invalidar(*tabelas)
+    if equipamentos:
+        invalidar_registros('equipamento', *equipamentos)
+    solicitar_atualizacao()
 
 # --- Funções de Equipamentos ---
 
@@ -24,8 +40,8 @@ def adicionar_equipamento(numero_serie, descricao, modelo, status, sistema_aloca
         }
         conn.execute(query, params)
         conn.commit()
-        # Limpa o cache para que a lista de equipamentos seja atualizada na próxima vez que for carregada
-        st.cache_data.clear()
+        # Invalida apenas os caches derivados da tabela de equipamentos
+        _registrar_escrita('equipamentos')
         return True
     except Exception as e:
         print(f"Ocorreu um erro ao adicionar o equipamento: {e}")
@@ -34,25 +50,25 @@ def adicionar_equipamento(numero_serie, descricao, modelo, status, sistema_aloca
     finally:
         if conn: conn.close()
 
-@st.cache_data
+QUERY_EQUIPAMENTOS = "SELECT id, numero_serie, descricao, modelo, status, sistema_alocado, pedido_compra, data_aquisicao, custo_aquisicao, inicio_garantia, fim_garantia FROM equipamentos ORDER BY descricao, id"
+
+def iterar_equipamentos(tamanho_lote=None):
+    """
+    Modo em lotes de listar_equipamentos_df: gera DataFrames já tipados de até 'tamanho_lote' linhas,
+    lidos de um cursor no servidor (ver database/leitura.py). Erros de banco são propagados ao consumidor.
+    """
+    for lote in ler_em_lotes(QUERY_EQUIPAMENTOS, tamanho_lote=tamanho_lote):
+        yield tipar_equipamentos(lote)
+
+@cache_por_tabela('equipamentos')
+@cache_compartilhado('equipamentos')
 def listar_equipamentos_df():
     """Lista todos os equipamentos do banco de dados em um DataFrame do Pandas."""
-    engine = get_engine()
-    if engine is None: return pd.DataFrame()
+    if get_engine() is None: return pd.DataFrame()
     try:
-        query = "SELECT id, numero_serie, descricao, modelo, status, sistema_alocado, pedido_compra, data_aquisicao, custo_aquisicao, inicio_garantia, fim_garantia FROM equipamentos ORDER BY descricao;"
-        
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(query), conn)
-        
-        if not df.empty and 'fim_garantia' in df.columns:
-            hoje = pd.to_datetime(datetime.date.today())
-            df['fim_garantia'] = pd.to_datetime(df['fim_garantia'], errors='coerce')
-            df['em_garantia'] = df['fim_garantia'].apply(lambda x: 'Sim' if pd.notna(x) and x >= hoje else 'Não')
-        else:
-            df['em_garantia'] = 'Não'
-            
-        return df
+        # Cada lote é tipado (datas, custos, categorias e colunas derivadas) antes da leitura do próximo,
+        # então o resultado bruto da consulta nunca fica inteiro em memória
+        return concatenar_tipados(iterar_equipamentos(), ESQUEMA_EQUIPAMENTOS).reset_index(drop=True)
     except Exception as e:
         print(f"Ocorreu um erro ao listar os equipamentos: {e}")
         return pd.DataFrame()
@@ -77,7 +93,7 @@ def atualizar_equipamento(equipamento_id, numero_serie, descricao, modelo, statu
         }
         result = conn.execute(query, params)
         conn.commit()
-        st.cache_data.clear()
+        _registrar_escrita('equipamentos', equipamentos=[equipamento_id])
         return result.rowcount > 0
     except Exception as e:
         print(f"Ocorreu um erro ao atualizar o equipamento: {e}")
@@ -98,7 +114,7 @@ def excluir_equipamento(equipamento_id):
         result = conn.execute(query_equipamento, {'id': equipamento_id})
         
         conn.commit()
-        st.cache_data.clear()
+        _registrar_escrita('equipamentos', 'manutencoes', equipamentos=[equipamento_id])
         return result.rowcount > 0
     except Exception as e:
         print(f"Ocorreu um erro ao excluir o equipamento: {e}")
@@ -107,6 +123,205 @@ def excluir_equipamento(equipamento_id):
     finally:
         if conn: conn.close()
 
+# --- Dossiê de um Equipamento ---
+# Consultas de um único equipamento pelo id (chave primária e índice (equipamento_id, data_manutencao)),
+# em cache por equipamento: uma escrita invalida apenas o dossiê do equipamento afetado.
+
+# Rótulo de exibição de um equipamento nos seletores (o mesmo de 'display_name' em esquema.py)
+ROTULO_EQUIPAMENTO = "descricao || ' (S/N: ' || numero_serie || ')'"
+
+# --- Busca de Equipamentos para Seletores ---
+# Em vez de enviar todos os equipamentos a cada seletor, a página pede ao banco apenas as melhores
+# correspondências do texto digitado. Cada palavra precisa aparecer na descrição, no nº de série ou no
+# modelo (ILIKE); com o pg_trgm instalado (migração 7) a consulta usa o índice de trigramas e também
+# aceita erros de digitação (word_similarity), ordenando pelas mais parecidas.
+
+LIMITE_OPCOES_EQUIPAMENTOS = 20
+# Deve ser idêntica à expressão do índice idx_equipamentos_busca_trgm (migração 7)
+TEXTO_BUSCA_EQUIPAMENTO = "(descricao || ' ' || numero_serie || ' ' || COALESCE(modelo, ''))"
+
+@st.cache_resource
+def _trigramas_disponiveis():
+    """Indica, uma vez por processo, se a extensão pg_trgm está instalada no banco."""
+    engine = get_engine()
+    if engine is None: return False
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")).scalar()
+    except Exception as e:
+        print(f"Ocorreu um erro ao verificar a extensão pg_trgm: {e}")
+        return False
+
+def _padrao_like(palavra):
+    """Padrão '%palavra%' com os curingas do LIKE escapados."""
+    return "%" + palavra.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+@cache_por_tabela('equipamentos', max_entries=1000)
+def buscar_opcoes_equipamentos(termo="", limite=LIMITE_OPCOES_EQUIPAMENTOS):
+    """
+    Retorna até 'limite' pares (id, rótulo) dos equipamentos que correspondem ao termo,
+    os mais parecidos primeiro. Sem termo, retorna os primeiros em ordem de descrição.
+    """
+    engine = get_engine()
+    if engine is None: return []
+    palavras = termo.split()
+    params = {'limite': limite}
+    if not palavras:
+        filtro, ordem = "TRUE", "descricao, id"
+    else:
+        condicoes = []
+        for i, palavra in enumerate(palavras):
+            condicoes.append(f"{TEXTO_BUSCA_EQUIPAMENTO} ILIKE :palavra_{i} ESCAPE '\\'")
+            params[f'palavra_{i}'] = _padrao_like(palavra)
+        filtro = " AND ".join(condicoes)
+        if _trigramas_disponiveis():
+            filtro = f"({filtro}) OR :termo <% {TEXTO_BUSCA_EQUIPAMENTO}"
+            ordem = f"word_similarity(:termo, {TEXTO_BUSCA_EQUIPAMENTO}) DESC, descricao, id"
+            params['termo'] = termo
+        else:
+            ordem = "descricao, id"
+    try:
+        query = f"SELECT id, {ROTULO_EQUIPAMENTO} AS rotulo FROM equipamentos WHERE {filtro} ORDER BY {ordem} LIMIT :limite"
+        with engine.connect() as conn:
+            return [tuple(linha) for linha in conn.execute(text(query), params).all()]
+    except Exception as e:
+        print(f"Ocorreu um erro ao buscar equipamentos: {e}")
+        return []
+
+@cache_por_registro('equipamento')
+def obter_rotulo_equipamento(equipamento_id):
+    """Retorna o rótulo de exibição de um equipamento (ou None se não existir)."""
+    engine = get_engine()
+    if engine is None: return None
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                text(f"SELECT {ROTULO_EQUIPAMENTO} FROM equipamentos WHERE id = :id"), {'id': int(equipamento_id)}
+            ).scalar()
+    except Exception as e:
+        print(f"Ocorreu um erro ao obter o equipamento: {e}")
+        return None
+
+@cache_por_registro('equipamento')
+def obter_equipamento(equipamento_id):
+    """Retorna os dados de um equipamento (dicionário, já tipado) ou None se não existir."""
+    engine = get_engine()
+    if engine is None: return None
+    try:
+        query = "SELECT id, numero_serie, descricao, modelo, status, sistema_alocado, pedido_compra, data_aquisicao, custo_aquisicao, inicio_garantia, fim_garantia FROM equipamentos WHERE id = :id;"
+        with engine.connect() as conn:
+            df = pd.read_sql_query(text(query), conn, params={'id': int(equipamento_id)})
+        if df.empty: return None
+        return tipar_equipamentos(df).iloc[0].to_dict()
+    except Exception as e:
+        print(f"Ocorreu um erro ao obter o equipamento: {e}")
+        return None
+
+QUERY_HISTORICO_EQUIPAMENTO = """
+    SELECT id, data_manutencao, tipo_manutencao, motivo_manutencao, custo_manutencao
+    FROM manutencoes
+    WHERE equipamento_id = :id
+    ORDER BY data_manutencao DESC, id DESC;
+"""
+
+def consulta_historico_equipamento(equipamento_id):
+    """Retorna (SQL, parâmetros) do histórico de manutenções de um equipamento, para exportação (ver database/exportacao.py)."""
+    return QUERY_HISTORICO_EQUIPAMENTO, {'id': int(equipamento_id)}
+
+@cache_por_registro('equipamento')
+def listar_manutencoes_por_equipamento(equipamento_id):
+    """Lista o histórico de manutenções de um equipamento, da mais recente para a mais antiga."""
+    engine = get_engine()
+    if engine is None: return pd.DataFrame()
+    try:
+        with engine.connect() as conn:
+            df = pd.read_sql_query(text(QUERY_HISTORICO_EQUIPAMENTO), conn, params={'id': int(equipamento_id)})
+        return tipar_manutencoes(df)
+    except Exception as e:
+        print(f"Ocorreu um erro ao listar as manutenções do equipamento: {e}")
+        return pd.DataFrame()
+
+# --- Listagens Paginadas (Gerenciar Dados) ---
+# Paginação por chave (keyset): cada página começa logo após o último par (chave de ordenação, id)
+# da página anterior, então o custo de uma página não depende da sua posição na lista.
+
+ORDENACOES_EQUIPAMENTOS = {
+    'Descrição': 'e.descricao',
+    'Número de Série': 'e.numero_serie',
+    'Sistema': "COALESCE(e.sistema_alocado, '')",
+    'Data de Aquisição': "COALESCE(e.data_aquisicao, DATE '0001-01-01')",
+    'Ordem de Cadastro': 'e.id',
+}
+
+ORDENACOES_MANUTENCOES = {
+    'Data': 'm.data_manutencao',
+    'Equipamento': 'e.descricao',
+    'Custo': 'COALESCE(m.custo_manutencao, 0)',
+    'Ordem de Cadastro': 'm.id',
+}
+
+def _montar_consulta_pagina(select, filtro_busca, chave, id_coluna, decrescente, cursor):
+    """Monta a consulta paginada por chave, com busca opcional e ordenação estável por (chave, id)."""
+    condicoes = []
+    if filtro_busca:
+        condicoes.append(f"({filtro_busca})")
+    if cursor is not None:
+        condicoes.append(f"({chave}, {id_coluna}) {'<' if decrescente else '>'} (:cursor_chave, :cursor_id)")
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    direcao = 'DESC' if decrescente else 'ASC'
+    return f"{select} {where} ORDER BY {chave} {direcao}, {id_coluna} {direcao} LIMIT :limite"
+
+def _buscar_pagina(query, busca, tamanho, cursor):
+    """Executa a consulta paginada e retorna (página, cursor da próxima página ou None)."""
+    engine = get_engine()
+    if engine is None: return pd.DataFrame(), None
+    params = {'busca': _padrao_like(busca), 'limite': tamanho + 1}
+    if cursor is not None:
+        params['cursor_chave'], params['cursor_id'] = cursor
+    with engine.connect() as conn:
+        df = pd.read_sql_query(text(query), conn, params=params)
+    # Uma linha extra indica se existe próxima página
+    proximo_cursor = None
+    if len(df) > tamanho:
+        df = df.iloc[:tamanho]
+        # astype(object) converte escalares do NumPy em tipos nativos, aceitos pelo psycopg2
+        proximo_cursor = (df['chave_ordenacao'].astype(object).iloc[-1], int(df['id'].iloc[-1]))
+    return df.drop(columns=['chave_ordenacao']), proximo_cursor
+
+FILTRO_BUSCA_EQUIPAMENTOS = (
+    "e.descricao ILIKE :busca ESCAPE '\\' OR e.numero_serie ILIKE :busca ESCAPE '\\' "
+    "OR e.sistema_alocado ILIKE :busca ESCAPE '\\' OR e.modelo ILIKE :busca ESCAPE '\\'"
+)
+
+@cache_por_tabela('equipamentos')
+def listar_equipamentos_pagina(busca="", ordenacao='Descrição', decrescente=False, tamanho=50, cursor=None):
+    """Retorna uma página de equipamentos e o cursor da próxima página (None na última)."""
+    try:
+        chave = ORDENACOES_EQUIPAMENTOS[ordenacao]
+        select = f"""
+            SELECT e.id, e.numero_serie, e.descricao, e.modelo, e.status, e.sistema_alocado, e.pedido_compra,
+                   e.data_aquisicao, e.custo_aquisicao, e.inicio_garantia, e.fim_garantia, e.updated_at, {chave} AS chave_ordenacao
+            FROM equipamentos e
+        """
+        query = _montar_consulta_pagina(select, FILTRO_BUSCA_EQUIPAMENTOS if busca else "", chave, 'e.id', decrescente, cursor)
+        return _buscar_pagina(query, busca, tamanho, cursor)
+    except Exception as e:
+        print(f"Ocorreu um erro ao listar a página de equipamentos: {e}")
+        return pd.DataFrame(), None
+
+@cache_por_tabela('equipamentos')
+def contar_equipamentos(busca=""):
+    """Conta os equipamentos que atendem à busca."""
+    engine = get_engine()
+    if engine is None: return 0
+    try:
+        query = f"SELECT COUNT(*) FROM equipamentos e {'WHERE ' + FILTRO_BUSCA_EQUIPAMENTOS if busca else ''}"
+        with engine.connect() as conn:
+            return conn.execute(text(query), {'busca': _padrao_like(busca)}).scalar()
+    except Exception as e:
+        print(f"Ocorreu um erro ao contar os equipamentos: {e}")
+        return 0
+
 # --- Funções de Manutenções ---
 
 def adicionar_manutencao(equipamento_id, data_manutencao, motivo_manutencao, tipo_manutencao, custo_manutencao):
@@ -125,7 +340,7 @@ def adicionar_manutencao(equipamento_id, data_manutencao, motivo_manutencao, tip
         }
         conn.execute(query, params)
         conn.commit()
-        st.cache_data.clear()
+        _registrar_escrita('manutencoes', equipamentos=[equipamento_id])
         return True
     except Exception as e:
         print(f"Ocorreu um erro ao adicionar a manutenção: {e}")
@@ -134,58 +349,498 @@ def adicionar_manutencao(equipamento_id, data_manutencao, motivo_manutencao, tip
     finally:
         if conn: conn.close()
 
-@st.cache_data
+# --- Inserção em Lote ---
+# Cada lote é gravado em uma única transação, com INSERTs de várias linhas (VALUES (...), (...)) e RETURNING,
+# e invalida os caches uma única vez. Falhas de linhas individuais (número de série repetido, equipamento
+# inexistente, campos obrigatórios) são devolvidas por linha, sem abortar as demais.
+# Retorno das funções: (ids, erros), com 'ids' alinhado aos registros (None nas linhas que falharam) e
+# 'erros' um DataFrame com 'linha' (posição do registro, a partir de 1) e 'motivo'.
+
+LINHAS_POR_INSERT = 500
+
+COLUNAS_INSERCAO_EQUIPAMENTOS = [
+    'numero_serie', 'descricao', 'modelo', 'status', 'sistema_alocado', 'pedido_compra',
+    'data_aquisicao', 'custo_aquisicao', 'inicio_garantia', 'fim_garantia'
+]
+COLUNAS_INSERCAO_MANUTENCOES = ['id', 'equipamento_id', 'data_manutencao', 'motivo_manutencao', 'tipo_manutencao', 'custo_manutencao']
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip()) or (not isinstance(valor, str) and pd.isna(valor))
+
+def _valor_sql(valor):
+    """Converte nulos do pandas (NaN/NaT) em None e escalares do numpy em tipos Python, aceitos pelo driver."""
+    if _vazio(valor): return None
+    return valor.item() if hasattr(valor, 'item') and not isinstance(valor, (str, datetime.date)) else valor
+
+def _valores_multiplos(colunas, registros):
+    """Monta 'VALUES (:c_0, ...), (:c_1, ...)' e os parâmetros correspondentes."""
+    linhas, params = [], {}
+    for i, registro in enumerate(registros):
+        linhas.append("(" + ", ".join(f":{coluna}_{i}" for coluna in colunas) + ")")
+        params.update({f"{coluna}_{i}": _valor_sql(registro.get(coluna)) for coluna in colunas})
+    return "VALUES " + ", ".join(linhas), params
+
+def _mensagem_erro(erro):
+    """Primeira linha da mensagem do PostgreSQL (sem o SQL e os parâmetros)."""
+    return str(getattr(erro, 'orig', erro)).strip().split('\n')[0]
+
+def _inserir_em_partes(conn, cabecalho, colunas, indexados, rodape="", erros=None):
+    """
+    Executa o INSERT de várias linhas em partes de LINHAS_POR_INSERT e retorna as linhas do RETURNING.
+    Se uma parte falhar, ela é refeita linha a linha (cada uma em seu savepoint) para isolar as linhas com erro.
+    'indexados' é uma lista de (posição, registro).
+    """
+    retornadas = []
+    for inicio in range(0, len(indexados), LINHAS_POR_INSERT):
+        parte = indexados[inicio:inicio + LINHAS_POR_INSERT]
+        valores, params = _valores_multiplos(colunas, [registro for _, registro in parte])
+        try:
+            with conn.begin_nested():
+                retornadas.extend(conn.execute(text(f"{cabecalho} {valores} {rodape}"), params).all())
+        except Exception:
+            for posicao, registro in parte:
+                valores, params = _valores_multiplos(colunas, [registro])
+                try:
+                    with conn.begin_nested():
+                        retornadas.extend(conn.execute(text(f"{cabecalho} {valores} {rodape}"), params).all())
+                except Exception as e:
+                    erros.append((posicao, _mensagem_erro(e)))
+    return retornadas
+
+def _tabela_erros(erros):
+    return pd.DataFrame(sorted(erros), columns=['linha', 'motivo'])
+
+def adicionar_equipamentos_lote(registros):
+    """
+    Adiciona vários equipamentos (dicionários com as colunas de adicionar_equipamento) em uma transação.
+    Números de série já cadastrados ou repetidos no lote são recusados por linha.
+    """
+    ids, erros = [None] * len(registros), []
+    validos, vistos = [], set()
+    for posicao, registro in enumerate(registros, start=1):
+        if _vazio(registro.get('numero_serie')) or _vazio(registro.get('descricao')):
+            erros.append((posicao, "Número de série e descrição são obrigatórios."))
+        elif registro['numero_serie'] in vistos:
+            erros.append((posicao, f"Número de série repetido no lote: {registro['numero_serie']}"))
+        else:
+            vistos.add(registro['numero_serie'])
+            validos.append((posicao, registro))
+    if not validos: return ids, _tabela_erros(erros)
+
+    conn = get_db_connection()
+    if conn is None: return ids, _tabela_erros(erros + [(posicao, "Falha ao conectar ao banco de dados.") for posicao, _ in validos])
+    try:
+        retornadas = _inserir_em_partes(
+            conn, f"INSERT INTO equipamentos ({', '.join(COLUNAS_INSERCAO_EQUIPAMENTOS)})", COLUNAS_INSERCAO_EQUIPAMENTOS,
+            validos, "ON CONFLICT (numero_serie) DO NOTHING RETURNING numero_serie, id", erros
+        )
+        conn.commit()
+        # O número de série é único: identifica a linha de cada id devolvido
+        inseridos = dict(retornadas)
+        com_erro = {posicao for posicao, _ in erros}
+        for posicao, registro in validos:
+            if registro['numero_serie'] in inseridos:
+                ids[posicao - 1] = inseridos[registro['numero_serie']]
+            elif posicao not in com_erro:
+                erros.append((posicao, f"Número de série já cadastrado: {registro['numero_serie']}"))
+        if inseridos:
+            _registrar_escrita('equipamentos')
+        return ids, _tabela_erros(erros)
+    except Exception as e:
+        print(f"Ocorreu um erro ao adicionar os equipamentos em lote: {e}")
+        conn.rollback()
+        return [None] * len(registros), _tabela_erros(
+            [erro for erro in erros if erro[0] not in {p for p, _ in validos}] + [(posicao, _mensagem_erro(e)) for posicao, _ in validos]
+        )
+    finally:
+        if conn: conn.close()
+
+def adicionar_manutencoes_lote(registros):
+    """
+    Adiciona várias manutenções (dicionários com as colunas de adicionar_manutencao) em uma transação.
+    Linhas sem os campos obrigatórios ou de equipamentos inexistentes são recusadas por linha.
+    """
+    ids, erros, candidatos = [None] * len(registros), [], []
+    for posicao, registro in enumerate(registros, start=1):
+        faltando = [c for c in ('equipamento_id', 'data_manutencao', 'tipo_manutencao', 'motivo_manutencao') if _vazio(registro.get(c))]
+        if faltando:
+            erros.append((posicao, f"Campos obrigatórios não preenchidos: {', '.join(faltando)}."))
+        else:
+            candidatos.append((posicao, registro))
+    if not candidatos: return ids, _tabela_erros(erros)
+
+    conn = get_db_connection()
+    if conn is None: return ids, _tabela_erros(erros + [(posicao, "Falha ao conectar ao banco de dados.") for posicao, _ in candidatos])
+    try:
+        # Os equipamentos referenciados ficam travados contra exclusão até o fim da transação
+        existentes = set(conn.execute(
+            text("SELECT id FROM equipamentos WHERE id = ANY(:ids) FOR KEY SHARE"),
+            {'ids': sorted({int(registro['equipamento_id']) for _, registro in candidatos})}
+        ).scalars())
+        validos = []
+        for posicao, registro in candidatos:
+            if int(registro['equipamento_id']) in existentes:
+                validos.append((posicao, registro))
+            else:
+                erros.append((posicao, f"Equipamento não encontrado: {registro['equipamento_id']}"))
+        if validos:
+            # Os ids são reservados antes do INSERT: cada linha já sabe o seu, sem depender da ordem do RETURNING
+            novos_ids = conn.execute(
+                text("SELECT nextval(pg_get_serial_sequence('manutencoes', 'id')) FROM generate_series(1, :n)"), {'n': len(validos)}
+            ).scalars().all()
+            validos = [(posicao, {**registro, 'id': novo_id}) for (posicao, registro), novo_id in zip(validos, novos_ids)]
+            retornadas = _inserir_em_partes(
+                conn, f"INSERT INTO manutencoes ({', '.join(COLUNAS_INSERCAO_MANUTENCOES)})", COLUNAS_INSERCAO_MANUTENCOES,
+                validos, "RETURNING id", erros
+            )
+            conn.commit()
+            inseridos = {linha[0] for linha in retornadas}
+            for posicao, registro in validos:
+                if registro['id'] in inseridos:
+                    ids[posicao - 1] = registro['id']
+            afetados = {int(registro['equipamento_id']) for _, registro in validos if registro['id'] in inseridos}
+            if afetados:
+                _registrar_escrita('manutencoes', equipamentos=sorted(afetados))
+        else:
+            conn.rollback()
+        return ids, _tabela_erros(erros)
+    except Exception as e:
+        print(f"Ocorreu um erro ao adicionar as manutenções em lote: {e}")
+        conn.rollback()
+        return [None] * len(registros), _tabela_erros(
+            [erro for erro in erros if erro[0] not in {p for p, _ in candidatos}] + [(posicao, _mensagem_erro(e)) for posicao, _ in candidatos]
+        )
+    finally:
+        if conn: conn.close()
+
+# --- Edição em Grade ---
+# As alterações feitas em uma grade (linhas alteradas, incluídas e excluídas) são aplicadas em uma única
+# transação: um UPDATE e um DELETE para todas as linhas (com unnest dos valores) e INSERTs de várias linhas.
+# Concorrência otimista: cada linha alterada ou excluída leva o 'updated_at' lido na grade e só é gravada se
+# ele não mudou; se qualquer linha tiver sido alterada/excluída por outra pessoa, nada é gravado.
+# Retorno: {'alterados', 'incluidos', 'excluidos', 'conflitos' (ids), 'erro' (mensagem ou None)}.
+
+EDICAO_EQUIPAMENTOS = {
+    'tabela': 'equipamentos',
+    'colunas': {
+        'numero_serie': 'VARCHAR', 'descricao': 'TEXT', 'modelo': 'VARCHAR', 'status': 'VARCHAR',
+        'sistema_alocado': 'VARCHAR', 'pedido_compra': 'VARCHAR', 'data_aquisicao': 'DATE',
+        'custo_aquisicao': 'NUMERIC', 'inicio_garantia': 'DATE', 'fim_garantia': 'DATE',
+    },
+    # Coluna que identifica o equipamento de cada linha, para invalidar os dossiês afetados
+    'coluna_equipamento': 'id',
+    'tabelas_afetadas': ('equipamentos', 'manutencoes'),
+}
+
+EDICAO_MANUTENCOES = {
+    'tabela': 'manutencoes',
+    'colunas': {
+        'equipamento_id': 'INTEGER', 'data_manutencao': 'DATE', 'motivo_manutencao': 'TEXT',
+        'tipo_manutencao': 'VARCHAR', 'custo_manutencao': 'NUMERIC',
+    },
+    'coluna_equipamento': 'equipamento_id',
+    'tabelas_afetadas': ('manutencoes',),
+}
+
+def _arrays(colunas, registros):
+    """Uma lista de valores por coluna, para os parâmetros do unnest."""
+    return {coluna: [_valor_sql(registro.get(coluna)) for registro in registros] for coluna in colunas}
+
+def _aplicar_edicoes(especificacao, alteradas, incluidas, excluidas):
+    tabela, colunas = especificacao['tabela'], especificacao['colunas']
+    coluna_equipamento = especificacao['coluna_equipamento']
+    resultado = {'alterados': 0, 'incluidos': 0, 'excluidos': 0, 'conflitos': [], 'erro': None}
+    if not (alteradas or incluidas or excluidas): return resultado
+
+    conn = get_db_connection()
+    if conn is None:
+        resultado['erro'] = "Falha ao conectar ao banco de dados."
+        return resultado
+    try:
+        ids_existentes = [int(r['id']) for r in alteradas] + [int(r['id']) for r in excluidas]
+        # Trava as linhas e guarda o equipamento de cada uma antes da alteração (uma manutenção pode mudar de equipamento)
+        anteriores = dict(conn.execute(
+            text(f"SELECT id, {coluna_equipamento} FROM {tabela} WHERE id = ANY(:ids) FOR UPDATE"), {'ids': ids_existentes}
+        ).all()) if ids_existentes else {}
+        equipamentos_afetados = set(anteriores.values())
+        conflitos = set()
+
+        if alteradas:
+            definicao = ", ".join(f"CAST(:{coluna} AS {tipo}[])" for coluna, tipo in colunas.items())
+            query = f"""
+                UPDATE {tabela} t SET {', '.join(f'{coluna} = v.{coluna}' for coluna in colunas)}
+                FROM unnest(CAST(:id AS INTEGER[]), CAST(:versao AS TIMESTAMPTZ[]), {definicao}) AS v(id, versao, {', '.join(colunas)})
+                WHERE t.id = v.id AND t.updated_at = v.versao
+                RETURNING t.id, t.{coluna_equipamento}
+            """
+            params = {'id': [int(r['id']) for r in alteradas], 'versao': [r['updated_at'] for r in alteradas], **_arrays(colunas, alteradas)}
+            gravadas = dict(conn.execute(text(query), params).all())
+            conflitos.update(int(r['id']) for r in alteradas if int(r['id']) not in gravadas)
+            equipamentos_afetados.update(gravadas.values())
+            resultado['alterados'] = len(gravadas)
+
+        if excluidas:
+            query = f"""
+                DELETE FROM {tabela} t
+                USING unnest(CAST(:id AS INTEGER[]), CAST(:versao AS TIMESTAMPTZ[])) AS v(id, versao)
+                WHERE t.id = v.id AND t.updated_at = v.versao
+                RETURNING t.id
+            """
+            params = {'id': [int(r['id']) for r in excluidas], 'versao': [r['updated_at'] for r in excluidas]}
+            removidas = set(conn.execute(text(query), params).scalars())
+            conflitos.update(int(r['id']) for r in excluidas if int(r['id']) not in removidas)
+            resultado['excluidos'] = len(removidas)
+
+        if conflitos:
+            conn.rollback()
+            resultado.update({'alterados': 0, 'excluidos': 0, 'conflitos': sorted(conflitos)})
+            return resultado
+
+        for inicio in range(0, len(incluidas), LINHAS_POR_INSERT):
+            parte = incluidas[inicio:inicio + LINHAS_POR_INSERT]
+            valores, params = _valores_multiplos(list(colunas), parte)
+            novas = conn.execute(text(f"INSERT INTO {tabela} ({', '.join(colunas)}) {valores} RETURNING id, {coluna_equipamento}"), params).all()
+            equipamentos_afetados.update(equipamento for _, equipamento in novas)
+            resultado['incluidos'] += len(novas)
+
+        conn.commit()
+        _registrar_escrita(*especificacao['tabelas_afetadas'], equipamentos=sorted(e for e in equipamentos_afetados if e is not None))
+        return resultado
+    except Exception as e:
+        print(f"Ocorreu um erro ao aplicar as alterações em '{tabela}': {e}")
+        conn.rollback()
+        return {'alterados': 0, 'incluidos': 0, 'excluidos': 0, 'conflitos': [], 'erro': _mensagem_erro(e)}
+    finally:
+        if conn: conn.close()
+
+def aplicar_edicoes_equipamentos(alteradas, incluidas, excluidas):
+    """
+    Aplica as alterações de uma grade de equipamentos em uma transação (ver 'Edição em Grade').
+    'alteradas' e 'excluidas' trazem 'id' e 'updated_at'; 'alteradas' e 'incluidas' trazem as colunas editáveis.
+    A exclusão de um equipamento remove também as suas manutenções.
+    """
+    return _aplicar_edicoes(EDICAO_EQUIPAMENTOS, alteradas, incluidas, excluidas)
+
+def aplicar_edicoes_manutencoes(alteradas, incluidas, excluidas):
+    """Aplica as alterações de uma grade de manutenções em uma transação (ver 'Edição em Grade')."""
+    return _aplicar_edicoes(EDICAO_MANUTENCOES, alteradas, incluidas, excluidas)
+
+# --- Carga incremental de manutenções ---
+# O histórico de manutenções só cresce: em vez de refazer o JOIN completo a cada invalidação,
+# cada processo mantém uma cópia base e busca apenas as linhas alteradas desde a última marca d'água
+# ('updated_at' das duas tabelas), removendo as exclusões registradas em 'manutencoes_excluidas'.
+
+# Sobreposição aplicada à marca d'água, cobrindo transações que confirmaram depois de iniciadas
+MARGEM_MARCA_DAGUA = datetime.timedelta(minutes=1)
+# Retenção do registro de exclusões; uma cópia base mais antiga que isso é recarregada por completo
+RETENCAO_EXCLUSOES = datetime.timedelta(days=7)
+
+COLUNAS_MANUTENCOES = [
+    'id', 'equipamento_id', 'data_manutencao', 'equipamento_descricao', 'numero_serie',
+    'sistema_alocado', 'tipo_manutencao', 'motivo_manutencao', 'custo_manutencao'
+]
+
+QUERY_MANUTENCOES = """
+    SELECT
+        m.id,
+        m.equipamento_id,
+        m.data_manutencao,
+        e.descricao AS equipamento_descricao,
+        e.numero_serie,
+        e.sistema_alocado,
+        m.tipo_manutencao,
+        m.motivo_manutencao,
+        m.custo_manutencao
+    FROM
+        manutencoes m
+    JOIN
+        equipamentos e ON m.equipamento_id = e.id
+"""
+
+@st.cache_resource
+def _estado_manutencoes():
+    """Cópia base das manutenções e marca d'água, compartilhadas entre as sessões do processo."""
+    return {'lock': threading.Lock(), 'df': None, 'marca': None}
+
+def _agora_no_banco(conn):
+    """Retorna o instante de início da transação corrente, no relógio do servidor."""
+    return conn.execute(text("SELECT now()")).scalar()
+
+QUERY_MANUTENCOES_ORDENADAS = QUERY_MANUTENCOES + " ORDER BY m.data_manutencao DESC, m.id DESC"
+
+def iterar_manutencoes(tamanho_lote=None):
+    """
+    Modo em lotes de listar_manutencoes_df: gera DataFrames já tipados de até 'tamanho_lote' linhas,
+    lidos de um cursor no servidor (ver database/leitura.py). Não usa nem altera a cópia base em memória.
+    """
+    for lote in ler_em_lotes(QUERY_MANUTENCOES_ORDENADAS, tamanho_lote=tamanho_lote):
+        yield tipar_manutencoes(lote)
+
+def _carregar_manutencoes_completo(conn, estado, marca):
+    """Refaz a cópia base com o JOIN completo e descarta exclusões já fora da janela de retenção."""
+    # O JOIN completo é lido em lotes e cada lote é tipado (textos repetidos viram categorias) antes do
+    # próximo: o pico de memória é o de um lote bruto, e não o da tabela inteira como texto
+    lotes = (tipar_manutencoes(lote) for lote in consultar_em_lotes(conn, QUERY_MANUTENCOES_ORDENADAS))
+    df = concatenar_tipados(lotes, ESQUEMA_MANUTENCOES)
+    conn.execute(text("DELETE FROM manutencoes_excluidas WHERE excluido_em < :limite"), {'limite': marca - RETENCAO_EXCLUSOES})
+    conn.commit()
+    estado['df'] = df.set_index('id', drop=False)
+    estado['marca'] = marca
+
+def _aplicar_delta_manutencoes(conn, estado, marca):
+    """Busca apenas as linhas alteradas/excluídas desde a marca d'água e as mescla na cópia base."""
+    params = {'desde': estado['marca'] - MARGEM_MARCA_DAGUA}
+    alteradas = pd.read_sql_query(
+        text(QUERY_MANUTENCOES + " WHERE m.updated_at > :desde OR e.updated_at > :desde"), conn, params=params
+    )
+    excluidas = pd.read_sql_query(
+        text("SELECT manutencao_id FROM manutencoes_excluidas WHERE excluido_em > :desde"), conn, params=params
+    )
+    if not alteradas.empty or not excluidas.empty:
+        base = estado['df']
+        remover = base.index.isin(alteradas['id']) | base.index.isin(excluidas['manutencao_id'])
+        df = concatenar_tipados([base[~remover], tipar_manutencoes(alteradas).set_index('id', drop=False)], ESQUEMA_MANUTENCOES)
+        # Mesma ordem da carga completa (data_manutencao DESC, id DESC); o índice também se chama 'id', por isso sai do caminho
+        estado['df'] = df.rename_axis(index=None).sort_values(['data_manutencao', 'id'], ascending=False).rename_axis(index='id')
+    estado['marca'] = marca
+
+@cache_por_tabela('manutencoes', 'equipamentos')
+@cache_compartilhado('manutencoes', 'equipamentos')
 def listar_manutencoes_df():
-    """Lista todos os registros de manutenção em um DataFrame."""
+    """Lista todos os registros de manutenção em um DataFrame (com atualização incremental)."""
     engine = get_engine()
     if engine is None: return pd.DataFrame()
+    estado = _estado_manutencoes()
     try:
-        query = """
-            SELECT
-                m.id,
-                m.equipamento_id,
-                m.data_manutencao,
-                e.descricao AS equipamento_descricao,
-                e.numero_serie,
-                e.sistema_alocado,
-                m.tipo_manutencao,
-                m.motivo_manutencao,
-                m.custo_manutencao
-            FROM
-                manutencoes m
-            JOIN
-                equipamentos e ON m.equipamento_id = e.id
-            ORDER BY
-                m.data_manutencao DESC;
-        """
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(query), conn)
-        return df
+        with estado['lock'], engine.connect() as conn:
+            # A marca d'água é o início da transação: tudo o que confirmar depois dela entra na próxima carga
+            agora = _agora_no_banco(conn)
+            if estado['df'] is None or agora - estado['marca'] > RETENCAO_EXCLUSOES:
+                _carregar_manutencoes_completo(conn, estado, agora)
+            else:
+                _aplicar_delta_manutencoes(conn, estado, agora)
+            return estado['df'][COLUNAS_MANUTENCOES].reset_index(drop=True)
     except Exception as e:
         print(f"Ocorreu um erro ao listar as manutenções: {e}")
+        estado['df'] = None
         return pd.DataFrame()
 
+FILTRO_BUSCA_MANUTENCOES = (
+    "e.descricao ILIKE :busca ESCAPE '\\' OR e.numero_serie ILIKE :busca ESCAPE '\\' "
+    "OR m.motivo_manutencao ILIKE :busca ESCAPE '\\' OR m.tipo_manutencao ILIKE :busca ESCAPE '\\'"
+)
+
+@cache_por_tabela('manutencoes', 'equipamentos')
+def listar_manutencoes_pagina(busca="", ordenacao='Data', decrescente=True, tamanho=50, cursor=None):
+    """Retorna uma página de manutenções e o cursor da próxima página (None na última)."""
+    try:
+        chave = ORDENACOES_MANUTENCOES[ordenacao]
+        select = f"""
+            SELECT m.id, m.equipamento_id, m.data_manutencao, e.descricao AS equipamento_descricao, e.numero_serie,
+                   e.sistema_alocado, m.tipo_manutencao, m.motivo_manutencao, m.custo_manutencao, m.updated_at, {chave} AS chave_ordenacao
+            FROM manutencoes m
+            JOIN equipamentos e ON m.equipamento_id = e.id
+        """
+        query = _montar_consulta_pagina(select, FILTRO_BUSCA_MANUTENCOES if busca else "", chave, 'm.id', decrescente, cursor)
+        return _buscar_pagina(query, busca, tamanho, cursor)
+    except Exception as e:
+        print(f"Ocorreu um erro ao listar a página de manutenções: {e}")
+        return pd.DataFrame(), None
+
+@cache_por_tabela('manutencoes', 'equipamentos')
+def contar_manutencoes(busca=""):
+    """Conta as manutenções que atendem à busca."""
+    engine = get_engine()
+    if engine is None: return 0
+    try:
+        query = f"""
+            SELECT COUNT(*) FROM manutencoes m JOIN equipamentos e ON m.equipamento_id = e.id
+            {'WHERE ' + FILTRO_BUSCA_MANUTENCOES if busca else ''}
+        """
+        with engine.connect() as conn:
+            return conn.execute(text(query), {'busca': _padrao_like(busca)}).scalar()
+    except Exception as e:
+        print(f"Ocorreu um erro ao contar as manutenções: {e}")
+        return 0
+
+# --- Busca Textual nas Manutenções ---
+# O motivo de cada manutenção é indexado como tsvector em português (coluna gerada 'motivo_tsv' com índice
+# GIN; migração 6): a busca é uma consulta ao índice, e "vazamento na bomba" também encontra "bombas com
+# vazamento". Os termos aceitam a sintaxe de buscadores (websearch_to_tsquery): "frase exata", OR e -exclusão.
+# Os resultados vêm ordenados por relevância, então a paginação é por deslocamento (OFFSET), e não por cursor.
+
+QUERY_BUSCA_MANUTENCOES = """
+    WITH encontradas AS (
+        SELECT m.id, ts_rank_cd(m.motivo_tsv, websearch_to_tsquery('portuguese', :termos)) AS relevancia,
+               COUNT(*) OVER () AS total
+        FROM manutencoes m
+        WHERE m.motivo_tsv @@ websearch_to_tsquery('portuguese', :termos)
+        ORDER BY relevancia DESC, m.data_manutencao DESC, m.id DESC
+        LIMIT :limite OFFSET :deslocamento
+    )
+    -- O trecho destacado (ts_headline) só é calculado para as linhas da página
+    SELECT m.id, m.equipamento_id, m.data_manutencao, e.descricao AS equipamento_descricao, e.numero_serie,
+           e.sistema_alocado, m.tipo_manutencao, m.motivo_manutencao, m.custo_manutencao, r.relevancia,
+           ts_headline('portuguese', m.motivo_manutencao, websearch_to_tsquery('portuguese', :termos),
+                       'StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15') AS trecho,
+           r.total
+    FROM encontradas r
+    JOIN manutencoes m ON m.id = r.id
+    JOIN equipamentos e ON m.equipamento_id = e.id
+    ORDER BY r.relevancia DESC, m.data_manutencao DESC, m.id DESC
+"""
+
+QUERY_CONTAGEM_BUSCA_MANUTENCOES = "SELECT COUNT(*) FROM manutencoes m WHERE m.motivo_tsv @@ websearch_to_tsquery('portuguese', :termos)"
+
+@cache_por_tabela('manutencoes', 'equipamentos')
+def buscar_manutencoes(termos, pagina=0, tamanho=20):
+    """
+    Busca textual no motivo das manutenções. Retorna (DataFrame da página, total de resultados).
+    O trecho vem com os termos encontrados entre <b> e </b>. Uma página além da última vem vazia, com o total real.
+    """
+    engine = get_engine()
+    if engine is None or not termos.strip(): return pd.DataFrame(), 0
+    try:
+        with engine.connect() as conn:
+            df = pd.read_sql_query(text(QUERY_BUSCA_MANUTENCOES), conn, params={
+                'termos': termos, 'limite': tamanho, 'deslocamento': pagina * tamanho
+            })
+            if not df.empty:
+                total = int(df['total'].iloc[0])
+            elif pagina > 0:
+                # Página além do fim (ex.: registros excluídos entre execuções): o total vem de uma contagem à parte
+                total = conn.execute(text(QUERY_CONTAGEM_BUSCA_MANUTENCOES), {'termos': termos}).scalar()
+            else:
+                total = 0
+        return df.drop(columns='total'), total
+    except Exception as e:
+        print(f"Ocorreu um erro ao buscar manutenções: {e}")
+        return pd.DataFrame(), 0
+
 def atualizar_manutencao(manutencao_id, equipamento_id, data_manutencao, motivo_manutencao, tipo_manutencao, custo_manutencao):
     """Atualiza um registro de manutenção existente."""
     conn = get_db_connection()
     if conn is None: return False
     try:
+        # O equipamento anterior também é devolvido: se a manutenção mudou de equipamento, os dois dossiês mudam
         query = text("""
-            UPDATE manutencoes SET
+            UPDATE manutencoes m SET
                 equipamento_id = :equipamento_id, data_manutencao = :data_manutencao,
                 motivo_manutencao = :motivo_manutencao, tipo_manutencao = :tipo_manutencao,
                 custo_manutencao = :custo_manutencao
-            WHERE id = :id
+            FROM (SELECT id, equipamento_id FROM manutencoes WHERE id = :id FOR UPDATE) anterior
+            WHERE m.id = anterior.id
+            RETURNING anterior.equipamento_id
         """)
         params = {
             'id': manutencao_id, 'equipamento_id': equipamento_id, 'data_manutencao': data_manutencao,
             'motivo_manutencao': motivo_manutencao, 'tipo_manutencao': tipo_manutencao,
             'custo_manutencao': custo_manutencao
         }
-        result = conn.execute(query, params)
+        anteriores = conn.execute(query, params).scalars().all()
         conn.commit()
-        st.cache_data.clear()
-        return result.rowcount > 0
+        _registrar_escrita('manutencoes', equipamentos=[equipamento_id, *anteriores])
+        return len(anteriores) > 0
     except Exception as e:
         print(f"Ocorreu um erro ao atualizar a manutenção: {e}")
         conn.rollback()
@@ -198,11 +853,11 @@ def excluir_manutencao(manutencao_id):
     conn = get_db_connection()
     if conn is None: return False
     try:
-        query = text("DELETE FROM manutencoes WHERE id = :id")
-        result = conn.execute(query, {'id': manutencao_id})
+        query = text("DELETE FROM manutencoes WHERE id = :id RETURNING equipamento_id")
+        equipamentos = conn.execute(query, {'id': manutencao_id}).scalars().all()
         conn.commit()
-        st.cache_data.clear()
-        return result.rowcount > 0
+        _registrar_escrita('manutencoes', equipamentos=equipamentos)
+        return len(equipamentos) > 0
     except Exception as e:
         print(f"Ocorreu um erro ao excluir a manutenção: {e}")
         conn.rollback()
@@ -0,0 +1,84 @@
+# kpi_equipamentos/database/esquema.py
+
+import datetime
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Tipos das colunas dos DataFrames devolvidos pela camada de dados.
+# A conversão é feita uma única vez, na carga: as páginas recebem datas como datetime64,
+# valores monetários como float64 e colunas de poucos valores distintos como 'category',
+# sem precisar repetir pd.to_datetime ou recalcular colunas derivadas.
+
+ESQUEMA_EQUIPAMENTOS = {
+    'datas': ['data_aquisicao', 'inicio_garantia', 'fim_garantia'],
+    'valores': ['custo_aquisicao'],
+    'categorias': ['status', 'sistema_alocado', 'modelo'],
+}
+
+ESQUEMA_MANUTENCOES = {
+    'datas': ['data_manutencao'],
+    'valores': ['custo_manutencao'],
+    'categorias': ['tipo_manutencao', 'sistema_alocado', 'equipamento_descricao'],
+}
+
+# Rótulos da coluna derivada 'em_garantia'
+ROTULOS_GARANTIA = ['Sim', 'Não', 'Não Informado']
+
+def aplicar_esquema(df, esquema):
+    """Converte, no próprio DataFrame, as colunas presentes no esquema para os tipos definidos."""
+    for coluna in esquema['datas']:
+        if coluna in df.columns:
+            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+    for coluna in esquema['valores']:
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+    for coluna in esquema['categorias']:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+def concatenar_tipados(partes, esquema):
+    """
+    Concatena DataFrames já tipados pelo mesmo esquema (ex.: lotes de uma leitura em lotes).
+    As categorias de cada parte são unidas antes do concat, que de outra forma converteria
+    as colunas 'category' de volta para texto (object).
+    """
+    partes = list(partes)
+    if len(partes) == 1:
+        return partes[0]
+    for coluna in esquema['categorias']:
+        if partes and coluna in partes[0].columns:
+            categorias = union_categoricals([parte[coluna] for parte in partes], ignore_order=True).categories
+            partes = [parte.assign(**{coluna: parte[coluna].cat.set_categories(categorias)}) for parte in partes]
+    return pd.concat(partes)
+
+def adicionar_colunas_derivadas_equipamentos(df):
+    """Acrescenta 'display_name' de forma vetorizada."""
+    df['display_name'] = df['descricao'] + " (S/N: " + df['numero_serie'] + ")"
+    return df
+
+def adicionar_colunas_garantia(df, hoje=None):
+    """
+    Retorna uma cópia de 'df' com 'dias_fim_garantia' e 'em_garantia' calculados para 'hoje' (padrão: a data atual).
+    Fica fora de tipar_equipamentos porque depende do dia: é aplicada na exibição sobre o DataFrame em cache,
+    que guarda só o 'fim_garantia', e não envelhece de um dia para o outro.
+    """
+    dias = (df['fim_garantia'] - pd.Timestamp(hoje or datetime.date.today())).dt.days
+    return df.assign(
+        dias_fim_garantia=dias.astype('Int64'),
+        em_garantia=pd.Categorical(
+            np.select([dias.isna(), dias >= 0], ['Não Informado', 'Sim'], default='Não'),
+            categories=ROTULOS_GARANTIA
+        ),
+    )
+
+def tipar_equipamentos(df):
+    """Aplica o esquema de equipamentos e calcula as colunas derivadas que não dependem da data atual."""
+    if df.empty and len(df.columns) == 0:
+        return df
+    return adicionar_colunas_derivadas_equipamentos(aplicar_esquema(df, ESQUEMA_EQUIPAMENTOS))
+
+def tipar_manutencoes(df):
+    """Aplica o esquema de manutenções."""
+    return aplicar_esquema(df, ESQUEMA_MANUTENCOES)
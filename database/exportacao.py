@@ -0,0 +1,85 @@
+# kpi_equipamentos/database/exportacao.py
+
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from .leitura import ler_em_lotes
+
+# Exportação de consultas para CSV, Parquet e XLSX.
+# Os arquivos só são gerados quando pedidos e as linhas são lidas em lotes (ver database/leitura.py),
+# escrevendo cada lote no arquivo de saída: o resultado completo nunca é materializado em um único DataFrame.
+
+# Limite de linhas de uma planilha do Excel (descontado o cabeçalho)
+MAX_LINHAS_XLSX = 1_048_575
+
+FORMATOS = {
+    'CSV': {'extensao': 'csv', 'mime': 'text/csv'},
+    'Parquet': {'extensao': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+    'Excel (XLSX)': {'extensao': 'xlsx', 'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+}
+
+def _gravar_csv(lotes, destino, sep=',', decimal='.', encoding='utf-8'):
+    texto = io.TextIOWrapper(destino, encoding=encoding, newline='')
+    for i, lote in enumerate(lotes):
+        lote.to_csv(texto, index=False, header=(i == 0), sep=sep, decimal=decimal)
+    texto.flush()
+    texto.detach()
+
+def _tipo_estavel(campo):
+    """Ajusta o tipo inferido do primeiro lote para que os lotes seguintes caibam no mesmo esquema."""
+    # Colunas totalmente nulas no primeiro lote não têm tipo definido: viram texto
+    if pa.types.is_null(campo.type):
+        return campo.with_type(pa.string())
+    # A precisão de um NUMERIC é inferida dos valores do lote: usa a máxima, mantendo a escala
+    if pa.types.is_decimal(campo.type):
+        return campo.with_type(pa.decimal128(38, campo.type.scale))
+    return campo
+
+def _gravar_parquet(lotes, destino):
+    escritor = None
+    try:
+        for lote in lotes:
+            tabela = pa.Table.from_pandas(lote, preserve_index=False)
+            if escritor is None:
+                esquema = pa.schema([_tipo_estavel(campo) for campo in tabela.schema])
+                escritor = pq.ParquetWriter(destino, esquema, compression='zstd')
+            escritor.write_table(tabela.cast(escritor.schema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+def _gravar_xlsx(lotes, destino):
+    # Modo write_only: as linhas são gravadas em sequência, sem manter a planilha inteira em memória
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("Dados")
+    linhas = 0
+    for i, lote in enumerate(lotes):
+        linhas += len(lote)
+        if linhas > MAX_LINHAS_XLSX:
+            raise ValueError(f"O resultado passa do limite de {MAX_LINHAS_XLSX:,} linhas do Excel. Use CSV ou Parquet.")
+        if i == 0:
+            planilha.append(list(lote.columns))
+        # Nulos do pandas (NaN/NaT) viram células vazias
+        for linha in lote.astype(object).where(lote.notna(), None).itertuples(index=False):
+            planilha.append(list(linha))
+    livro.save(destino)
+
+def exportar(query, params, formato, renomear=None, opcoes_csv=None):
+    """
+    Executa a consulta e retorna o arquivo no formato pedido ('CSV', 'Parquet' ou 'Excel (XLSX)') como bytes.
+    'renomear' troca os nomes das colunas; 'opcoes_csv' aceita sep, decimal e encoding.
+    """
+    lotes = ler_em_lotes(query, params)
+    if renomear:
+        lotes = (lote.rename(columns=renomear) for lote in lotes)
+    destino = io.BytesIO()
+    if formato == 'CSV':
+        _gravar_csv(lotes, destino, **(opcoes_csv or {}))
+    elif formato == 'Parquet':
+        _gravar_parquet(lotes, destino)
+    elif formato == 'Excel (XLSX)':
+        _gravar_xlsx(lotes, destino)
+    else:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    return destino.getvalue()
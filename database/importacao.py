@@ -0,0 +1,271 @@
+# kpi_equipamentos/database/importacao.py
+
+import argparse
+import io
+import re
+import unicodedata
+import pandas as pd
+from sqlalchemy import text
+from .connection import get_engine
+from .cache import invalidar, invalidar_registros
+from .rollups import solicitar_atualizacao, atualizar_rollups
+
+# Importação em lote de equipamentos e manutenções a partir de CSV/XLSX.
+# Fluxo: leitura -> normalização/validação vetorizada -> resolução dos números de série em uma
+# única consulta -> COPY FROM STDIN para uma tabela temporária -> INSERT ... SELECT na tabela final.
+
+COLUNAS_EQUIPAMENTOS = [
+    'numero_serie', 'descricao', 'modelo', 'status', 'sistema_alocado', 'pedido_compra',
+    'data_aquisicao', 'custo_aquisicao', 'inicio_garantia', 'fim_garantia'
+]
+OBRIGATORIAS_EQUIPAMENTOS = ['numero_serie', 'descricao']
+
+COLUNAS_MANUTENCOES = ['numero_serie', 'data_manutencao', 'motivo_manutencao', 'tipo_manutencao', 'custo_manutencao']
+OBRIGATORIAS_MANUTENCOES = ['numero_serie', 'data_manutencao', 'motivo_manutencao', 'tipo_manutencao']
+
+TIPOS_MANUTENCAO = ['Corretiva', 'Preventiva']
+
+# --- Leitura e Normalização ---
+
+# Preposições ignoradas nos cabeçalhos, para aceitar 'Data de Aquisição' como 'data_aquisicao'
+PREPOSICOES = {'de', 'da', 'do', 'das', 'dos'}
+
+def _normalizar_nome_coluna(nome):
+    """Converte 'Número de Série' ou 'Custo (R$)' em 'numero_serie' / 'custo' (sem acentos, preposições e parênteses)."""
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii')
+    nome = re.sub(r'\(.*?\)', ' ', nome.lower())
+    return '_'.join(p for p in re.split(r'[\s_]+', nome.strip()) if p and p not in PREPOSICOES)
+
+def ler_planilha(arquivo, nome_arquivo):
+    """Lê um CSV (separador ',' ou ';') ou XLSX com todas as colunas como texto."""
+    if nome_arquivo.lower().endswith('.xlsx'):
+        df = pd.read_excel(arquivo, dtype=str)
+    else:
+        if hasattr(arquivo, 'read'):
+            conteudo = arquivo.read()
+        else:
+            with open(arquivo, 'rb') as f:
+                conteudo = f.read()
+        try:
+            texto = conteudo.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            texto = conteudo.decode('latin-1')
+        primeira_linha = texto.split('\n', 1)[0]
+        separador = ';' if primeira_linha.count(';') > primeira_linha.count(',') else ','
+        df = pd.read_csv(io.StringIO(texto), sep=separador, dtype=str)
+    df.columns = [_normalizar_nome_coluna(c) for c in df.columns]
+    return df
+
+def _texto(serie):
+    """Remove espaços das bordas e transforma textos vazios em nulos."""
+    serie = serie.astype('string').str.strip()
+    return serie.mask(serie == '')
+
+def _datas(serie):
+    """Converte datas ISO (AAAA-MM-DD) ou brasileiras (DD/MM/AAAA), sem laço por linha."""
+    serie = _texto(serie)
+    datas = pd.to_datetime(serie, format='ISO8601', errors='coerce')
+    faltantes = datas.isna() & serie.notna()
+    if faltantes.any():
+        datas[faltantes] = pd.to_datetime(serie[faltantes], format='%d/%m/%Y', errors='coerce')
+    return datas.dt.date
+
+def _valores(serie):
+    """Converte valores monetários como '1.234,56', 'R$ 1.500', '1,234.56' ou '1234.56' em float."""
+    serie = _texto(serie).str.replace('R$', '', regex=False).str.replace(' ', '', regex=False)
+    # Só pontos agrupando milhares ('1.234', '1.500.000') é o formato brasileiro sem centavos, não um decimal
+    milhares_br = serie.str.fullmatch(r'\d{1,3}(\.\d{3})+').fillna(False).astype(bool)
+    # Nos demais, o separador que aparece por último é o decimal; o outro é o de milhares e é removido
+    formato_br = ((serie.str.rfind(',') > serie.str.rfind('.')).fillna(False) | milhares_br).astype(bool)
+    serie = serie.where(
+        ~formato_br, serie.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    ).where(formato_br, serie.str.replace(',', '', regex=False))
+    return pd.to_numeric(serie, errors='coerce')
+
+def _registrar_erros(erros, mascara, motivo):
+    """Acumula as linhas inválidas (número da linha no arquivo, considerando o cabeçalho)."""
+    if mascara.any():
+        erros.append(pd.DataFrame({'linha': mascara[mascara].index + 2, 'motivo': motivo}))
+
+def _validar_colunas(df, colunas, obrigatorias):
+    """Garante que as colunas obrigatórias existam e cria as opcionais ausentes como nulas."""
+    faltando = [c for c in obrigatorias if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes no arquivo: {', '.join(faltando)}")
+    return df.reset_index(drop=True).reindex(columns=colunas)
+
+def normalizar_equipamentos(df):
+    """Normaliza e valida um lote de equipamentos. Retorna (linhas válidas, DataFrame de erros)."""
+    df = _validar_colunas(df, COLUNAS_EQUIPAMENTOS, OBRIGATORIAS_EQUIPAMENTOS)
+    for coluna in ['numero_serie', 'descricao', 'modelo', 'status', 'sistema_alocado', 'pedido_compra']:
+        df[coluna] = _texto(df[coluna])
+    df['status'] = df['status'].fillna('Operacional')
+
+    erros = []
+    for coluna in ['data_aquisicao', 'inicio_garantia', 'fim_garantia']:
+        originais = _texto(df[coluna])
+        df[coluna] = _datas(df[coluna])
+        _registrar_erros(erros, originais.notna() & df[coluna].isna(), f"Data inválida em '{coluna}'")
+    originais = _texto(df['custo_aquisicao'])
+    df['custo_aquisicao'] = _valores(df['custo_aquisicao'])
+    _registrar_erros(erros, originais.notna() & df['custo_aquisicao'].isna(), "Valor inválido em 'custo_aquisicao'")
+
+    for coluna in OBRIGATORIAS_EQUIPAMENTOS:
+        _registrar_erros(erros, df[coluna].isna(), f"Campo obrigatório '{coluna}' vazio")
+    _registrar_erros(erros, df['numero_serie'].notna() & df['numero_serie'].duplicated(), "Número de série repetido no arquivo")
+
+    return _separar_validas(df, erros)
+
+def normalizar_manutencoes(df):
+    """Normaliza e valida um lote de manutenções. Retorna (linhas válidas, DataFrame de erros)."""
+    df = _validar_colunas(df, COLUNAS_MANUTENCOES, OBRIGATORIAS_MANUTENCOES)
+    for coluna in ['numero_serie', 'motivo_manutencao', 'tipo_manutencao']:
+        df[coluna] = _texto(df[coluna])
+    df['tipo_manutencao'] = df['tipo_manutencao'].str.capitalize()
+
+    erros = []
+    originais = _texto(df['data_manutencao'])
+    df['data_manutencao'] = _datas(df['data_manutencao'])
+    _registrar_erros(erros, originais.notna() & df['data_manutencao'].isna(), "Data inválida em 'data_manutencao'")
+    originais = _texto(df['custo_manutencao'])
+    df['custo_manutencao'] = _valores(df['custo_manutencao'])
+    _registrar_erros(erros, originais.notna() & df['custo_manutencao'].isna(), "Valor inválido em 'custo_manutencao'")
+    df['custo_manutencao'] = df['custo_manutencao'].fillna(0.0)
+    _registrar_erros(erros, df['tipo_manutencao'].notna() & ~df['tipo_manutencao'].isin(TIPOS_MANUTENCAO), "Tipo de manutenção deve ser 'Corretiva' ou 'Preventiva'")
+
+    for coluna in OBRIGATORIAS_MANUTENCOES:
+        _registrar_erros(erros, df[coluna].isna(), f"Campo obrigatório '{coluna}' vazio")
+
+    return _separar_validas(df, erros)
+
+def _separar_validas(df, erros):
+    """Separa as linhas sem nenhum erro das inválidas."""
+    erros = pd.concat(erros, ignore_index=True) if erros else pd.DataFrame(columns=['linha', 'motivo'])
+    linhas_invalidas = erros['linha'].to_numpy() - 2
+    validas = df[~df.index.isin(linhas_invalidas)]
+    return validas, erros.sort_values('linha', kind='stable').reset_index(drop=True)
+
+# --- Carga no Banco ---
+
+def resolver_numeros_serie(numeros_serie):
+    """Mapeia números de série para o id do equipamento com uma única consulta."""
+    engine = get_engine()
+    if engine is None: return {}
+    query = text("SELECT numero_serie, id FROM equipamentos WHERE numero_serie = ANY(:numeros_serie)")
+    with engine.connect() as conn:
+        linhas = conn.execute(query, {'numeros_serie': list(pd.unique(numeros_serie))}).all()
+    return {numero_serie: id_ for numero_serie, id_ in linhas}
+
+def _copiar_para_temporaria(cursor, tabela, df):
+    """Envia o DataFrame para a tabela temporária via COPY FROM STDIN (CSV, vazio = nulo)."""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {tabela} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer)
+
+def _executar_carga(tabela_temporaria, definicao_temporaria, df, merge_sql):
+    """Cria a tabela temporária, copia os dados e executa o merge em uma única transação."""
+    engine = get_engine()
+    if engine is None: raise RuntimeError("Falha ao conectar ao banco de dados.")
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE TEMP TABLE {tabela_temporaria} ({definicao_temporaria}) ON COMMIT DROP")
+        _copiar_para_temporaria(cursor, tabela_temporaria, df)
+        cursor.execute(merge_sql)
+        resultado = cursor.fetchall()
+        conn.commit()
+        return resultado
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def importar_equipamentos(df, atualizar_existentes=False):
+    """
+    Importa um DataFrame de equipamentos já normalizado.
+    Números de série já cadastrados são ignorados ou, com atualizar_existentes=True, atualizados.
+    """
+    if df.empty: return {'inseridos': 0, 'atualizados': 0, 'ignorados': 0}
+    colunas = ', '.join(COLUNAS_EQUIPAMENTOS)
+    if atualizar_existentes:
+        conflito = "DO UPDATE SET " + ', '.join(f"{c} = EXCLUDED.{c}" for c in COLUNAS_EQUIPAMENTOS if c != 'numero_serie')
+    else:
+        conflito = "DO NOTHING"
+    merge_sql = f"""
+        INSERT INTO equipamentos ({colunas})
+        SELECT {colunas} FROM tmp_equipamentos
+        ON CONFLICT (numero_serie) {conflito}
+        RETURNING (xmax = 0) AS inserido
+    """
+    definicao = """
+        numero_serie VARCHAR(255), descricao TEXT, modelo VARCHAR(255), status VARCHAR(50),
+        sistema_alocado VARCHAR(255), pedido_compra VARCHAR(255), data_aquisicao DATE,
+        custo_aquisicao NUMERIC(10, 2), inicio_garantia DATE, fim_garantia DATE
+    """
+    resultado = _executar_carga('tmp_equipamentos', definicao, df[COLUNAS_EQUIPAMENTOS], merge_sql)
+    inseridos = sum(1 for (inserido,) in resultado if inserido)
+    invalidar('equipamentos')
+    if len(resultado) > inseridos:
+        # Equipamentos existentes foram atualizados em lote: invalida todos os dossiês
+        invalidar_registros('equipamento')
+    solicitar_atualizacao()
+    return {'inseridos': inseridos, 'atualizados': len(resultado) - inseridos, 'ignorados': len(df) - len(resultado)}
+
+def importar_manutencoes(df):
+    """
+    Importa um DataFrame de manutenções já normalizado.
+    Retorna o resumo e um DataFrame com os números de série não encontrados.
+    """
+    if df.empty: return {'inseridos': 0}, pd.DataFrame(columns=['linha', 'motivo'])
+    ids = df['numero_serie'].map(resolver_numeros_serie(df['numero_serie']))
+    nao_encontrados = ids.isna()
+    erros = pd.DataFrame({
+        'linha': df.index[nao_encontrados] + 2,
+        'motivo': "Número de série não cadastrado: " + df.loc[nao_encontrados, 'numero_serie'].astype(str),
+    })
+    carga = df[~nao_encontrados].assign(equipamento_id=ids[~nao_encontrados].astype('int64'))
+    colunas = ['equipamento_id', 'data_manutencao', 'motivo_manutencao', 'tipo_manutencao', 'custo_manutencao']
+    if carga.empty: return {'inseridos': 0}, erros
+
+    merge_sql = f"""
+        INSERT INTO manutencoes ({', '.join(colunas)})
+        SELECT {', '.join(colunas)} FROM tmp_manutencoes
+        RETURNING id
+    """
+    definicao = """
+        equipamento_id INTEGER, data_manutencao DATE, motivo_manutencao TEXT,
+        tipo_manutencao VARCHAR(100), custo_manutencao NUMERIC(10, 2)
+    """
+    resultado = _executar_carga('tmp_manutencoes', definicao, carga[colunas], merge_sql)
+    invalidar('manutencoes')
+    invalidar_registros('equipamento', *carga['equipamento_id'].unique().tolist())
+    solicitar_atualizacao()
+    return {'inseridos': len(resultado)}, erros
+
+# --- Linha de Comando ---
+# Uso: python -m database.importacao {equipamentos|manutencoes} ARQUIVO [--atualizar]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Importa equipamentos ou manutenções em lote (CSV/XLSX).")
+    parser.add_argument('tipo', choices=['equipamentos', 'manutencoes'])
+    parser.add_argument('arquivo')
+    parser.add_argument('--atualizar', action='store_true', help="Atualiza equipamentos cujo número de série já existe.")
+    args = parser.parse_args()
+
+    df_arquivo = ler_planilha(args.arquivo, args.arquivo)
+    if args.tipo == 'equipamentos':
+        validas, erros = normalizar_equipamentos(df_arquivo)
+        resumo = importar_equipamentos(validas, atualizar_existentes=args.atualizar)
+    else:
+        validas, erros = normalizar_manutencoes(df_arquivo)
+        resumo, erros_carga = importar_manutencoes(validas)
+        erros = pd.concat([erros, erros_carga], ignore_index=True)
+
+    print(f"Linhas lidas: {len(df_arquivo)} | válidas: {len(validas)} | resultado: {resumo}")
+    # A thread de fundo não sobrevive ao fim do script: atualiza os rollups de forma síncrona
+    atualizar_rollups()
+    if not erros.empty:
+        print(f"{len(erros)} problema(s) encontrado(s):")
+        print(erros.to_string(index=False))
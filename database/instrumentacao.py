@@ -0,0 +1,192 @@
+# kpi_equipamentos/database/instrumentacao.py
+
+import collections
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import streamlit as st
+from sqlalchemy import event
+
+# Instrumentação da aplicação: duração de cada comando SQL, das fases de cada página
+# (carga, transformação, renderização) e acertos/falhas dos caches.
+# Os eventos ficam em memória (últimos N, compartilhados pelo processo) para a página de Diagnóstico
+# e também são emitidos como JSON, uma linha por evento, no logger 'kpi_equipamentos'.
+# KPI_LOG_NIVEL controla o nível (padrão WARNING: só comandos lentos); KPI_LOG_ARQUIVO grava em arquivo.
+# Os parâmetros dos comandos nunca são guardados, e os textos literais escritos no próprio SQL são trocados
+# por '?': nem a página nem o log expõem os dados consultados ou gravados.
+
+LIMITE_SQL_LENTO_MS = float(os.environ.get("KPI_SQL_LENTO_MS", 500))
+MAX_EVENTOS = int(os.environ.get("KPI_MAX_EVENTOS", 500))
+TAMANHO_MAX_SQL = 2000
+LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+
+logger = logging.getLogger("kpi_equipamentos")
+
+def _configurar_logger():
+    """Configura o logger estruturado uma única vez (nível e destino vêm do ambiente)."""
+    if logger.handlers:
+        return
+    destino = os.environ.get("KPI_LOG_ARQUIVO")
+    handler = logging.FileHandler(destino, encoding='utf-8') if destino else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(os.environ.get("KPI_LOG_NIVEL", "WARNING").upper())
+    logger.propagate = False
+
+_configurar_logger()
+
+@st.cache_resource
+def _estado():
+    """Eventos recentes e contadores compartilhados por todas as sessões do processo."""
+    return {
+        'lock': threading.Lock(),
+        'consultas': collections.deque(maxlen=MAX_EVENTOS),
+        'paginas': collections.deque(maxlen=MAX_EVENTOS),
+        'cache': collections.defaultdict(lambda: {'chamadas': 0, 'falhas': 0}),
+    }
+
+def _emitir(tipo, nivel, **dados):
+    """Escreve o evento no log estruturado, se o nível estiver habilitado."""
+    if logger.isEnabledFor(nivel):
+        logger.log(nivel, json.dumps({'evento': tipo, 'instante': time.time(), **dados}, ensure_ascii=False, default=str))
+
+# --- Medição das Páginas ---
+
+# Medição da página em execução na thread atual (cada rerun do Streamlit roda em sua própria thread de script)
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+class MedicaoPagina:
+    """
+    Cronometra as fases de uma execução de página. Uso:
+        medicao = MedicaoPagina("Dashboard")   # abre a fase 'carga'
+        medicao.fase("transformacao") ... medicao.fase("renderizacao") ... medicao.concluir()
+    Os comandos SQL executados durante cada fase são somados a ela (em cargas paralelas, 'sql_ms' soma
+    o tempo de todas as threads e pode passar da duração da fase).
+    """
+
+    def __init__(self, pagina, fase_inicial="carga"):
+        self.pagina = pagina
+        self.inicio = time.perf_counter()
+        self.fases = []
+        self._fase_atual = None
+        # Comandos SQL de cargas paralelas (database/carregamento.py) são somados de várias threads
+        self._lock = threading.Lock()
+        _medicao_atual.set(self)
+        self.fase(fase_inicial)
+
+    def fase(self, nome):
+        """Encerra a fase corrente e inicia a próxima."""
+        self._fechar_fase()
+        self._fase_atual = {'fase': nome, 'inicio': time.perf_counter(), 'consultas': 0, 'sql_ms': 0.0}
+
+    def _fechar_fase(self):
+        if self._fase_atual is None:
+            return
+        fase = self._fase_atual
+        fase['duracao_ms'] = round((time.perf_counter() - fase.pop('inicio')) * 1000, 2)
+        fase['sql_ms'] = round(fase['sql_ms'], 2)
+        self.fases.append(fase)
+        self._fase_atual = None
+
+    def registrar_sql(self, duracao_ms):
+        with self._lock:
+            if self._fase_atual is not None:
+                self._fase_atual['consultas'] += 1
+                self._fase_atual['sql_ms'] += duracao_ms
+
+    @staticmethod
+    def registrar_tarefas(tempos):
+        """Anexa à fase corrente da medição em curso (se houver) a duração de cada tarefa de uma carga paralela."""
+        medicao = _medicao_atual.get()
+        if medicao is not None and medicao._fase_atual is not None:
+            medicao._fase_atual.setdefault('tarefas', {}).update(tempos)
+
+    def concluir(self):
+        """Encerra a medição e registra o resumo da execução."""
+        self._fechar_fase()
+        _medicao_atual.set(None)
+        registro = {
+            'pagina': self.pagina,
+            'total_ms': round((time.perf_counter() - self.inicio) * 1000, 2),
+            'fases': self.fases,
+        }
+        estado = _estado()
+        with estado['lock']:
+            estado['paginas'].append({'instante': time.time(), **registro})
+        _emitir('pagina', logging.INFO, **registro)
+        return registro
+
+# --- Comandos SQL ---
+
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info['inicio_consultas'].pop()
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        medicao.registrar_sql(duracao_ms)
+    registro = {
+        'sql': LITERAL_TEXTO.sub("'?'", re.sub(r'\s+', ' ', statement).strip())[:TAMANHO_MAX_SQL],
+        'duracao_ms': round(duracao_ms, 2),
+        'linhas': cursor.rowcount,
+        'pagina': medicao.pagina if medicao else None,
+    }
+    estado = _estado()
+    with estado['lock']:
+        estado['consultas'].append({'instante': time.time(), **registro})
+    _emitir('sql', logging.WARNING if duracao_ms >= LIMITE_SQL_LENTO_MS else logging.DEBUG, **registro)
+
+def instrumentar_engine(engine):
+    """Registra os eventos que medem cada comando SQL executado pelo engine."""
+    event.listen(engine, "before_cursor_execute", _antes_de_executar)
+    event.listen(engine, "after_cursor_execute", _depois_de_executar)
+
+# --- Caches ---
+
+def registrar_cache(nome, evento):
+    """Conta uma 'chamada' ou uma 'falha' (execução real) de uma função em cache."""
+    estado = _estado()
+    with estado['lock']:
+        estado['cache'][nome][evento] += 1
+
+# --- Consulta dos Dados Coletados ---
+
+def consultas_recentes():
+    """Retorna uma cópia dos comandos SQL registrados (mais antigos primeiro)."""
+    estado = _estado()
+    with estado['lock']:
+        return list(estado['consultas'])
+
+def execucoes_paginas():
+    """Retorna uma cópia das execuções de páginas registradas (mais antigas primeiro)."""
+    estado = _estado()
+    with estado['lock']:
+        return list(estado['paginas'])
+
+def estatisticas_cache():
+    """Retorna, por função em cache, chamadas, acertos, falhas e taxa de acerto."""
+    estado = _estado()
+    with estado['lock']:
+        contadores = {nome: dict(valores) for nome, valores in estado['cache'].items()}
+    resumo = []
+    for nome, valores in sorted(contadores.items()):
+        acertos = valores['chamadas'] - valores['falhas']
+        resumo.append({
+            'funcao': nome, 'chamadas': valores['chamadas'], 'acertos': acertos, 'falhas': valores['falhas'],
+            'taxa_acerto': acertos / valores['chamadas'] if valores['chamadas'] else 0.0,
+        })
+    return resumo
+
+def limpar_registros():
+    """Descarta os eventos e zera os contadores."""
+    estado = _estado()
+    with estado['lock']:
+        estado['consultas'].clear()
+        estado['paginas'].clear()
+        estado['cache'].clear()
@@ -0,0 +1,326 @@
+# kpi_equipamentos/database/kpi_queries.py
+
+import datetime
+import pandas as pd
+from sqlalchemy import text
+from .connection import get_engine
+from .cache import cache_por_tabela
+from .rollups import solicitar_atualizacao, rollups_defasados
+from . import analitico
+
+# Consultas agregadas do Dashboard de KPIs.
+# Toda a filtragem (período e sistemas) e os agrupamentos são feitos no PostgreSQL,
+# de modo que apenas os resultados já resumidos trafegam até a aplicação.
+# Os meses completos do período são lidos dos rollups materializados (ver database/rollups.py);
+# só as pontas parciais (início e fim do período fora da virada do mês) são agregadas a partir das tabelas.
+# Logo depois de uma escrita, até a atualização dos rollups, o período inteiro é lido das tabelas.
+# Com o backend analítico habilitado (ver database/analitico.py), as agregações por período rodam no DuckDB.
+
+# Filtros reutilizados pelas consultas detalhadas (exportação)
+FILTRO_MANUTENCOES = """
+    m.data_manutencao BETWEEN :data_inicio AND :data_fim
+    AND e.sistema_alocado = ANY(:sistemas)
+"""
+
+FILTRO_EQUIPAMENTOS = """
+    e.data_aquisicao BETWEEN :data_inicio AND :data_fim
+    AND e.sistema_alocado = ANY(:sistemas)
+"""
+
+# Manutenções do período por (mês, equipamento): meses completos do rollup + pontas lidas da tabela
+BASE_MANUTENCOES_MENSAL = """
+    base AS (
+        SELECT r.mes, r.equipamento_id, r.descricao, r.sistema_alocado, r.quantidade, r.custo
+        FROM mv_manutencao_mensal r
+        WHERE r.mes >= :rollup_inicio AND r.mes < :rollup_fim AND r.sistema_alocado = ANY(:sistemas)
+        UNION ALL
+        SELECT date_trunc('month', m.data_manutencao)::date, m.equipamento_id, e.descricao, e.sistema_alocado,
+               COUNT(*), COALESCE(SUM(m.custo_manutencao), 0)
+        FROM manutencoes m
+        JOIN equipamentos e ON m.equipamento_id = e.id
+        WHERE ((m.data_manutencao >= :borda1_inicio AND m.data_manutencao < :borda1_fim)
+               OR (m.data_manutencao >= :borda2_inicio AND m.data_manutencao < :borda2_fim))
+          AND e.sistema_alocado = ANY(:sistemas)
+        GROUP BY 1, 2, 3, 4
+    )
+"""
+
+# Aquisições do período por (mês, sistema, descrição), com a mesma divisão entre rollup e pontas
+BASE_AQUISICOES_MENSAL = """
+    base_aquisicao AS (
+        SELECT r.descricao, r.sistema_alocado, r.custo
+        FROM mv_aquisicao_mensal r
+        WHERE r.mes >= :rollup_inicio AND r.mes < :rollup_fim AND r.sistema_alocado = ANY(:sistemas)
+        UNION ALL
+        SELECT e.descricao, e.sistema_alocado, COALESCE(e.custo_aquisicao, 0)
+        FROM equipamentos e
+        WHERE ((e.data_aquisicao >= :borda1_inicio AND e.data_aquisicao < :borda1_fim)
+               OR (e.data_aquisicao >= :borda2_inicio AND e.data_aquisicao < :borda2_fim))
+          AND e.sistema_alocado = ANY(:sistemas)
+    )
+"""
+
+# Colunas aceitas como agrupador no gráfico de custos de manutenção
+AGRUPADORES_CUSTO = {
+    'Equipamento': 'descricao',
+    'Sistema': 'sistema_alocado',
+}
+
+def _params_filtro(data_inicio, data_fim, sistemas):
+    """Monta o dicionário de parâmetros comum às consultas filtradas."""
+    return {'data_inicio': data_inicio, 'data_fim': data_fim, 'sistemas': list(sistemas)}
+
+def _inicio_do_proximo_mes(data):
+    """Retorna o primeiro dia do mês seguinte ao da data informada."""
+    return (data.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+def _params_rollup(data_inicio, data_fim, sistemas):
+    """
+    Divide o período em meses completos, lidos do rollup, e até duas pontas parciais, lidas das tabelas.
+    Com os rollups defasados, o período inteiro vem das tabelas. Todos os intervalos são semiabertos [início, fim).
+    """
+    fim_exclusivo = data_fim + datetime.timedelta(days=1)
+    primeiro_mes = data_inicio if data_inicio.day == 1 else _inicio_do_proximo_mes(data_inicio)
+    ultimo_mes = fim_exclusivo.replace(day=1)
+    params = {'sistemas': list(sistemas)}
+    if primeiro_mes < ultimo_mes and not rollups_defasados():
+        params.update(rollup_inicio=primeiro_mes, rollup_fim=ultimo_mes,
+                      borda1_inicio=data_inicio, borda1_fim=primeiro_mes,
+                      borda2_inicio=ultimo_mes, borda2_fim=fim_exclusivo)
+    else:
+        # Período dentro de um único mês (ou sem nenhum mês completo) ou rollups defasados: tudo vem das tabelas
+        params.update(rollup_inicio=data_inicio, rollup_fim=data_inicio,
+                      borda1_inicio=data_inicio, borda1_fim=fim_exclusivo,
+                      borda2_inicio=fim_exclusivo, borda2_fim=fim_exclusivo)
+    return params
+
+def _usar_analitico():
+    """Indica se as agregações devem ir ao backend analítico; pede um snapshot se ainda não existir ou estiver defasado."""
+    if not analitico.HABILITADO:
+        return False
+    if analitico.snapshot_disponivel() and analitico.snapshot_em_dia():
+        return True
+    solicitar_atualizacao()
+    return False
+
+def _consultar_df(query, params=None):
+    """Executa uma consulta parametrizada e retorna o resultado em um DataFrame."""
+    engine = get_engine()
+    if engine is None: return pd.DataFrame()
+    with engine.connect() as conn:
+        return pd.read_sql_query(text(query), conn, params=params)
+
+@cache_por_tabela('equipamentos', 'manutencoes')
+def obter_resumo_geral():
+    """Retorna o total de equipamentos e o intervalo de datas (aquisição e manutenção) existente no banco."""
+    resumo = {'total_equipamentos': 0, 'data_minima': None, 'data_maxima': None}
+    try:
+        query = """
+            SELECT
+                (SELECT COUNT(*) FROM equipamentos) AS total_equipamentos,
+                LEAST((SELECT MIN(data_aquisicao) FROM equipamentos), (SELECT MIN(data_manutencao) FROM manutencoes)) AS data_minima,
+                GREATEST((SELECT MAX(data_aquisicao) FROM equipamentos), (SELECT MAX(data_manutencao) FROM manutencoes)) AS data_maxima;
+        """
+        df = _consultar_df(query)
+        if not df.empty:
+            linha = df.iloc[0]
+            resumo['total_equipamentos'] = int(linha['total_equipamentos'])
+            resumo['data_minima'] = linha['data_minima'] if pd.notna(linha['data_minima']) else None
+            resumo['data_maxima'] = linha['data_maxima'] if pd.notna(linha['data_maxima']) else None
+        return resumo
+    except Exception as e:
+        print(f"Ocorreu um erro ao obter o resumo geral: {e}")
+        return resumo
+
+@cache_por_tabela('equipamentos')
+def listar_sistemas():
+    """Lista os sistemas alocados distintos, em ordem alfabética."""
+    try:
+        query = "SELECT DISTINCT sistema_alocado FROM equipamentos WHERE COALESCE(sistema_alocado, '') <> '' ORDER BY sistema_alocado;"
+        df = _consultar_df(query)
+        return df['sistema_alocado'].tolist() if not df.empty else []
+    except Exception as e:
+        print(f"Ocorreu um erro ao listar os sistemas: {e}")
+        return []
+
+@cache_por_tabela('equipamentos', 'manutencoes', 'rollups', 'analitico')
+def calcular_custos_periodo(data_inicio, data_fim, sistemas):
+    """Soma os custos de aquisição e de manutenção no período e sistemas selecionados."""
+    custos = {'custo_aquisicao': 0.0, 'custo_manutencao': 0.0}
+    if _usar_analitico():
+        resultado = analitico.calcular_custos_periodo(data_inicio, data_fim, sistemas)
+        if resultado is not None: return resultado
+    try:
+        query = f"""
+            WITH {BASE_MANUTENCOES_MENSAL}, {BASE_AQUISICOES_MENSAL}
+            SELECT
+                (SELECT COALESCE(SUM(custo), 0) FROM base_aquisicao)::float8 AS custo_aquisicao,
+                (SELECT COALESCE(SUM(custo), 0) FROM base)::float8 AS custo_manutencao;
+        """
+        df = _consultar_df(query, _params_rollup(data_inicio, data_fim, sistemas))
+        if not df.empty:
+            custos['custo_aquisicao'] = float(df.iloc[0]['custo_aquisicao'])
+            custos['custo_manutencao'] = float(df.iloc[0]['custo_manutencao'])
+        return custos
+    except Exception as e:
+        print(f"Ocorreu um erro ao calcular os custos do período: {e}")
+        return custos
+
+@cache_por_tabela('equipamentos')
+def contar_status(sistemas):
+    """Conta os equipamentos por status nos sistemas selecionados (independente do período)."""
+    try:
+        query = """
+            SELECT e.status, COUNT(*) AS contagem
+            FROM equipamentos e
+            WHERE e.sistema_alocado = ANY(:sistemas)
+            GROUP BY e.status
+            ORDER BY contagem DESC;
+        """
+        return _consultar_df(query, {'sistemas': list(sistemas)})
+    except Exception as e:
+        print(f"Ocorreu um erro ao contar os status: {e}")
+        return pd.DataFrame(columns=['status', 'contagem'])
+
+@cache_por_tabela('equipamentos', 'manutencoes', 'rollups', 'analitico')
+def tendencia_mensal(data_inicio, data_fim, sistemas):
+    """Retorna o número de manutenções por mês (formato 'AAAA-MM') no período filtrado."""
+    if _usar_analitico():
+        resultado = analitico.tendencia_mensal(data_inicio, data_fim, sistemas)
+        if resultado is not None: return resultado
+    try:
+        query = f"""
+            WITH {BASE_MANUTENCOES_MENSAL}
+            SELECT to_char(mes, 'YYYY-MM') AS mes_ano, SUM(quantidade)::int AS contagem
+            FROM base
+            GROUP BY mes
+            ORDER BY mes;
+        """
+        return _consultar_df(query, _params_rollup(data_inicio, data_fim, sistemas))
+    except Exception as e:
+        print(f"Ocorreu um erro ao calcular a tendência mensal: {e}")
+        return pd.DataFrame(columns=['mes_ano', 'contagem'])
+
+@cache_por_tabela('equipamentos', 'manutencoes', 'rollups', 'analitico')
+def tco_por_descricao(data_inicio, data_fim, sistemas):
+    """Retorna o custo de aquisição e de manutenção por descrição de equipamento no período filtrado."""
+    if _usar_analitico():
+        resultado = analitico.tco_por_descricao(data_inicio, data_fim, sistemas)
+        if resultado is not None: return resultado
+    try:
+        query = f"""
+            WITH {BASE_MANUTENCOES_MENSAL}, {BASE_AQUISICOES_MENSAL},
+            aquisicao AS (
+                SELECT descricao, SUM(custo) AS custo FROM base_aquisicao GROUP BY descricao
+            ),
+            manutencao AS (
+                SELECT descricao, SUM(custo) AS custo FROM base GROUP BY descricao
+            )
+            SELECT
+                COALESCE(a.descricao, mt.descricao) AS descricao,
+                COALESCE(a.custo, 0)::float8 AS "Custo Aquisição",
+                COALESCE(mt.custo, 0)::float8 AS "Custo Manutenção"
+            FROM aquisicao a
+            FULL OUTER JOIN manutencao mt ON a.descricao = mt.descricao
+            ORDER BY 1;
+        """
+        return _consultar_df(query, _params_rollup(data_inicio, data_fim, sistemas))
+    except Exception as e:
+        print(f"Ocorreu um erro ao calcular o TCO por descrição: {e}")
+        return pd.DataFrame(columns=['descricao', 'Custo Aquisição', 'Custo Manutenção'])
+
+@cache_por_tabela('equipamentos', 'manutencoes', 'rollups', 'analitico')
+def custo_manutencao_por(agrupador, data_inicio, data_fim, sistemas):
+    """Soma o custo de manutenção por 'Equipamento' ou por 'Sistema' no período filtrado."""
+    coluna = AGRUPADORES_CUSTO[agrupador]
+    if _usar_analitico():
+        resultado = analitico.custo_manutencao_por(coluna, data_inicio, data_fim, sistemas)
+        if resultado is not None: return resultado
+    try:
+        query = f"""
+            WITH {BASE_MANUTENCOES_MENSAL}
+            SELECT {coluna} AS "Agrupador", COALESCE(SUM(custo), 0)::float8 AS "Custo Total"
+            FROM base
+            GROUP BY 1
+            ORDER BY 2 DESC;
+        """
+        return _consultar_df(query, _params_rollup(data_inicio, data_fim, sistemas))
+    except Exception as e:
+        print(f"Ocorreu um erro ao calcular o custo de manutenção por {agrupador}: {e}")
+        return pd.DataFrame(columns=['Agrupador', 'Custo Total'])
+
+# Mesma definição da view mv_tco_equipamento (migração 4), lida enquanto os rollups estão defasados
+TCO_EQUIPAMENTO_TABELAS = """
+    (SELECT e.id AS equipamento_id, e.descricao, e.numero_serie, COALESCE(e.sistema_alocado, '') AS sistema_alocado,
+            COALESCE(e.custo_aquisicao, 0) AS custo_aquisicao, COUNT(m.id) AS quantidade_manutencoes,
+            COALESCE(SUM(m.custo_manutencao), 0) AS custo_manutencao,
+            COALESCE(e.custo_aquisicao, 0) + COALESCE(SUM(m.custo_manutencao), 0) AS tco
+     FROM equipamentos e
+     LEFT JOIN manutencoes m ON m.equipamento_id = e.id
+     WHERE e.sistema_alocado = ANY(:sistemas)
+     GROUP BY e.id) tco_equipamento
+"""
+
+@cache_por_tabela('equipamentos', 'manutencoes', 'rollups')
+def ranking_tco_equipamentos(sistemas, limite=15):
+    """Retorna os equipamentos com maior custo total de propriedade ao longo de toda a vida útil."""
+    try:
+        fonte = TCO_EQUIPAMENTO_TABELAS if rollups_defasados() else "mv_tco_equipamento"
+        query = f"""
+            SELECT descricao || ' (S/N: ' || numero_serie || ')' AS equipamento,
+                   custo_aquisicao::float8 AS "Custo Aquisição", custo_manutencao::float8 AS "Custo Manutenção",
+                   quantidade_manutencoes, tco::float8 AS tco
+            FROM {fonte}
+            WHERE sistema_alocado = ANY(:sistemas)
+            ORDER BY tco DESC
+            LIMIT :limite;
+        """
+        return _consultar_df(query, {'sistemas': list(sistemas), 'limite': limite})
+    except Exception as e:
+        print(f"Ocorreu um erro ao calcular o ranking de TCO: {e}")
+        return pd.DataFrame(columns=['equipamento', 'Custo Aquisição', 'Custo Manutenção', 'quantidade_manutencoes', 'tco'])
+
+# --- Listagens Detalhadas (Exportação) ---
+
+QUERY_EQUIPAMENTOS_FILTRADOS = f"""
+    SELECT e.id, e.numero_serie, e.descricao, e.modelo, e.status, e.sistema_alocado, e.pedido_compra,
+           e.data_aquisicao, e.custo_aquisicao, e.inicio_garantia, e.fim_garantia
+    FROM equipamentos e
+    WHERE {FILTRO_EQUIPAMENTOS}
+    ORDER BY e.descricao;
+"""
+
+QUERY_MANUTENCOES_FILTRADAS = f"""
+    SELECT m.id, m.equipamento_id, m.data_manutencao, e.descricao AS equipamento_descricao, e.numero_serie,
+           e.sistema_alocado, m.tipo_manutencao, m.motivo_manutencao, m.custo_manutencao
+    FROM manutencoes m
+    JOIN equipamentos e ON m.equipamento_id = e.id
+    WHERE {FILTRO_MANUTENCOES}
+    ORDER BY m.data_manutencao DESC;
+"""
+
+def consulta_equipamentos_filtrados(data_inicio, data_fim, sistemas):
+    """Retorna (SQL, parâmetros) dos equipamentos filtrados, para exportação em lotes (ver database/exportacao.py)."""
+    return QUERY_EQUIPAMENTOS_FILTRADOS, _params_filtro(data_inicio, data_fim, sistemas)
+
+def consulta_manutencoes_filtradas(data_inicio, data_fim, sistemas):
+    """Retorna (SQL, parâmetros) das manutenções filtradas, para exportação em lotes (ver database/exportacao.py)."""
+    return QUERY_MANUTENCOES_FILTRADAS, _params_filtro(data_inicio, data_fim, sistemas)
+
+@cache_por_tabela('equipamentos')
+def listar_equipamentos_filtrados_df(data_inicio, data_fim, sistemas):
+    """Lista os equipamentos adquiridos no período e sistemas selecionados."""
+    try:
+        return _consultar_df(*consulta_equipamentos_filtrados(data_inicio, data_fim, sistemas))
+    except Exception as e:
+        print(f"Ocorreu um erro ao listar os equipamentos filtrados: {e}")
+        return pd.DataFrame()
+
+@cache_por_tabela('equipamentos', 'manutencoes')
+def listar_manutencoes_filtradas_df(data_inicio, data_fim, sistemas):
+    """Lista as manutenções do período e sistemas selecionados."""
+    try:
+        return _consultar_df(*consulta_manutencoes_filtradas(data_inicio, data_fim, sistemas))
+    except Exception as e:
+        print(f"Ocorreu um erro ao listar as manutenções filtradas: {e}")
+        return pd.DataFrame()
@@ -0,0 +1,28 @@
+# kpi_equipamentos/database/leitura.py
+
+import os
+import pandas as pd
+from sqlalchemy import text
+from .connection import get_engine
+
+# Leitura em lotes com memória limitada.
+# Sem cursor no servidor, o psycopg2 traz o resultado inteiro para o cliente antes de o pandas montar
+# (e copiar) o DataFrame. Aqui o PostgreSQL mantém o cursor aberto (stream_results) e as linhas chegam
+# em lotes de até LINHAS_POR_LOTE: cada lote pode ser processado (tipado, gravado, agregado) e descartado
+# antes do próximo, então o pico de memória depende do tamanho do lote e não do tamanho da tabela.
+# KPI_LINHAS_POR_LOTE ajusta o tamanho padrão do lote.
+
+LINHAS_POR_LOTE = int(os.environ.get("KPI_LINHAS_POR_LOTE", 20_000))
+
+def consultar_em_lotes(conn, query, params=None, tamanho_lote=None):
+    """Gera DataFrames de até 'tamanho_lote' linhas a partir de um cursor no servidor, na conexão informada."""
+    tamanho_lote = tamanho_lote or LINHAS_POR_LOTE
+    consulta = text(query).execution_options(stream_results=True, max_row_buffer=tamanho_lote)
+    yield from pd.read_sql_query(consulta, conn, params=params, chunksize=tamanho_lote)
+
+def ler_em_lotes(query, params=None, tamanho_lote=None):
+    """Como consultar_em_lotes, abrindo (e fechando ao final) uma conexão própria."""
+    engine = get_engine()
+    if engine is None: raise RuntimeError("Falha ao conectar ao banco de dados.")
+    with engine.connect() as conn:
+        yield from consultar_em_lotes(conn, query, params, tamanho_lote)
@@ -0,0 +1,285 @@
+# kpi_equipamentos/database/migracoes.py
+
+import pandas as pd
+from sqlalchemy import text
+
+# Migrações versionadas do esquema.
+# Cada passo é (versão, descrição, [comandos SQL]) e roda uma única vez, em ordem, na sua própria transação.
+# As versões aplicadas ficam registradas na tabela 'schema_version'.
+# Para evoluir o esquema, acrescente um novo passo ao FINAL da lista (nunca altere um passo já publicado).
+
+MIGRACOES = [
+    (1, "Tabelas de equipamentos e manutenções", [
+        """
+        CREATE TABLE IF NOT EXISTS equipamentos (
+            id SERIAL PRIMARY KEY,
+            numero_serie VARCHAR(255) UNIQUE NOT NULL,
+            descricao TEXT NOT NULL,
+            modelo VARCHAR(255),
+            status VARCHAR(50),
+            sistema_alocado VARCHAR(255),
+            pedido_compra VARCHAR(255),
+            data_aquisicao DATE,
+            custo_aquisicao NUMERIC(10, 2),
+            inicio_garantia DATE,
+            fim_garantia DATE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS manutencoes (
+            id SERIAL PRIMARY KEY,
+            equipamento_id INTEGER REFERENCES equipamentos(id) ON DELETE CASCADE,
+            data_manutencao DATE NOT NULL,
+            motivo_manutencao TEXT,
+            tipo_manutencao VARCHAR(100),
+            custo_manutencao NUMERIC(10, 2)
+        );
+        """,
+    ]),
+    (2, "Marca d'água 'updated_at' e registro de manutenções excluídas (carga incremental)", [
+        "ALTER TABLE equipamentos ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();",
+        "ALTER TABLE manutencoes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();",
+        """
+        CREATE OR REPLACE FUNCTION definir_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS trg_equipamentos_updated_at ON equipamentos;",
+        """
+        CREATE TRIGGER trg_equipamentos_updated_at BEFORE UPDATE ON equipamentos
+            FOR EACH ROW EXECUTE FUNCTION definir_updated_at();
+        """,
+        "DROP TRIGGER IF EXISTS trg_manutencoes_updated_at ON manutencoes;",
+        """
+        CREATE TRIGGER trg_manutencoes_updated_at BEFORE UPDATE ON manutencoes
+            FOR EACH ROW EXECUTE FUNCTION definir_updated_at();
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS manutencoes_excluidas (
+            id BIGSERIAL PRIMARY KEY,
+            manutencao_id INTEGER NOT NULL,
+            excluido_em TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """,
+        """
+        CREATE OR REPLACE FUNCTION registrar_manutencao_excluida() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO manutencoes_excluidas (manutencao_id) VALUES (OLD.id);
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS trg_manutencoes_excluidas ON manutencoes;",
+        """
+        CREATE TRIGGER trg_manutencoes_excluidas AFTER DELETE ON manutencoes
+            FOR EACH ROW EXECUTE FUNCTION registrar_manutencao_excluida();
+        """,
+    ]),
+    (3, "Índices para os padrões de consulta da aplicação", [
+        # Histórico por equipamento (JOIN, dossiê) já ordenado por data; também atende buscas só por equipamento_id
+        "CREATE INDEX IF NOT EXISTS idx_manutencoes_equipamento_data ON manutencoes (equipamento_id, data_manutencao);",
+        # Filtros por período no dashboard e paginação por data
+        "CREATE INDEX IF NOT EXISTS idx_manutencoes_data ON manutencoes (data_manutencao, id);",
+        "CREATE INDEX IF NOT EXISTS idx_manutencoes_updated_at ON manutencoes (updated_at);",
+        "CREATE INDEX IF NOT EXISTS idx_equipamentos_sistema ON equipamentos (sistema_alocado);",
+        "CREATE INDEX IF NOT EXISTS idx_equipamentos_fim_garantia ON equipamentos (fim_garantia);",
+        "CREATE INDEX IF NOT EXISTS idx_equipamentos_data_aquisicao ON equipamentos (data_aquisicao);",
+        # Ordenação padrão das listagens e paginação por descrição
+        "CREATE INDEX IF NOT EXISTS idx_equipamentos_descricao ON equipamentos (descricao, id);",
+        "CREATE INDEX IF NOT EXISTS idx_equipamentos_updated_at ON equipamentos (updated_at);",
+        "CREATE INDEX IF NOT EXISTS idx_manutencoes_excluidas_em ON manutencoes_excluidas (excluido_em);",
+        "ANALYZE equipamentos;",
+        "ANALYZE manutencoes;",
+    ]),
+    (4, "Rollups materializados do Dashboard de KPIs", [
+        # Sistema vazio e nulo são tratados igualmente como 'sem sistema' (''), mantendo o índice único simples
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_manutencao_mensal AS
+        SELECT
+            date_trunc('month', m.data_manutencao)::date AS mes,
+            m.equipamento_id,
+            e.descricao,
+            COALESCE(e.sistema_alocado, '') AS sistema_alocado,
+            COUNT(*) AS quantidade,
+            COALESCE(SUM(m.custo_manutencao), 0) AS custo
+        FROM manutencoes m
+        JOIN equipamentos e ON m.equipamento_id = e.id
+        GROUP BY 1, 2, 3, 4;
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_manutencao_mensal ON mv_manutencao_mensal (mes, equipamento_id);",
+        "CREATE INDEX IF NOT EXISTS idx_mv_manutencao_mensal_sistema ON mv_manutencao_mensal (sistema_alocado, mes);",
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_aquisicao_mensal AS
+        SELECT
+            date_trunc('month', e.data_aquisicao)::date AS mes,
+            COALESCE(e.sistema_alocado, '') AS sistema_alocado,
+            e.descricao,
+            COUNT(*) AS quantidade,
+            COALESCE(SUM(e.custo_aquisicao), 0) AS custo
+        FROM equipamentos e
+        WHERE e.data_aquisicao IS NOT NULL
+        GROUP BY 1, 2, 3;
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_aquisicao_mensal ON mv_aquisicao_mensal (mes, sistema_alocado, descricao);",
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_tco_equipamento AS
+        SELECT
+            e.id AS equipamento_id,
+            e.descricao,
+            e.numero_serie,
+            COALESCE(e.sistema_alocado, '') AS sistema_alocado,
+            COALESCE(e.custo_aquisicao, 0) AS custo_aquisicao,
+            COUNT(m.id) AS quantidade_manutencoes,
+            COALESCE(SUM(m.custo_manutencao), 0) AS custo_manutencao,
+            COALESCE(e.custo_aquisicao, 0) + COALESCE(SUM(m.custo_manutencao), 0) AS tco
+        FROM equipamentos e
+        LEFT JOIN manutencoes m ON m.equipamento_id = e.id
+        GROUP BY e.id;
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_tco_equipamento ON mv_tco_equipamento (equipamento_id);",
+    ]),
+    (5, "Versão dos dados por tabela (chave do cache compartilhado entre réplicas)", [
+        """
+        CREATE TABLE IF NOT EXISTS versoes_dados (
+            tabela TEXT PRIMARY KEY,
+            versao BIGINT NOT NULL DEFAULT 0,
+            alterada_em TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """,
+        "INSERT INTO versoes_dados (tabela) VALUES ('equipamentos'), ('manutencoes') ON CONFLICT (tabela) DO NOTHING;",
+        # Um incremento por comando (e não por linha): importações em lote custam uma única atualização
+        """
+        CREATE OR REPLACE FUNCTION incrementar_versao_dados() RETURNS trigger AS $$
+        BEGIN
+            UPDATE versoes_dados SET versao = versao + 1, alterada_em = now() WHERE tabela = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS trg_equipamentos_versao ON equipamentos;",
+        """
+        CREATE TRIGGER trg_equipamentos_versao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON equipamentos
+            FOR EACH STATEMENT EXECUTE FUNCTION incrementar_versao_dados();
+        """,
+        "DROP TRIGGER IF EXISTS trg_manutencoes_versao ON manutencoes;",
+        """
+        CREATE TRIGGER trg_manutencoes_versao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON manutencoes
+            FOR EACH STATEMENT EXECUTE FUNCTION incrementar_versao_dados();
+        """,
+    ]),
+    (6, "Busca textual no motivo das manutenções (tsvector em português com índice GIN)", [
+        # Coluna gerada: o vetor é mantido pelo próprio banco em toda inclusão/alteração, sem trigger
+        """
+        ALTER TABLE manutencoes ADD COLUMN IF NOT EXISTS motivo_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('portuguese', COALESCE(motivo_manutencao, ''))) STORED;
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_manutencoes_motivo_tsv ON manutencoes USING GIN (motivo_tsv);",
+        "ANALYZE manutencoes;",
+    ]),
+    (7, "Índice de trigramas para a busca de equipamentos (pg_trgm, quando disponível no servidor)", [
+        # A expressão indexada deve ser idêntica a TEXTO_BUSCA_EQUIPAMENTO (database_manager.py).
+        # Sem a extensão no servidor, o passo é registrado sem criar nada e a busca continua funcionando
+        # (ILIKE sem índice); para ativá-la depois, instale o pg_trgm e rode este mesmo bloco manualmente.
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                EXECUTE $indice$
+                    CREATE INDEX IF NOT EXISTS idx_equipamentos_busca_trgm ON equipamentos
+                    USING GIN ((descricao || ' ' || numero_serie || ' ' || COALESCE(modelo, '')) gin_trgm_ops)
+                $indice$;
+            ELSE
+                RAISE NOTICE 'Extensão pg_trgm indisponível: a busca de equipamentos usará ILIKE sem índice.';
+            END IF;
+        END
+        $$;
+        """,
+        "ANALYZE equipamentos;",
+    ]),
+    (8, "Versões das tabelas incorporadas aos rollups (leitura das tabelas enquanto estiverem defasados)", [
+        # Preenchida a cada atualização dos rollups (database/rollups.py); vazia, os rollups contam como defasados
+        """
+        CREATE TABLE IF NOT EXISTS rollups_versoes (
+            tabela TEXT PRIMARY KEY,
+            versao BIGINT NOT NULL
+        );
+        """,
+        # Incrementada ao fim de cada atualização: entra na chave dos caches que leem os rollups
+        "INSERT INTO versoes_dados (tabela) VALUES ('rollups') ON CONFLICT (tabela) DO NOTHING;",
+    ]),
+]
+
+# Chave arbitrária do advisory lock que impede duas instâncias de migrarem ao mesmo tempo
+CHAVE_LOCK_MIGRACAO = 48151623
+
+def _garantir_tabela_versoes(conn):
+    """Cria a tabela de controle de versões, se necessário."""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """))
+    conn.commit()
+
+def versoes_aplicadas(conn):
+    """Retorna o conjunto de versões já aplicadas no banco."""
+    _garantir_tabela_versoes(conn)
+    return {linha[0] for linha in conn.execute(text("SELECT versao FROM schema_version"))}
+
+def aplicar_migracoes(conn):
+    """Aplica, em ordem, todos os passos pendentes. Retorna a lista de versões aplicadas agora."""
+    conn.execute(text("SELECT pg_advisory_lock(:chave)"), {'chave': CHAVE_LOCK_MIGRACAO})
+    try:
+        aplicadas = versoes_aplicadas(conn)
+        novas = []
+        for versao, descricao, comandos in sorted(MIGRACOES, key=lambda passo: passo[0]):
+            if versao in aplicadas:
+                continue
+            try:
+                for comando in comandos:
+                    conn.exec_driver_sql(comando)
+                conn.execute(
+                    text("INSERT INTO schema_version (versao, descricao) VALUES (:versao, :descricao)"),
+                    {'versao': versao, 'descricao': descricao}
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            print(f"Migração {versao} aplicada: {descricao}")
+            novas.append(versao)
+        return novas
+    finally:
+        conn.execute(text("SELECT pg_advisory_unlock(:chave)"), {'chave': CHAVE_LOCK_MIGRACAO})
+        conn.commit()
+
+def situacao_migracoes(conn):
+    """Lista todos os passos conhecidos e a data em que cada um foi aplicado (ou None se pendente)."""
+    _garantir_tabela_versoes(conn)
+    aplicadas = dict(conn.execute(text("SELECT versao, aplicada_em FROM schema_version")).all())
+    return pd.DataFrame(
+        [(versao, descricao, aplicadas.get(versao)) for versao, descricao, _ in MIGRACOES],
+        columns=['versao', 'descricao', 'aplicada_em']
+    )
+
+def relatorio_indices(conn):
+    """Mostra o uso de cada índice das tabelas da aplicação (desde o último reset das estatísticas)."""
+    query = """
+        SELECT
+            s.relname AS tabela,
+            s.indexrelname AS indice,
+            s.idx_scan AS leituras,
+            s.idx_tup_read AS tuplas_lidas,
+            pg_size_pretty(pg_relation_size(s.indexrelid)) AS tamanho,
+            s.idx_scan = 0 AS sem_uso
+        FROM pg_stat_user_indexes s
+        WHERE s.relname IN ('equipamentos', 'manutencoes', 'manutencoes_excluidas')
+        ORDER BY s.relname, s.idx_scan DESC;
+    """
+    return pd.read_sql_query(text(query), conn)
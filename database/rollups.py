@@ -0,0 +1,124 @@
+# kpi_equipamentos/database/rollups.py
+
+import os
+import threading
+import time
+import streamlit as st
+from sqlalchemy import text
+from .connection import get_engine
+from .cache import invalidar
+from . import analitico
+
+# Atualização dos rollups materializados do Dashboard (criados na migração 4).
+# As escritas pedem uma atualização; uma thread de fundo agrupa pedidos próximos (debounce)
+# e executa REFRESH MATERIALIZED VIEW CONCURRENTLY, que não bloqueia as leituras do dashboard.
+# Cada atualização registra em 'rollups_versoes' as versões das tabelas base (versoes_dados) que incorporou
+# (migração 8). Enquanto alguma tabela tiver uma versão mais nova, os rollups estão defasados: as consultas
+# do dashboard leem as tabelas (ver rollups_defasados) em vez de mostrar, ou guardar em cache, dados antigos.
+# A cada KPI_ROLLUP_INTERVALO segundos (padrão 60; 0 desativa) o laço também confere se há escritas ainda não
+# incorporadas, inclusive as feitas por outras réplicas; sem nenhuma, a atualização não faz nada.
+# Com o backend analítico habilitado, o mesmo laço também refaz o snapshot Parquet (database/analitico.py).
+# Fora do Streamlit (cron, scripts): python -m database.rollups
+
+VIEWS_KPI = ['mv_manutencao_mensal', 'mv_aquisicao_mensal', 'mv_tco_equipamento']
+TABELAS_BASE = ['equipamentos', 'manutencoes']
+
+# Espera após uma escrita antes de atualizar, para agrupar rajadas de escritas em uma única atualização
+ESPERA_AGRUPAMENTO_S = float(os.environ.get("KPI_ROLLUP_ESPERA", 5))
+INTERVALO_PERIODICO_S = float(os.environ.get("KPI_ROLLUP_INTERVALO", 60)) or None
+
+# Chave arbitrária do advisory lock que serializa as atualizações dos rollups entre processos
+CHAVE_LOCK_ROLLUPS = 48151624
+
+QUERY_ROLLUPS_DEFASADOS = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM versoes_dados v
+        LEFT JOIN rollups_versoes r ON r.tabela = v.tabela
+        WHERE v.tabela = ANY(:tabelas) AND r.versao IS DISTINCT FROM v.versao
+    )
+"""
+
+def _versoes_base(conn):
+    return conn.execute(
+        text("SELECT tabela, versao FROM versoes_dados WHERE tabela = ANY(:tabelas)"), {'tabelas': TABELAS_BASE}
+    ).all()
+
+def atualizar_rollups(forcar=False):
+    """
+    Atualiza todas as views materializadas do dashboard, se houver escritas ainda não incorporadas
+    (ou sempre, com forcar=True). Retorna True em caso de sucesso.
+    """
+    engine = get_engine()
+    if engine is None: return False
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:chave)"), {'chave': CHAVE_LOCK_ROLLUPS})
+            try:
+                # Versões lidas antes do REFRESH: tudo o que confirmou até aqui entra nas views. Uma escrita que
+                # confirmar durante a atualização deixa os rollups marcados como defasados até a próxima.
+                versoes = _versoes_base(conn)
+                if not forcar and not conn.execute(text(QUERY_ROLLUPS_DEFASADOS), {'tabelas': TABELAS_BASE}).scalar():
+                    return True
+                conn.commit()
+                for view in VIEWS_KPI:
+                    conn.exec_driver_sql(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+                    conn.commit()
+                conn.execute(text("""
+                    INSERT INTO rollups_versoes (tabela, versao) VALUES (:tabela, :versao)
+                    ON CONFLICT (tabela) DO UPDATE SET versao = EXCLUDED.versao
+                """), [{'tabela': tabela, 'versao': versao} for tabela, versao in versoes])
+                conn.execute(text("UPDATE versoes_dados SET versao = versao + 1, alterada_em = now() WHERE tabela = 'rollups'"))
+                conn.commit()
+            finally:
+                conn.rollback()
+                conn.execute(text("SELECT pg_advisory_unlock(:chave)"), {'chave': CHAVE_LOCK_ROLLUPS})
+                conn.commit()
+        invalidar('rollups')
+        return True
+    except Exception as e:
+        print(f"Ocorreu um erro ao atualizar os rollups do dashboard: {e}")
+        return False
+
+def rollups_defasados():
+    """
+    Indica se há escritas nas tabelas base ainda não incorporadas aos rollups (e, nesse caso, pede uma atualização).
+    Na dúvida (erro ao consultar), responde True: ler as tabelas é sempre correto, apenas mais lento.
+    """
+    engine = get_engine()
+    if engine is None: return True
+    try:
+        with engine.connect() as conn:
+            defasados = conn.execute(text(QUERY_ROLLUPS_DEFASADOS), {'tabelas': TABELAS_BASE}).scalar()
+    except Exception as e:
+        print(f"Ocorreu um erro ao verificar a atualização dos rollups: {e}")
+        return True
+    if defasados:
+        solicitar_atualizacao()
+    return defasados
+
+def _laco_atualizacao(pedido):
+    """Thread de fundo: aguarda pedidos (ou o intervalo periódico) e atualiza os rollups."""
+    while True:
+        pedido.wait(timeout=INTERVALO_PERIODICO_S)
+        time.sleep(ESPERA_AGRUPAMENTO_S)
+        pedido.clear()
+        atualizar_rollups()
+        if analitico.HABILITADO:
+            analitico.atualizar_snapshot()
+
+@st.cache_resource
+def _agendador():
+    """Inicia, uma vez por processo, a thread que atualiza os rollups."""
+    pedido = threading.Event()
+    threading.Thread(target=_laco_atualizacao, args=(pedido,), name="atualizador-rollups", daemon=True).start()
+    return pedido
+
+def solicitar_atualizacao():
+    """Pede uma atualização assíncrona dos rollups (chamado após escritas)."""
+    _agendador().set()
+
+if __name__ == '__main__':
+    inicio = time.perf_counter()
+    if atualizar_rollups(forcar=True):
+        print(f"Rollups atualizados em {time.perf_counter() - inicio:.2f}s: {', '.join(VIEWS_KPI)}")
@@ -1,56 +1,51 @@
 # kpi_equipamentos/database/setup.py
 
-from sqlalchemy import text
+import argparse
 from .connection import get_db_connection
+from .migracoes import aplicar_migracoes, situacao_migracoes, relatorio_indices
 
 def create_tables():
-    """Cria as tabelas no banco de dados se elas não existirem."""
+    """Cria/atualiza o esquema do banco aplicando as migrações pendentes (ver database/migracoes.py)."""
     conn = get_db_connection()
     if conn is None:
         print("Não foi possível conectar ao banco de dados para criar as tabelas.")
         return
 
     try:
-        create_equipamentos_table = """
-            CREATE TABLE IF NOT EXISTS equipamentos (
-                id SERIAL PRIMARY KEY,
-                numero_serie VARCHAR(255) UNIQUE NOT NULL,
-                descricao TEXT NOT NULL,
-                modelo VARCHAR(255),
-                status VARCHAR(50),
-                sistema_alocado VARCHAR(255),
-                pedido_compra VARCHAR(255),
-                data_aquisicao DATE,
-                custo_aquisicao NUMERIC(10, 2),
-                inicio_garantia DATE,
-                fim_garantia DATE
-            );
-        """
-        
-        # CORRIGIDO: Nome da tabela padronizado para 'manutencoes' (sem 'ç')
-        create_manutencoes_table = """
-            CREATE TABLE IF NOT EXISTS manutencoes (
-                id SERIAL PRIMARY KEY,
-                equipamento_id INTEGER REFERENCES equipamentos(id) ON DELETE CASCADE,
-                data_manutencao DATE NOT NULL,
-                motivo_manutencao TEXT,
-                tipo_manutencao VARCHAR(100),
-                custo_manutencao NUMERIC(10, 2)
-            );
-        """
-        
-        conn.execute(text(create_equipamentos_table))
-        conn.execute(text(create_manutencoes_table))
-        conn.commit()
-        
-        print("Tabelas 'equipamentos' e 'manutencoes' verificadas/criadas com sucesso no PostgreSQL.")
+        novas = aplicar_migracoes(conn)
+        if novas:
+            print(f"Esquema atualizado com sucesso no PostgreSQL (migrações aplicadas: {', '.join(map(str, novas))}).")
+        else:
+            print("Esquema já está atualizado no PostgreSQL. Nenhuma migração pendente.")
 
     except Exception as e:
         print(f"Ocorreu um erro ao criar as tabelas: {e}")
-        conn.rollback()
     finally:
         if conn:
             conn.close()
 
+def mostrar_situacao(indices=False):
+    """Imprime as migrações conhecidas e, opcionalmente, o uso dos índices."""
+    conn = get_db_connection()
+    if conn is None:
+        print("Não foi possível conectar ao banco de dados.")
+        return
+    try:
+        print(situacao_migracoes(conn).to_string(index=False))
+        if indices:
+            print()
+            print(relatorio_indices(conn).to_string(index=False))
+    finally:
+        conn.close()
+
+# Uso: python -m database.setup [--status] [--indices]
 if __name__ == '__main__':
-    create_tables()
+    parser = argparse.ArgumentParser(description="Cria/atualiza o esquema do banco de dados.")
+    parser.add_argument('--status', action='store_true', help="Apenas lista as migrações aplicadas e pendentes.")
+    parser.add_argument('--indices', action='store_true', help="Lista as migrações e mostra quantas vezes cada índice foi usado.")
+    args = parser.parse_args()
+
+    if args.status or args.indices:
+        mostrar_situacao(indices=args.indices)
+    else:
+        create_tables()
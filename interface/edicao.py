@@ -0,0 +1,73 @@
+# kpi_equipamentos/interface/edicao.py
+
+import pandas as pd
+import streamlit as st
+
+# Edição em grade (st.data_editor) de uma página de registros.
+# A grade devolve a página editada; a diferença linha a linha em relação à página original
+# (alteradas, incluídas, excluídas) é enviada ao banco de uma só vez (ver 'Edição em Grade' em database_manager).
+
+def _iguais(a, b):
+    if pd.isna(a) and pd.isna(b):
+        return True
+    if pd.isna(a) or pd.isna(b):
+        return False
+    return a == b
+
+def calcular_diferencas(original, editado, colunas):
+    """
+    Compara a página original com a editada pela coluna 'id' (linhas novas não têm id).
+    Retorna (alteradas, incluidas, excluidas) como listas de dicionários:
+    alteradas com 'id', 'updated_at' e todas as 'colunas'; incluidas só com as 'colunas'; excluidas com 'id' e 'updated_at'.
+    """
+    originais = original.set_index('id')
+    novas = editado['id'].isna()
+    incluidas = [
+        {coluna: linha.get(coluna) for coluna in colunas}
+        for linha in editado.loc[novas].to_dict('records')
+        # Linhas acrescentadas e deixadas em branco são ignoradas
+        if not all(pd.isna(linha.get(coluna)) or linha.get(coluna) == "" for coluna in colunas)
+    ]
+    mantidas = editado.loc[~novas].set_index('id')
+    excluidas = [
+        {'id': id_registro, 'updated_at': originais.at[id_registro, 'updated_at']}
+        for id_registro in originais.index.difference(mantidas.index)
+    ]
+    alteradas = []
+    for id_registro, linha in mantidas.iterrows():
+        anterior = originais.loc[id_registro]
+        if not all(_iguais(linha[coluna], anterior[coluna]) for coluna in colunas):
+            alteradas.append({'id': id_registro, 'updated_at': anterior['updated_at'], **{coluna: linha[coluna] for coluna in colunas}})
+    return alteradas, incluidas, excluidas
+
+def grade_edicao(chave, df, colunas, column_config, aplicar):
+    """
+    Desenha a grade editável de 'df' (página atual) e o botão que grava as alterações com 'aplicar'
+    (ex.: aplicar_edicoes_equipamentos). Só as 'colunas' são editáveis; 'id' e 'updated_at' ficam ocultas.
+    Retorna a grade editada.
+    """
+    editado = st.data_editor(
+        df[['id', 'updated_at', *colunas]], key=f"{chave}_grade", num_rows="dynamic", hide_index=True, width='stretch',
+        column_order=colunas, column_config=column_config
+    )
+    alteradas, incluidas, excluidas = calcular_diferencas(df, editado, colunas)
+    pendentes = len(alteradas) + len(incluidas) + len(excluidas)
+
+    col_resumo, col_descartar, col_salvar = st.columns([3, 1, 1])
+    col_resumo.caption(f"{len(alteradas)} alterada(s), {len(incluidas)} incluída(s), {len(excluidas)} excluída(s).")
+    if col_descartar.button("↩️ Descartar edições", key=f"{chave}_descartar", disabled=pendentes == 0, width='stretch'):
+        # A grade recomeça a partir dos dados atuais do banco
+        del st.session_state[f"{chave}_grade"]
+        st.rerun()
+    if col_salvar.button("💾 Salvar alterações", key=f"{chave}_salvar", type="primary", disabled=pendentes == 0, width='stretch'):
+        resultado = aplicar(alteradas, incluidas, excluidas)
+        if resultado['erro']:
+            st.error(f"❌ Nenhuma alteração foi gravada: {resultado['erro']}")
+        elif resultado['conflitos']:
+            st.error(f"❌ Nenhuma alteração foi gravada: os registros {', '.join(map(str, resultado['conflitos']))} "
+                     "foram alterados ou excluídos por outra pessoa. Descarte as edições para ver os dados atuais.")
+        else:
+            st.toast(f"✅ {resultado['alterados']} alterado(s), {resultado['incluidos']} incluído(s), {resultado['excluidos']} excluído(s).", icon="🎉")
+            del st.session_state[f"{chave}_grade"]
+            st.rerun()
+    return editado
@@ -0,0 +1,37 @@
+# kpi_equipamentos/interface/exportacao.py
+
+import streamlit as st
+from database.cache import obter_versoes
+from database.exportacao import FORMATOS, exportar
+
+# Componente de exportação sob demanda: o arquivo só é gerado quando o usuário clica em "Preparar",
+# e fica guardado na sessão apenas enquanto a consulta (filtros), o formato e as versões das tabelas lidas
+# continuarem os mesmos (ver database/cache.py).
+
+def painel_exportacao(chave, rotulo, nome_arquivo, query, params=None, tabelas=(), renomear=None, opcoes_csv=None):
+    """
+    Desenha a escolha de formato e o botão que gera o arquivo; depois de gerado, mostra o botão de download.
+    'nome_arquivo' é o nome sem extensão; 'chave' deve ser única na página; 'tabelas' são as tabelas lidas pela consulta.
+    """
+    col_formato, col_botao = st.columns([1, 2])
+    formato = col_formato.selectbox(f"Formato ({rotulo})", list(FORMATOS), key=f"{chave}_formato", label_visibility="collapsed")
+    assinatura = (query, repr(params), formato, obter_versoes(tabelas))
+    arquivo = st.session_state.get(f"{chave}_arquivo")
+
+    with col_botao:
+        if arquivo is not None and arquivo['assinatura'] == assinatura:
+            st.download_button(
+                label=f"📥 Baixar {rotulo} ({formato})", data=arquivo['dados'],
+                file_name=f"{nome_arquivo}.{FORMATOS[formato]['extensao']}", mime=FORMATOS[formato]['mime'],
+                key=f"{chave}_baixar", on_click="ignore", width='stretch'
+            )
+        elif st.button(f"⚙️ Preparar {rotulo}", key=f"{chave}_preparar", width='stretch'):
+            try:
+                with st.spinner("Gerando arquivo..."):
+                    dados = exportar(query, params, formato, renomear=renomear, opcoes_csv=opcoes_csv)
+                st.session_state[f"{chave}_arquivo"] = {'assinatura': assinatura, 'dados': dados}
+                st.rerun()
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                st.error(f"❌ Ocorreu um erro ao gerar o arquivo: {e}")
@@ -0,0 +1,96 @@
+# kpi_equipamentos/interface/graficos.py
+
+import pandas as pd
+import plotly.express as px
+from database.cache import cache_por_tabela
+from database.kpi_queries import (
+    contar_status, tendencia_mensal, tco_por_descricao, custo_manutencao_por, ranking_tco_equipamentos
+)
+from database.confiabilidade import custo_movel_12_meses, TABELAS_CONFIABILIDADE
+from database.coortes import custo_acumulado_coortes, TABELAS_COORTES
+
+# Figuras do Dashboard de KPIs, em cache.
+# Cada figura é guardada com a chave (período, sistemas, agrupamento) mais as versões das tabelas de que
+# seus dados dependem (ver database/cache.py): um rerun que não muda esses valores — outro controle da página,
+# "Selecionar Todos" com tudo já selecionado — reaproveita a figura pronta em vez de refazer a agregação
+# e o px.* correspondente. Cada função retorna None quando não há dados para o gráfico.
+# Gráficos de barras com muitas categorias mostram as LIMITE_CATEGORIAS maiores e somam o resto em "Outros".
+
+LIMITE_CATEGORIAS = 15
+ROTULO_OUTROS = "Outros"
+TABELAS_PERIODO = ('equipamentos', 'manutencoes', 'rollups', 'analitico')
+CORES_CUSTO = {'Custo Aquisição': '#00CC96', 'Custo Manutenção': '#EF553B'}
+
+def limitar_categorias(df, rotulo, valores, limite=LIMITE_CATEGORIAS):
+    """
+    Mantém as 'limite' categorias de 'rotulo' com maior soma de 'valores' e agrupa as demais
+    em uma única linha "Outros" (somando cada coluna de valor). A ordem original é preservada.
+    """
+    if len(df) <= limite:
+        return df
+    total = df[valores].sum(axis=1)
+    maiores = total.nlargest(limite).index
+    restantes = df.drop(index=maiores)
+    outros = pd.DataFrame([{rotulo: f"{ROTULO_OUTROS} ({len(restantes)})", **restantes[valores].sum().to_dict()}])
+    return pd.concat([df.loc[df.index.isin(maiores)], outros], ignore_index=True)
+
+@cache_por_tabela('equipamentos')
+def figura_status(sistemas):
+    status_df = contar_status(sistemas)
+    if status_df.empty: return None
+    fig = px.pie(status_df, names='status', values='contagem', hole=0.4, color_discrete_map={'Operacional': '#00CC96', 'Em Manutenção': '#FFA15A', 'Desativado': '#AB63FA'})
+    fig.update_traces(textinfo='percent+label', textposition='outside'); fig.update_layout(showlegend=False, margin=dict(t=0, b=0, l=0, r=0))
+    return fig
+
+@cache_por_tabela(*TABELAS_PERIODO)
+def figura_tendencia(data_inicio, data_fim, sistemas):
+    df_tendencia = tendencia_mensal(data_inicio, data_fim, sistemas)
+    if df_tendencia.empty: return None
+    fig = px.line(df_tendencia, x='mes_ano', y='contagem', markers=True, labels={'mes_ano': 'Mês', 'contagem': 'Nº de Manutenções'})
+    fig.update_traces(line=dict(color='#636EFA', width=3))
+    return fig
+
+@cache_por_tabela(*TABELAS_PERIODO)
+def figura_tco(data_inicio, data_fim, sistemas):
+    df_tco = tco_por_descricao(data_inicio, data_fim, sistemas)
+    if df_tco.empty: return None
+    df_tco = limitar_categorias(df_tco, 'descricao', ['Custo Aquisição', 'Custo Manutenção'])
+    df_tco_melted = df_tco.melt(id_vars='descricao', value_vars=['Custo Aquisição', 'Custo Manutenção'], var_name='Tipo de Custo', value_name='Custo')
+    return px.bar(df_tco_melted, x='descricao', y='Custo', color='Tipo de Custo', barmode='stack', color_discrete_map=CORES_CUSTO)
+
+@cache_por_tabela(*TABELAS_PERIODO)
+def figura_custo_manutencao(agrupador, data_inicio, data_fim, sistemas):
+    df_agregado = custo_manutencao_por(agrupador, data_inicio, data_fim, sistemas)
+    if df_agregado.empty: return None
+    df_agregado = limitar_categorias(df_agregado, 'Agrupador', ['Custo Total'])
+    fig = px.bar(df_agregado, x='Agrupador', y='Custo Total', text_auto='.2s', color='Agrupador')
+    fig.update_layout(xaxis_title=None, showlegend=False)
+    return fig
+
+@cache_por_tabela('equipamentos', 'manutencoes', 'rollups')
+def figura_ranking(sistemas):
+    df_ranking = ranking_tco_equipamentos(sistemas)
+    if df_ranking.empty: return None
+    return px.bar(df_ranking.sort_values('tco'), y='equipamento', x=['Custo Aquisição', 'Custo Manutenção'], orientation='h',
+                  color_discrete_map=CORES_CUSTO, labels={'value': 'Custo (R$)', 'equipamento': '', 'variable': 'Tipo de Custo'})
+
+@cache_por_tabela(*TABELAS_CONFIABILIDADE)
+def figura_custo_movel(data_inicio, data_fim, sistemas):
+    df_movel = custo_movel_12_meses(data_inicio, data_fim, sistemas)
+    if df_movel.empty: return None
+    fig = px.line(df_movel, x='mes', y='custo_12m', color='sistema_alocado',
+                  labels={'mes': 'Mês', 'custo_12m': 'Custo dos Últimos 12 Meses (R$)', 'sistema_alocado': 'Sistema'})
+    fig.update_layout(legend=dict(orientation='h', y=-0.2))
+    return fig
+
+@cache_por_tabela(*TABELAS_COORTES)
+def figura_coortes(granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas):
+    df_coortes = custo_acumulado_coortes(granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas)
+    if df_coortes.empty: return None
+    unidade_idade = 'Anos' if granularidade == 'Ano' else 'Trimestres'
+    fig = px.line(df_coortes, x='idade', y='custo_acumulado_por_equipamento', color='coorte', markers=True,
+                  hover_data={'equipamentos': True, 'custo_acumulado': ':,.2f'},
+                  labels={'idade': f'{unidade_idade} desde a Aquisição', 'custo_acumulado_por_equipamento': 'Custo Acumulado por Equipamento (R$)',
+                          'coorte': 'Coorte', 'equipamentos': 'Equipamentos', 'custo_acumulado': 'Custo Acumulado (R$)'})
+    fig.update_xaxes(dtick=1)
+    return fig
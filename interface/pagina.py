@@ -0,0 +1,74 @@
+# kpi_equipamentos/interface/pagina.py
+
+import hmac
+import os
+import streamlit as st
+
+# Preparação comum a todas as páginas: verificação de login, configuração da página e logo.
+# O logo é lido uma única vez por processo (st.cache_resource) e entregue ao Streamlit como os bytes do
+# próprio PNG: uma imagem do PIL seria recodificada em PNG a cada página e a cada rerun (~170 ms).
+# Páginas administrativas (ex.: Diagnóstico) pedem também a senha de administrador, definida em
+# st.secrets["app_auth"]["admin_password"] ou na variável de ambiente KPI_ADMIN_SENHA; sem ela, ficam desabilitadas.
+
+CAMINHO_LOGO = "assets/logo.png"
+
+@st.cache_resource
+def carregar_logo():
+    """Retorna o conteúdo do arquivo do logo, compartilhado por todas as sessões (None se o arquivo não existir)."""
+    try:
+        with open(CAMINHO_LOGO, 'rb') as arquivo:
+            return arquivo.read()
+    except FileNotFoundError:
+        return None
+
+def exigir_login():
+    """Interrompe a página se o usuário não passou pela tela de login (Inicio.py)."""
+    if st.session_state.get("password_correct", False) == False:
+        st.error("Você não tem permissão para acessar esta página. Por favor, faça o login.")
+        st.stop()
+
+def _senha_administrador():
+    """Senha de administrador configurada nos segredos ou no ambiente (vazia se não houver)."""
+    try:
+        return st.secrets["app_auth"]["admin_password"]
+    except (KeyError, FileNotFoundError, st.errors.StreamlitAPIException):
+        return os.environ.get("KPI_ADMIN_SENHA", "")
+
+def exigir_administrador():
+    """Interrompe a página até que a senha de administrador seja informada nesta sessão."""
+    if st.session_state.get("admin_correct", False):
+        return
+    senha = _senha_administrador()
+    if not senha:
+        st.error("Esta página está desabilitada: nenhuma senha de administrador foi configurada.")
+        st.stop()
+    digitada = st.text_input("Senha de administrador:", type="password", key="admin_password")
+    if digitada:
+        if hmac.compare_digest(digitada.encode('utf-8'), senha.encode('utf-8')):
+            st.session_state["admin_correct"] = True
+            del st.session_state["admin_password"]
+            st.rerun()
+        st.error("Senha de administrador incorreta.")
+    st.stop()
+
+def logo_na_barra_lateral():
+    """Mostra o logo no topo da barra lateral, seguido do cabeçalho de navegação."""
+    logo = carregar_logo()
+    if logo is not None:
+        st.sidebar.image(logo, width='stretch')
+    else:
+        st.sidebar.error(f"Logo não encontrado. Verifique o caminho do arquivo '{CAMINHO_LOGO}'.")
+    st.sidebar.markdown("---")
+    st.sidebar.header("Navegação")
+
+def configurar_pagina(titulo, icone, layout="wide", logo=False, admin=False):
+    """
+    Prepara uma página protegida: verifica o login e chama st.set_page_config uma única vez.
+    Com logo=True, mostra também o logo na barra lateral; com admin=True, exige a senha de administrador.
+    """
+    exigir_login()
+    st.set_page_config(page_title=titulo, page_icon=icone, layout=layout)
+    if logo:
+        logo_na_barra_lateral()
+    if admin:
+        exigir_administrador()
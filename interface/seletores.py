@@ -0,0 +1,43 @@
+# kpi_equipamentos/interface/seletores.py
+
+import streamlit as st
+from database.database_manager import buscar_opcoes_equipamentos, obter_rotulo_equipamento, LIMITE_OPCOES_EQUIPAMENTOS
+
+# Seletor de equipamento com busca no servidor: um campo de busca e uma lista com apenas as melhores
+# correspondências (ver buscar_opcoes_equipamentos), em vez de todos os equipamentos em cada selectbox.
+# O equipamento escolhido fica em st.session_state[chave] e continua entre as opções quando a busca muda.
+
+def seletor_equipamento(chave, rotulo="Equipamento", valor_inicial=None, placeholder="Selecione o equipamento..."):
+    """
+    Desenha a busca e o seletor de equipamento e retorna o id escolhido (ou None).
+    'valor_inicial' é o id pré-selecionado na primeira exibição (ex.: ao editar um registro).
+    Não pode ficar dentro de um st.form: a lista precisa ser atualizada a cada busca.
+    """
+    if chave not in st.session_state:
+        st.session_state[chave] = valor_inicial
+    selecionado = st.session_state[chave]
+
+    termo = st.text_input(
+        f"🔎 Buscar {rotulo.rstrip('*').lower()}", key=f"{chave}_busca",
+        placeholder="Descrição, nº de série ou modelo (Enter para buscar)"
+    )
+    opcoes = dict(buscar_opcoes_equipamentos(termo.strip()))
+    encontrados = len(opcoes)
+    if selecionado is not None and selecionado not in opcoes:
+        rotulo_selecionado = obter_rotulo_equipamento(selecionado)
+        if rotulo_selecionado is not None:
+            opcoes = {selecionado: rotulo_selecionado, **opcoes}
+
+    ids = list(opcoes)
+    # O widget é recriado quando as opções mudam: a escolha é guardada à parte e reaplicada pelo índice
+    escolhido = st.selectbox(
+        rotulo, options=ids, format_func=opcoes.get, key=f"{chave}_opcoes",
+        index=ids.index(selecionado) if selecionado in opcoes else None, placeholder=placeholder
+    )
+    st.session_state[chave] = escolhido
+
+    if encontrados >= LIMITE_OPCOES_EQUIPAMENTOS:
+        st.caption(f"Mostrando as {LIMITE_OPCOES_EQUIPAMENTOS} melhores correspondências. Refine a busca para ver outros equipamentos.")
+    elif termo.strip() and encontrados == 0:
+        st.caption("Nenhum equipamento encontrado para esta busca.")
+    return escolhido
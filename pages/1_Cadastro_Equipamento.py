@@ -2,23 +2,11 @@
 
 import streamlit as st
 from database.database_manager import adicionar_equipamento
-from PIL import Image
+from interface.pagina import configurar_pagina
 import datetime
 
-# ==============================================================================
-# --- VERIFICADOR DE AUTENTICAÇÃO (ADICIONAR EM TODAS AS PÁGINAS) ---
-# ==============================================================================
-if st.session_state.get("password_correct", False) == False:
-    st.error("Você não tem permissão para acessar esta página. Por favor, faça o login.")
-    st.stop()
-# ==============================================================================
-
-# --- Configuração da Página ---
-try:
-    favicon = Image.open("assets/seu_logo.png")
-    st.set_page_config(page_title="Cadastro de Equipamentos", page_icon=favicon)
-except FileNotFoundError:
-    st.set_page_config(page_title="Cadastro de Equipamentos", page_icon="🔬")
+# --- Configuração da Página (inclui a verificação de login) ---
+configurar_pagina("Cadastro de Equipamentos", "🔬", layout="centered")
 
 st.title("🔬 Cadastro de Novos Equipamentos")
 st.markdown("---")
@@ -3,51 +3,24 @@
 import streamlit as st
 import pandas as pd
 from database.database_manager import listar_equipamentos_df
-from PIL import Image
-import datetime
+from database.esquema import adicionar_colunas_garantia
+from database.instrumentacao import MedicaoPagina
+from interface.pagina import configurar_pagina
 
-# ==============================================================================
-# --- VERIFICADOR DE AUTENTICAÇÃO (ADICIONAR EM TODAS AS PÁGINAS) ---
-# ==============================================================================
-if st.session_state.get("password_correct", False) == False:
-    st.error("Você não tem permissão para acessar esta página. Por favor, faça o login.")
-    st.stop()
-# ==============================================================================
-
-# --- Configuração da Página ---
-try:
-    favicon = Image.open("assets/seu_logo.png")
-    st.set_page_config(page_title="Visualizar Equipamentos", page_icon=favicon, layout="wide")
-except FileNotFoundError:
-    st.set_page_config(page_title="Visualizar Equipamentos", page_icon="🔬", layout="wide")
+# --- Configuração da Página (inclui a verificação de login) ---
+configurar_pagina("Visualizar Equipamentos", "🔬")
 
 st.title("📋 Lista de Equipamentos Cadastrados")
 st.markdown("---")
 
 # --- Carregamento dos Dados ---
+medicao = MedicaoPagina("Visualizar Equipamentos")
 df_equipamentos = listar_equipamentos_df()
+medicao.fase("transformacao")
 
-# --- VERIFICAÇÃO E CORREÇÃO ---
-# Se o DataFrame não estiver vazio, vamos processar as colunas
+# As datas já chegam como datetime; a situação da garantia é calculada para o dia de hoje (ver database/esquema.py)
 if not df_equipamentos.empty:
-    
-    # Converte as colunas de data para o formato datetime do pandas
-    df_equipamentos['inicio_garantia'] = pd.to_datetime(df_equipamentos['inicio_garantia'], errors='coerce')
-    df_equipamentos['fim_garantia'] = pd.to_datetime(df_equipamentos['fim_garantia'], errors='coerce')
-
-    # --- LÓGICA PARA CRIAR A COLUNA VIRTUAL 'em_garantia' ---
-    hoje = datetime.datetime.now().date()
-    
-    # Define uma função para aplicar a lógica
-    def verificar_garantia(row):
-        if pd.notna(row['fim_garantia']):
-            return "Sim" if row['fim_garantia'].date() >= hoje else "Não"
-        return "Não Informado"
-
-    # Aplica a função para criar a nova coluna
-    df_equipamentos['em_garantia'] = df_equipamentos.apply(verificar_garantia, axis=1)
-    
-    # --- FIM DA LÓGICA DE CRIAÇÃO DA COLUNA ---
+    df_equipamentos = adicionar_colunas_garantia(df_equipamentos)
 
     st.info(f"Total de equipamentos cadastrados: **{len(df_equipamentos)}**")
 
@@ -59,17 +32,17 @@ if not df_equipamentos.empty:
     sistemas_selecionados = st.sidebar.multiselect("Filtrar por Sistema:", options=sistemas, default=sistemas)
 
     # Filtro por Status de Garantia
-    # AGORA ESTA LINHA VAI FUNCIONAR, POIS A COLUNA 'em_garantia' EXISTE!
     garantia_status = df_equipamentos['em_garantia'].unique()
     garantia_selecionada = st.sidebar.multiselect("Filtrar por Garantia:", options=garantia_status, default=garantia_status)
 
     # Aplicação dos filtros
-    df_filtrado = df_equipamentos[
+    df_filtrado = df_equipamentos.drop(columns=['display_name', 'dias_fim_garantia'])[
         df_equipamentos['sistema_alocado'].isin(sistemas_selecionados) &
         df_equipamentos['em_garantia'].isin(garantia_selecionada)
     ]
 
     # --- Exibição da Tabela ---
+    medicao.fase("renderizacao")
     st.dataframe(
         df_filtrado,
         hide_index=True,
@@ -92,4 +65,4 @@ if not df_equipamentos.empty:
 else:
     st.warning("⚠️ Nenhum equipamento cadastrado no sistema ainda.")
 
-
+medicao.concluir()
@@ -2,97 +2,132 @@
 
 import streamlit as st
 import pandas as pd
-from database.database_manager import adicionar_manutencao, listar_equipamentos_df
+from database.database_manager import adicionar_manutencao, adicionar_manutencoes_lote, contar_equipamentos, obter_rotulo_equipamento
+from database.instrumentacao import MedicaoPagina
+from interface.pagina import configurar_pagina
+from interface.seletores import seletor_equipamento
 import datetime
 
-from PIL import Image # Importa a biblioteca de manipulação de imagem
-
-# ==============================================================================
-# --- VERIFICADOR DE AUTENTICAÇÃO (ADICIONAR EM TODAS AS PÁGINAS) ---
-# ==============================================================================
-if st.session_state.get("password_correct", False) == False:
-    st.error("Você não tem permissão para acessar esta página. Por favor, faça o login.")
-    st.stop()
-# ==============================================================================
-
-# --- Configuração da Página ---
-# Define o título da aba, o ícone e o layout da página.
-# Este deve ser o primeiro comando Streamlit no seu script.
-# No topo do arquivo
-st.set_page_config(
-    page_title="KPI Equipamentos - Início",
-    page_icon="🏠",  # MUDANÇA AQUI: de 📈 para 🏠
-    layout="wide"
-)
-# Adiciona o logo no topo da barra lateral
-
-try:
-    logo = Image.open("assets/logo.png")
-    # --- CORREÇÃO APLICADA AQUI ---
-    st.sidebar.image(logo, width='stretch') # Trocamos 'use_column_width' por 'use_container_width'
-except FileNotFoundError:
-    st.sidebar.error("Logo não encontrado. Verifique o caminho do arquivo 'assets/logo.png'.")
-
-st.sidebar.markdown("---")
-st.sidebar.header("Navegação")
-
-# --- Configuração da Página ---
-st.set_page_config(
-    page_title="Cadastro de Manutenção",
-    page_icon="🛠️", # MUDANÇA AQUI
-    layout="wide"
-)
+# --- Configuração da Página (inclui a verificação de login) ---
+configurar_pagina("Cadastro de Manutenção", "🛠️", logo=True)
 
 st.title("🛠️ Registro de Manutenção") # MUDANÇA AQUI
 
-@st.cache_data
-def carregar_equipamentos():
-    df = listar_equipamentos_df()
-    if not df.empty:
-        df['display_name'] = df['descricao'] + " (S/N: " + df['numero_serie'] + ")"
-    return df
-
-df_equipamentos = carregar_equipamentos()
+# Só a contagem: os equipamentos são buscados no banco conforme o texto digitado em cada seletor
+medicao = MedicaoPagina("Cadastro de Manutenção")
+total_equipamentos = contar_equipamentos()
+medicao.fase("renderizacao")
 
-if df_equipamentos.empty:
+if total_equipamentos == 0:
     st.error("⚠️ Nenhum equipamento cadastrado. Cadastre um antes de registrar uma manutenção.")
 else:
-    with st.form("registro_manutencao_form", clear_on_submit=True):
-        st.subheader("Selecione o Equipamento e os Detalhes")
+    tab_unico, tab_lote = st.tabs(["📝 Registro Único", "📋 Vários Registros"])
 
-        equipamento_selecionado_display = st.selectbox(
-            "Equipamento*", options=df_equipamentos['display_name'],
-            index=None, placeholder="Selecione o equipamento..."
-        )
-
-        col1, col2 = st.columns(2)
-        with col1:
-            data_manutencao = st.date_input("Data da Manutenção*", value=datetime.date.today(), format="DD/MM/YYYY")
-            tipo_manutencao = st.selectbox("Tipo de Manutenção*", options=["Corretiva", "Preventiva"], index=None)
-        with col2:
-            custo_manutencao = st.number_input("Custo da Manutenção (R$)", min_value=0.0, value=0.0, format="%.2f")
+    with tab_unico:
+        st.subheader("Selecione o Equipamento e os Detalhes")
+        # Fora do formulário: a lista de equipamentos acompanha a busca a cada Enter
+        equipamento_id = seletor_equipamento("registro_equipamento", "Equipamento*")
+
+        with st.form("registro_manutencao_form", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                data_manutencao = st.date_input("Data da Manutenção*", value=datetime.date.today(), format="DD/MM/YYYY")
+                tipo_manutencao = st.selectbox("Tipo de Manutenção*", options=["Corretiva", "Preventiva"], index=None)
+            with col2:
+                custo_manutencao = st.number_input("Custo da Manutenção (R$)", min_value=0.0, value=0.0, format="%.2f")
         
-        motivo_manutencao = st.text_area("Descrição/Motivo da Manutenção*")
+            motivo_manutencao = st.text_area("Descrição/Motivo da Manutenção*")
 
-        st.markdown("---")
-        submitted = st.form_submit_button("✔️ Registrar Manutenção")
+            st.markdown("---")
+            submitted = st.form_submit_button("✔️ Registrar Manutenção")
 
-        if submitted:
-            if not all([equipamento_selecionado_display, data_manutencao, tipo_manutencao, motivo_manutencao]):
-                st.warning("Por favor, preencha todos os campos obrigatórios (*).")
-            else:
-                equipamento_id = df_equipamentos[df_equipamentos['display_name'] == equipamento_selecionado_display]['id'].iloc[0]
-                
-                success = adicionar_manutencao(
-                    equipamento_id=int(equipamento_id),
-                    data_manutencao=data_manutencao.isoformat(),
-                    motivo_manutencao=str(motivo_manutencao),
-                    tipo_manutencao=str(tipo_manutencao),
-                    custo_manutencao=float(custo_manutencao)
-                )
-
-                if success:
-                    st.success(f"Manutenção para '{equipamento_selecionado_display}' registrada!")
-                    st.cache_data.clear()
+            if submitted:
+                if not all([equipamento_id, data_manutencao, tipo_manutencao, motivo_manutencao]):
+                    st.warning("Por favor, preencha todos os campos obrigatórios (*).")
                 else:
-                    st.error("❌ Ocorreu um erro ao registrar a manutenção.")
+                    success = adicionar_manutencao(
+                        equipamento_id=int(equipamento_id),
+                        data_manutencao=data_manutencao.isoformat(),
+                        motivo_manutencao=str(motivo_manutencao),
+                        tipo_manutencao=str(tipo_manutencao),
+                        custo_manutencao=float(custo_manutencao)
+                    )
+
+                    if success:
+                        st.success(f"Manutenção para '{obter_rotulo_equipamento(equipamento_id)}' registrada!")
+                    else:
+                        st.error("❌ Ocorreu um erro ao registrar a manutenção.")
+
+    with tab_lote:
+        # Várias manutenções de uma vez (ex.: a semana de preventivas): uma única transação e uma única
+        # invalidação de cache para o lote inteiro; linhas com erro são listadas sem descartar as demais.
+        # Cada equipamento é escolhido pela busca e entra como uma linha da grade: a grade não recebe a frota inteira.
+        st.subheader("Registrar Várias Manutenções")
+        st.caption("Busque um equipamento e adicione-o ao lote (uma linha por manutenção). Todas as colunas, exceto o custo, são obrigatórias.")
+        if 'lote_manutencoes' not in st.session_state:
+            st.session_state.lote_manutencoes = pd.DataFrame({
+                'equipamento_id': pd.Series(dtype='Int64'), 'equipamento': pd.Series(dtype='object'),
+                'data_manutencao': pd.Series(dtype='object'), 'tipo_manutencao': pd.Series(dtype='object'),
+                'custo_manutencao': pd.Series(dtype='float64'), 'motivo_manutencao': pd.Series(dtype='object'),
+            })
+            st.session_state.lote_versao = 0
+
+        equipamento_lote = seletor_equipamento("lote_equipamento", "Equipamento a adicionar")
+        area_botoes = st.container()
+        # A chave muda a cada linha adicionada: a grade é recriada a partir do lote já com as edições feitas
+        df_lote = st.data_editor(
+            st.session_state.lote_manutencoes, num_rows="dynamic", hide_index=True, width='stretch',
+            key=f"editor_manutencoes_lote_{st.session_state.lote_versao}", disabled=['equipamento'],
+            column_config={
+                "equipamento_id": None,
+                "equipamento": st.column_config.TextColumn("Equipamento*", width="large"),
+                "data_manutencao": st.column_config.DateColumn("Data*", format="DD/MM/YYYY"),
+                "tipo_manutencao": st.column_config.SelectboxColumn("Tipo*", options=["Corretiva", "Preventiva"]),
+                "custo_manutencao": st.column_config.NumberColumn("Custo (R$)", min_value=0.0, format="%.2f"),
+                "motivo_manutencao": st.column_config.TextColumn("Descrição/Motivo*", width="large"),
+            }
+        )
+        with area_botoes:
+            col_adicionar, col_limpar = st.columns(2)
+            adicionar = col_adicionar.button("➕ Adicionar ao Lote", disabled=equipamento_lote is None, width='stretch')
+            limpar = col_limpar.button("🗑️ Limpar Lote", width='stretch')
+
+        if adicionar or limpar:
+            nova_linha = pd.DataFrame([{
+                'equipamento_id': equipamento_lote, 'equipamento': obter_rotulo_equipamento(equipamento_lote),
+                'data_manutencao': datetime.date.today(), 'tipo_manutencao': "Preventiva",
+                'custo_manutencao': 0.0, 'motivo_manutencao': None,
+            }]) if adicionar else df_lote.iloc[0:0]
+            st.session_state.lote_manutencoes = pd.concat([df_lote, nova_linha], ignore_index=True) if adicionar else nova_linha
+            st.session_state.lote_versao += 1
+            st.rerun()
+
+        if st.button("✔️ Registrar Manutenções", type="primary"):
+            # Linhas incluídas direto na grade não têm equipamento e são consideradas não usadas
+            df_lote = df_lote[df_lote['equipamento_id'].notna()].reset_index(drop=True)
+            if df_lote.empty:
+                st.warning("Adicione ao menos um equipamento ao lote.")
+            else:
+                registros = [
+                    {
+                        'equipamento_id': linha['equipamento_id'],
+                        'data_manutencao': linha['data_manutencao'],
+                        'motivo_manutencao': linha['motivo_manutencao'],
+                        'tipo_manutencao': linha['tipo_manutencao'],
+                        'custo_manutencao': linha['custo_manutencao'] if pd.notna(linha['custo_manutencao']) else 0.0,
+                    }
+                    for linha in df_lote.to_dict('records')
+                ]
+                ids, erros = adicionar_manutencoes_lote(registros)
+                # Ficam no lote apenas as linhas recusadas, para correção
+                st.session_state.lote_manutencoes = df_lote[[id_ is None for id_ in ids]].reset_index(drop=True)
+                st.session_state.lote_versao += 1
+                inseridas = sum(1 for id_ in ids if id_ is not None)
+                if inseridas:
+                    st.success(f"{inseridas} manutenção(ões) registrada(s)!")
+                if not erros.empty:
+                    st.error(f"❌ {len(erros)} linha(s) não foram registradas e continuam no lote:")
+                    st.dataframe(erros, hide_index=True, width='stretch',
+                                 column_config={"linha": "Linha", "motivo": "Motivo"})
+
+medicao.concluir()
@@ -2,57 +2,45 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from database.database_manager import listar_manutencoes_df, listar_equipamentos_df
-from PIL import Image
+from database.kpi_queries import (
+    obter_resumo_geral, listar_sistemas, calcular_custos_periodo, contar_status,
+    consulta_equipamentos_filtrados, consulta_manutencoes_filtradas
+)
+from database.confiabilidade import confiabilidade_por_equipamento, resumir_por_sistema, resumir_frota
+from database.coortes import resumo_coortes, consulta_resumo_coortes, GRANULARIDADES_COORTE, TABELAS_COORTES
+from interface.graficos import (
+    figura_status, figura_tendencia, figura_tco, figura_custo_manutencao, figura_ranking, figura_custo_movel, figura_coortes
+)
+from interface.exportacao import painel_exportacao
+from database.instrumentacao import MedicaoPagina
+from database.carregamento import carregar_em_paralelo
+from interface.pagina import configurar_pagina
 import datetime
 
-# ==============================================================================
-# --- VERIFICADOR DE AUTENTICAÇÃO (ADICIONAR EM TODAS AS PÁGINAS) ---
-# ==============================================================================
-if st.session_state.get("password_correct", False) == False:
-    st.error("Você não tem permissão para acessar esta página. Por favor, faça o login.")
-    st.stop()
-# ==============================================================================
-
-# --- Configuração da Página ---
-try:
-    favicon = Image.open("assets/seu_logo.png")
-    st.set_page_config(page_title="Dashboard de KPIs", page_icon=favicon, layout="wide")
-except FileNotFoundError:
-    st.set_page_config(page_title="Dashboard de KPIs", page_icon="📊", layout="wide")
+# --- Configuração da Página (inclui a verificação de login) ---
+configurar_pagina("Dashboard de KPIs", "📊")
 
 st.title("📊 Dashboard de KPIs de Manutenção e Ativos")
 
 # --- Carregamento de Dados ---
-@st.cache_data
-def carregar_dados():
-    manutencoes = listar_manutencoes_df()
-    equipamentos = listar_equipamentos_df()
-    if not manutencoes.empty: manutencoes['data_manutencao'] = pd.to_datetime(manutencoes['data_manutencao'])
-    if not equipamentos.empty: equipamentos['data_aquisicao'] = pd.to_datetime(equipamentos['data_aquisicao'])
-    return manutencoes, equipamentos
-
-df_manutencoes_original, df_equipamentos_original = carregar_dados()
+medicao = MedicaoPagina("Dashboard de KPIs")
+# Apenas metadados leves: as agregações são calculadas no banco conforme os filtros.
+metadados, _ = carregar_em_paralelo({'resumo': (obter_resumo_geral,), 'sistemas': (listar_sistemas,)})
+resumo_geral = metadados['resumo']
 
 # --- FILTROS DENTRO DE UM EXPANDER ---
 with st.expander("⚙️ Filtros e Opções", expanded=True):
     
     # --- Lógica de Datas (Robusta) ---
-    data_minima_geral, data_maxima_geral = datetime.date.today(), datetime.date.today()
-    datas_manutencao = df_manutencoes_original['data_manutencao'] if not df_manutencoes_original.empty else pd.Series(dtype='datetime64[ns]')
-    datas_aquisicao = df_equipamentos_original['data_aquisicao'] if not df_equipamentos_original.empty else pd.Series(dtype='datetime64[ns]')
-    todas_as_datas = pd.concat([datas_manutencao, datas_aquisicao]).dropna()
-    if not todas_as_datas.empty:
-        data_minima_geral = todas_as_datas.min().date()
-        data_maxima_geral = todas_as_datas.max().date()
+    data_minima_geral = resumo_geral['data_minima'] or datetime.date.today()
+    data_maxima_geral = resumo_geral['data_maxima'] or datetime.date.today()
 
     col_data1, col_data2, col_sistema = st.columns([1, 1, 2])
     with col_data1: data_inicio = st.date_input("Data de Início", value=data_minima_geral, min_value=data_minima_geral, max_value=data_maxima_geral, format="DD/MM/YYYY")
     with col_data2: data_fim = st.date_input("Data de Fim", value=data_maxima_geral, min_value=data_minima_geral, max_value=data_maxima_geral, format="DD/MM/YYYY")
     
     with col_sistema:
-        sistemas_unicos = sorted(df_equipamentos_original['sistema_alocado'].dropna().unique())
+        sistemas_unicos = metadados['sistemas']
         if 'sistemas_selecionados' not in st.session_state: st.session_state.sistemas_selecionados = sistemas_unicos
         
         botoes_col1, botoes_col2 = st.columns(2)
@@ -62,17 +50,33 @@ with st.expander("⚙️ Filtros e Opções", expanded=True):
         sistemas_selecionados = st.multiselect("Filtrar por Sistema:", options=sistemas_unicos, key='sistemas_selecionados')
 
 # --- Lógica de Filtragem ---
-data_inicio_ts, data_fim_ts = pd.to_datetime(data_inicio), pd.to_datetime(data_fim)
-df_manutencoes = df_manutencoes_original[(df_manutencoes_original['data_manutencao'] >= data_inicio_ts) & (df_manutencoes_original['data_manutencao'] <= data_fim_ts) & (df_manutencoes_original['sistema_alocado'].isin(sistemas_selecionados))]
-df_equipamentos = df_equipamentos_original[(df_equipamentos_original['data_aquisicao'] >= data_inicio_ts) & (df_equipamentos_original['data_aquisicao'] <= data_fim_ts) & (df_equipamentos_original['sistema_alocado'].isin(sistemas_selecionados))]
-equipamentos_por_sistema = df_equipamentos_original[df_equipamentos_original['sistema_alocado'].isin(sistemas_selecionados)]
-
-# --- CÁLCULO DOS CUSTOS ---
-custo_aquisicao_periodo = df_equipamentos['custo_aquisicao'].sum()
-custo_manutencao_periodo = df_manutencoes['custo_manutencao'].sum()
+# Os filtros viram parâmetros das consultas agregadas (ver database/kpi_queries.py).
+# Os sistemas são ordenados para que a mesma seleção, em qualquer ordem, use as mesmas entradas de cache.
+sistemas_filtro = tuple(sorted(sistemas_selecionados))
+filtros = (data_inicio, data_fim, sistemas_filtro)
+
+# --- CÁLCULO DOS CUSTOS E GRÁFICOS ---
+# As consultas são independentes entre si: rodam em paralelo, cada uma com sua conexão do pool.
+# As figuras vêm prontas do cache enquanto os filtros e os dados não mudam (ver interface/graficos.py).
+dados, _ = carregar_em_paralelo({
+    'custos': (calcular_custos_periodo, *filtros),
+    'status': (contar_status, sistemas_filtro),
+    'fig_status': (figura_status, sistemas_filtro),
+    'fig_tendencia': (figura_tendencia, *filtros),
+    'fig_tco': (figura_tco, *filtros),
+    'fig_custo': (figura_custo_manutencao, st.session_state.get('radio_custo', "Equipamento"), *filtros),
+    'fig_ranking': (figura_ranking, sistemas_filtro),
+    'confiabilidade': (confiabilidade_por_equipamento, *filtros),
+    'fig_custo_movel': (figura_custo_movel, *filtros),
+})
+custos_periodo = dados['custos']
+custo_aquisicao_periodo = custos_periodo['custo_aquisicao']
+custo_manutencao_periodo = custos_periodo['custo_manutencao']
 custo_total_periodo = custo_aquisicao_periodo + custo_manutencao_periodo
+status_df = dados['status']
 
 # --- MÉTRICAS PRINCIPAIS (VERSÃO FINAL COM TUDO VISÍVEL) ---
+medicao.fase("renderizacao")
 st.markdown("---")
 st.header("KPIs Gerais (Filtro Aplicado)")
 
@@ -90,7 +94,7 @@ with col_fin3:
 st.subheader("Visão Operacional")
 col_op1, col_op2 = st.columns(2)
 with col_op1:
-    status_counts = equipamentos_por_sistema['status'].value_counts()
+    status_counts = status_df.set_index('status')['contagem'] if not status_df.empty else pd.Series(dtype='int64')
     operacionais = int(status_counts.get('Operacional', 0))
     st.metric("🔬 Equipamentos Operacionais", f"{operacionais}")
 with col_op2:
@@ -100,56 +104,180 @@ with col_op2:
 st.markdown("---")
 
 # --- GRÁFICOS EM ABAS ---
-if df_equipamentos_original.empty:
+@st.fragment
+def grafico_custo_manutencao():
+    """A troca de agrupamento reexecuta só este trecho: os demais gráficos não são reenviados ao navegador."""
+    visao_custo = st.radio("Analisar por:", ["Equipamento", "Sistema"], horizontal=True, key="radio_custo")
+    fig_custo = figura_custo_manutencao(visao_custo, *filtros)
+    if fig_custo is not None: st.plotly_chart(fig_custo, width='stretch')
+    else: st.info("Nenhum custo de manutenção no período.")
+
+# Ordenações da tabela de confiabilidade: coluna e se a ordem é crescente
+ORDENACOES_CONFIABILIDADE = {
+    "Maior taxa de falhas": ('taxa_falhas_ano', False),
+    "Menor MTBF": ('mtbf_dias', True),
+    "Maior custo em 12 meses": ('custo_12m', False),
+    "Menor razão preventiva/corretiva": ('razao_preventiva_corretiva', True),
+}
+LIMITE_TABELA_CONFIABILIDADE = 100
+
+COLUNAS_CONFIABILIDADE = {
+    "corretivas": st.column_config.NumberColumn("Corretivas", format="%d"),
+    "preventivas": st.column_config.NumberColumn("Preventivas", format="%d"),
+    "mtbf_dias": st.column_config.NumberColumn("MTBF (dias)", format="%.1f"),
+    "taxa_falhas_ano": st.column_config.NumberColumn("Falhas/Ano", format="%.2f"),
+    "razao_preventiva_corretiva": st.column_config.NumberColumn("Prev./Corr.", format="%.2f"),
+    "custo_12m": st.column_config.NumberColumn("Custo 12 Meses (R$)", format="R$ %.2f"),
+}
+
+@st.fragment
+def tabela_confiabilidade_equipamentos(df_confiabilidade):
+    """
+    Mostra só os LIMITE_TABELA_CONFIABILIDADE primeiros equipamentos na ordem escolhida, em vez da frota inteira;
+    trocar a ordem reexecuta só este trecho. Sem o dado (ex.: MTBF com menos de duas corretivas), o equipamento vai para o fim.
+    """
+    ordem = st.selectbox("Ordenar equipamentos por:", list(ORDENACOES_CONFIABILIDADE), key="ordem_confiabilidade")
+    coluna, crescente = ORDENACOES_CONFIABILIDADE[ordem]
+    df_ordenado = df_confiabilidade.sort_values([coluna, 'equipamento_id'], ascending=[crescente, True], na_position='last')
+    st.dataframe(
+        df_ordenado.head(LIMITE_TABELA_CONFIABILIDADE)[
+            ['descricao', 'numero_serie', 'sistema_alocado', 'data_aquisicao', *COLUNAS_CONFIABILIDADE]
+        ],
+        hide_index=True, width='stretch',
+        column_config={
+            "descricao": "Equipamento", "numero_serie": "Nº de Série", "sistema_alocado": "Sistema",
+            "data_aquisicao": st.column_config.DateColumn("Aquisição", format="DD/MM/YYYY"),
+            **COLUNAS_CONFIABILIDADE,
+        }
+    )
+    if len(df_ordenado) > LIMITE_TABELA_CONFIABILIDADE:
+        st.caption(f"Mostrando {LIMITE_TABELA_CONFIABILIDADE} de {len(df_ordenado)} equipamentos.")
+
+@st.fragment
+def analise_coortes():
+    """
+    Coortes de aquisição com filtros de data próprios: o período de aquisição escolhe os equipamentos
+    e o período de manutenção limita os custos somados. Mudar esses controles reexecuta só este trecho.
+    """
+    col_granularidade, col_aq1, col_aq2, col_mt1, col_mt2 = st.columns([1, 1, 1, 1, 1])
+    granularidade = col_granularidade.radio("Coortes por:", list(GRANULARIDADES_COORTE), horizontal=True, key="coorte_granularidade")
+    # Sem key: o período de manutenção parte do filtro geral e volta a acompanhá-lo sempre que ele muda
+    limites = dict(min_value=data_minima_geral, max_value=data_maxima_geral, format="DD/MM/YYYY")
+    aquisicao_inicio = col_aq1.date_input("Aquisição de", value=data_minima_geral, **limites)
+    aquisicao_fim = col_aq2.date_input("Aquisição até", value=data_maxima_geral, **limites)
+    manutencao_inicio = col_mt1.date_input("Manutenções de", value=data_inicio, **limites)
+    manutencao_fim = col_mt2.date_input("Manutenções até", value=data_fim, **limites)
+    filtros_coorte = (granularidade, aquisicao_inicio, aquisicao_fim, manutencao_inicio, manutencao_fim, sistemas_filtro)
+    # 'Em Garantia Hoje' é contada para a data atual, que entra na chave do cache do resumo
+    filtros_resumo = (*filtros_coorte, datetime.date.today())
+
+    dados_coortes, _ = carregar_em_paralelo({
+        'resumo': (resumo_coortes, *filtros_resumo),
+        'fig_coortes': (figura_coortes, *filtros_coorte),
+    })
+    df_resumo = dados_coortes['resumo']
+    if df_resumo.empty:
+        st.info("Nenhum equipamento adquirido no período selecionado.")
+        return
+
+    st.subheader("Custo de Manutenção Acumulado por Equipamento, Conforme a Idade")
+    if dados_coortes['fig_coortes'] is not None: st.plotly_chart(dados_coortes['fig_coortes'], width='stretch')
+    st.caption("Cada linha é uma coorte de aquisição; a idade é contada da aquisição até a data de cada manutenção. "
+               "Só entram as manutenções do período de manutenção escolhido.")
+
+    st.subheader("Coortes, da Mais Cara para a Mais Barata (Manutenção por Equipamento)")
+    st.dataframe(
+        df_resumo, hide_index=True, width='stretch',
+        column_config={
+            "posicao": st.column_config.NumberColumn("#", format="%d"),
+            "coorte": "Coorte", "equipamentos": "Equipamentos", "em_garantia_hoje": "Em Garantia Hoje", "manutencoes": "Manutenções",
+            "custo_aquisicao": st.column_config.NumberColumn("Custo Aquisição (R$)", format="R$ %.2f"),
+            "custo_manutencao": st.column_config.NumberColumn("Custo Manutenção (R$)", format="R$ %.2f"),
+            "custo_manutencao_por_equipamento": st.column_config.NumberColumn("Manutenção por Equipamento (R$)", format="R$ %.2f"),
+            "custo_em_garantia": st.column_config.NumberColumn("Na Garantia (R$)", format="R$ %.2f"),
+            "custo_fora_garantia": st.column_config.NumberColumn("Fora da Garantia (R$)", format="R$ %.2f"),
+            "custo_garantia_nao_informada": st.column_config.NumberColumn("Garantia Não Informada (R$)", format="R$ %.2f"),
+        }
+    )
+    painel_exportacao("exp_coortes", "Coortes", "coortes_aquisicao", *consulta_resumo_coortes(*filtros_resumo), tabelas=TABELAS_COORTES)
+
+if resumo_geral['total_equipamentos'] == 0:
     st.warning("⚠️ Nenhum equipamento registrado no sistema.")
 else:
-    tab_graf_op, tab_graf_fin = st.tabs(["📈 Análise Operacional", "💰 Análise Financeira"])
+    tab_graf_op, tab_graf_fin, tab_confiabilidade, tab_coortes = st.tabs(
+        ["📈 Análise Operacional", "💰 Análise Financeira", "🛡️ Confiabilidade", "🗓️ Coortes de Aquisição"]
+    )
     with tab_graf_op:
         op_col1, op_col2 = st.columns(2)
         with op_col1:
             st.subheader("Distribuição de Status dos Ativos")
-            status_df = equipamentos_por_sistema['status'].value_counts().reset_index(); status_df.columns = ['status', 'contagem']
-            fig_status = px.pie(status_df, names='status', values='contagem', hole=0.4, color_discrete_map={'Operacional': '#00CC96', 'Em Manutenção': '#FFA15A', 'Desativado': '#AB63FA'})
-            fig_status.update_traces(textinfo='percent+label', textposition='outside'); fig_status.update_layout(showlegend=False, margin=dict(t=0, b=0, l=0, r=0))
-            st.plotly_chart(fig_status, width='stretch')
+            if dados['fig_status'] is not None: st.plotly_chart(dados['fig_status'], width='stretch')
+            else: st.info("Nenhum equipamento nos sistemas selecionados.")
         with op_col2:
             st.subheader("Tendência de Manutenções no Período")
-            if not df_manutencoes.empty:
-                df_tendencia = df_manutencoes.copy(); df_tendencia['mes_ano'] = df_tendencia['data_manutencao'].dt.strftime('%Y-%m')
-                tendencia_mensal = df_tendencia.groupby('mes_ano').size().reset_index(name='contagem').sort_values(by='mes_ano')
-                fig_tendencia = px.line(tendencia_mensal, x='mes_ano', y='contagem', markers=True, labels={'mes_ano': 'Mês', 'contagem': 'Nº de Manutenções'})
-                fig_tendencia.update_traces(line=dict(color='#636EFA', width=3)); st.plotly_chart(fig_tendencia, width='stretch')
+            if dados['fig_tendencia'] is not None: st.plotly_chart(dados['fig_tendencia'], width='stretch')
             else: st.info("Nenhuma manutenção no período para exibir tendência.")
     with tab_graf_fin:
         fin_col1, fin_col2 = st.columns(2)
         with fin_col1:
             st.subheader("Custo Total de Propriedade (Período)")
-            custo_aq = df_equipamentos.groupby('descricao')['custo_aquisicao'].sum().reset_index().rename(columns={'custo_aquisicao': 'Custo Aquisição'})
-            custo_man = df_manutencoes.groupby('equipamento_descricao')['custo_manutencao'].sum().reset_index().rename(columns={'equipamento_descricao': 'descricao', 'custo_manutencao': 'Custo Manutenção'})
-            if not custo_aq.empty or not custo_man.empty:
-                df_tco = pd.merge(custo_aq, custo_man, on='descricao', how='outer').fillna(0)
-                df_tco['TCO'] = df_tco['Custo Aquisição'] + df_tco['Custo Manutenção']
-                df_tco_melted = df_tco.melt(id_vars='descricao', value_vars=['Custo Aquisição', 'Custo Manutenção'], var_name='Tipo de Custo', value_name='Custo')
-                fig_tco = px.bar(df_tco_melted, x='descricao', y='Custo', color='Tipo de Custo', barmode='stack', color_discrete_map={'Custo Aquisição': '#00CC96', 'Custo Manutenção': '#EF553B'})
-                st.plotly_chart(fig_tco, width='stretch')
+            if dados['fig_tco'] is not None: st.plotly_chart(dados['fig_tco'], width='stretch')
             else: st.info("Nenhum custo de aquisição ou manutenção no período selecionado.")
         with fin_col2:
             st.subheader("Custos de Manutenção no Período")
-            if not df_manutencoes.empty:
-                visao_custo = st.radio("Analisar por:", ["Equipamento", "Sistema"], horizontal=True, key="radio_custo")
-                grupo = 'equipamento_descricao' if visao_custo == "Equipamento" else 'sistema_alocado'
-                df_agregado = df_manutencoes.groupby(grupo)['custo_manutencao'].sum().reset_index().rename(columns={grupo: 'Agrupador', 'custo_manutencao': 'Custo Total'}).sort_values(by='Custo Total', ascending=False)
-                fig_custo = px.bar(df_agregado, x='Agrupador', y='Custo Total', text_auto='.2s', color='Agrupador')
-                fig_custo.update_layout(xaxis_title=None, showlegend=False); st.plotly_chart(fig_custo, width='stretch')
+            # Os dois agrupamentos somam as mesmas manutenções: sem custo em um, não há no outro
+            if dados['fig_custo'] is not None: grafico_custo_manutencao()
             else: st.info("Nenhum custo de manutenção no período.")
 
-# --- Botão de Download dos Dados Filtrados ---
+        st.subheader("Equipamentos com Maior TCO (Vida Útil)")
+        if dados['fig_ranking'] is not None:
+            st.plotly_chart(dados['fig_ranking'], width='stretch')
+            st.caption("Acumulado desde a aquisição, independente do período filtrado.")
+        else: st.info("Nenhum equipamento nos sistemas selecionados.")
+    with tab_confiabilidade:
+        df_confiabilidade = dados['confiabilidade']
+        if df_confiabilidade.empty:
+            st.info("Nenhum equipamento nos sistemas selecionados.")
+        else:
+            frota = resumir_frota(df_confiabilidade)
+            conf_col1, conf_col2, conf_col3, conf_col4 = st.columns(4)
+            conf_col1.metric("⏱️ MTBF", f"{frota['mtbf_dias']:,.1f} dias" if pd.notna(frota['mtbf_dias']) else "N/A")
+            conf_col2.metric("⚠️ Falhas por Equipamento/Ano", f"{frota['taxa_falhas_ano']:,.2f}" if pd.notna(frota['taxa_falhas_ano']) else "N/A")
+            conf_col3.metric("🔧 Preventivas por Corretiva", f"{frota['razao_preventiva_corretiva']:,.2f}" if pd.notna(frota['razao_preventiva_corretiva']) else "N/A")
+            conf_col4.metric("💰 Custo dos Últimos 12 Meses", f"R$ {frota['custo_12m']:,.2f}")
+
+            st.subheader("Por Sistema")
+            st.dataframe(
+                resumir_por_sistema(df_confiabilidade)[['sistema_alocado', 'equipamentos', *COLUNAS_CONFIABILIDADE]],
+                hide_index=True, width='stretch',
+                column_config={"sistema_alocado": "Sistema", "equipamentos": "Equipamentos", **COLUNAS_CONFIABILIDADE}
+            )
+
+            st.subheader("Por Equipamento")
+            tabela_confiabilidade_equipamentos(df_confiabilidade)
+
+            st.subheader("Custo de Manutenção dos Últimos 12 Meses")
+            if dados['fig_custo_movel'] is not None: st.plotly_chart(dados['fig_custo_movel'], width='stretch')
+            else: st.info("Nenhuma manutenção no período.")
+            st.caption(
+                "MTBF: média dos intervalos entre corretivas consecutivas no período. "
+                "Falhas/Ano: corretivas no período por ano desde a aquisição (ou desde o início do período). "
+                "Custo 12 meses: manutenções dos 12 meses encerrados na data de fim; no gráfico, os 12 meses encerrados em cada mês."
+            )
+    with tab_coortes:
+        analise_coortes()
+
+# --- Exportação dos Dados Filtrados ---
+# Os arquivos só são gerados quando o usuário pede, lendo o banco em lotes
+medicao.fase("exportacao")
 st.markdown("---")
 st.subheader("📥 Exportar Dados Filtrados")
 col_exp1, col_exp2 = st.columns(2)
 with col_exp1:
-    df_equip_exp = df_equipamentos.to_csv(index=False).encode('utf-8')
-    st.download_button(label="Baixar Dados de Equipamentos (CSV)", data=df_equip_exp, file_name='equipamentos_filtrados.csv', mime='text/csv', width='stretch')
+    painel_exportacao("exp_equipamentos", "Equipamentos", "equipamentos_filtrados", *consulta_equipamentos_filtrados(*filtros),
+                      tabelas=('equipamentos',))
 with col_exp2:
-    df_manut_exp = df_manutencoes.to_csv(index=False).encode('utf-8')
-    st.download_button(label="Baixar Dados de Manutenções (CSV)", data=df_manut_exp, file_name='manutencoes_filtradas.csv', mime='text/csv', width='stretch')
+    painel_exportacao("exp_manutencoes", "Manutenções", "manutencoes_filtradas", *consulta_manutencoes_filtradas(*filtros),
+                      tabelas=('equipamentos', 'manutencoes'))
+
+medicao.concluir()
@@ -2,22 +2,22 @@
 
 import streamlit as st
 from database.database_manager import (
-    listar_equipamentos_df, excluir_equipamento, atualizar_equipamento,
-    listar_manutencoes_df, excluir_manutencao, atualizar_manutencao
+    excluir_equipamento, atualizar_equipamento,
+    excluir_manutencao, atualizar_manutencao,
+    listar_equipamentos_pagina, contar_equipamentos, ORDENACOES_EQUIPAMENTOS,
+    listar_manutencoes_pagina, contar_manutencoes, ORDENACOES_MANUTENCOES,
+    buscar_opcoes_equipamentos, aplicar_edicoes_equipamentos, aplicar_edicoes_manutencoes,
+    EDICAO_EQUIPAMENTOS, EDICAO_MANUTENCOES
 )
+from database.instrumentacao import MedicaoPagina
+from interface.edicao import grade_edicao
+from interface.pagina import configurar_pagina
+from interface.seletores import seletor_equipamento
 import datetime
 import pandas as pd
 
-# ==============================================================================
-# --- VERIFICADOR DE AUTENTICAÇÃO (ADICIONAR EM TODAS AS PÁGINAS) ---
-# ==============================================================================
-if st.session_state.get("password_correct", False) == False:
-    st.error("Você não tem permissão para acessar esta página. Por favor, faça o login.")
-    st.stop()
-# ==============================================================================
-
-# --- Configuração da Página ---
-st.set_page_config(page_title="Gerenciar Dados", page_icon="🗃️", layout="wide")
+# --- Configuração da Página (inclui a verificação de login) ---
+configurar_pagina("Gerenciar Dados", "🗃️")
 st.title("🗃️ Gerenciar Dados")
 st.write("Aqui você pode visualizar, editar e excluir registros das tabelas de equipamentos e manutenções.")
 
@@ -60,29 +60,26 @@ def dialog_edit_equipamento(item_data):
 @st.dialog("✏️ Editar Manutenção")
 def dialog_edit_manutencao(item_data):
     st.write(f"Editando Manutenção do Equipamento: **{item_data['equipamento_descricao']}**")
-    
-    equipamentos = listar_equipamentos_df()
-    lista_equipamentos = {row['descricao']: row['id'] for index, row in equipamentos.iterrows()}
-    
-    with st.form("form_edit_manutencao"):
-        # Encontrar o índice do equipamento atual para pré-selecionar
-        current_equip_id = int(item_data['equipamento_id'])
-        equip_desc_list = list(lista_equipamentos.keys())
-        equip_id_list = list(lista_equipamentos.values())
-        current_index = equip_id_list.index(current_equip_id) if current_equip_id in equip_id_list else 0
 
-        new_equip_desc = st.selectbox("Equipamento", options=equip_desc_list, index=current_index)
+    # Fora do formulário, pré-selecionado com o equipamento atual; a lista vem da busca no banco
+    chave_equipamento = f"edit_manut_equip_{item_data['id']}"
+    new_equip_id = seletor_equipamento(chave_equipamento, "Equipamento", valor_inicial=int(item_data['equipamento_id']))
+
+    with st.form("form_edit_manutencao"):
         new_data = st.date_input("Data da Manutenção", value=pd.to_datetime(item_data['data_manutencao']).date())
         new_tipo = st.selectbox("Tipo de Manutenção", ["Corretiva", "Preventiva"], index=["Corretiva", "Preventiva"].index(item_data['tipo_manutencao']))
         new_motivo = st.text_area("Motivo/Descrição", value=item_data['motivo_manutencao'])
         new_custo = st.number_input("Custo da Manutenção (R$)", value=float(item_data['custo_manutencao']), format="%.2f")
 
         if st.form_submit_button("✔️ Salvar Alterações", width='stretch'):
+            if new_equip_id is None:
+                st.warning("Selecione o equipamento.")
+                return
             try:
                 # CORRIGIDO: Chamada da função com argumentos nomeados e corretos
                 success = atualizar_manutencao(
                     manutencao_id=int(item_data['id']),
-                    equipamento_id=lista_equipamentos[new_equip_desc],
+                    equipamento_id=new_equip_id,
                     data_manutencao=new_data.isoformat(),
                     motivo_manutencao=new_motivo,
                     tipo_manutencao=new_tipo,
@@ -91,6 +88,7 @@ def dialog_edit_manutencao(item_data):
                 if success:
                     st.toast("✅ Registro de manutenção atualizado com sucesso!", icon="🎉")
                     st.session_state.editing_item_id = None
+                    st.session_state.pop(chave_equipamento, None)
                     st.rerun()
                 else:
                     st.toast("❌ Falha ao atualizar o registro.", icon="🔥")
@@ -116,6 +114,82 @@ def confirm_delete_dialog(item_type, item_id, item_desc):
             st.session_state.confirming_delete = None
             st.rerun()
 
+# --- Edição em Grade ---
+# Alternativa aos diálogos: a página atual vira uma planilha editável e todas as alterações
+# (inclusive linhas incluídas e excluídas) são gravadas juntas, em uma única transação.
+
+STATUS_EQUIPAMENTOS = ["Operacional", "Em Manutenção", "Fora de Operação"]
+
+def grade_equipamentos(df):
+    status = STATUS_EQUIPAMENTOS + sorted(set(df['status'].dropna()) - set(STATUS_EQUIPAMENTOS))
+    grade_edicao("equip", df, list(EDICAO_EQUIPAMENTOS['colunas']), {
+        "numero_serie": st.column_config.TextColumn("Nº de Série", required=True),
+        "descricao": st.column_config.TextColumn("Descrição", required=True),
+        "modelo": "Modelo",
+        "status": st.column_config.SelectboxColumn("Status", options=status),
+        "sistema_alocado": "Sistema Alocado",
+        "pedido_compra": "Pedido de Compra",
+        "data_aquisicao": st.column_config.DateColumn("Data de Aquisição", format="DD/MM/YYYY"),
+        "custo_aquisicao": st.column_config.NumberColumn("Custo de Aquisição (R$)", min_value=0.0, format="%.2f"),
+        "inicio_garantia": st.column_config.DateColumn("Início da Garantia", format="DD/MM/YYYY"),
+        "fim_garantia": st.column_config.DateColumn("Fim da Garantia", format="DD/MM/YYYY"),
+    }, aplicar_edicoes_equipamentos)
+
+def grade_manutencoes(df):
+    # A coluna de equipamento só oferece os equipamentos da página, os já escolhidos na grade
+    # e os encontrados pela busca abaixo (ver buscar_opcoes_equipamentos), nunca a frota inteira
+    termo = st.text_input(
+        "🔎 Buscar equipamento para a grade", key="manut_grade_busca_equipamento",
+        placeholder="Descrição, nº de série ou modelo (Enter para buscar)"
+    )
+    rotulos = {
+        **dict(zip(df['equipamento_id'].tolist(), df['equipamento_descricao'] + " (S/N: " + df['numero_serie'] + ")")),
+        **st.session_state.get("manut_grade_rotulos", {}),
+        **dict(buscar_opcoes_equipamentos(termo.strip())),
+    }
+    editado = grade_edicao("manut", df, list(EDICAO_MANUTENCOES['colunas']), {
+        "equipamento_id": st.column_config.SelectboxColumn("Equipamento", options=list(rotulos), format_func=rotulos.get, required=True, width="large"),
+        "data_manutencao": st.column_config.DateColumn("Data", format="DD/MM/YYYY", required=True),
+        "motivo_manutencao": st.column_config.TextColumn("Motivo/Descrição", width="large"),
+        "tipo_manutencao": st.column_config.SelectboxColumn("Tipo", options=["Corretiva", "Preventiva"]),
+        "custo_manutencao": st.column_config.NumberColumn("Custo (R$)", min_value=0.0, format="%.2f"),
+    }, aplicar_edicoes_manutencoes)
+    # Os equipamentos escolhidos continuam entre as opções quando a busca muda
+    st.session_state["manut_grade_rotulos"] = {
+        id_equipamento: rotulos[id_equipamento] for id_equipamento in editado['equipamento_id'].dropna() if id_equipamento in rotulos
+    }
+
+# --- Controles de Paginação ---
+
+def controles_listagem(prefixo, ordenacoes, ordenacao_padrao, decrescente_padrao):
+    """Desenha busca, ordenação e tamanho de página; reinicia a paginação quando algum deles muda."""
+    col_busca, col_ordem, col_direcao, col_tamanho = st.columns([3, 2, 1, 1])
+    busca = col_busca.text_input("🔍 Buscar", key=f"{prefixo}_busca").strip()
+    opcoes = list(ordenacoes.keys())
+    ordenacao = col_ordem.selectbox("Ordenar por", opcoes, index=opcoes.index(ordenacao_padrao), key=f"{prefixo}_ordenacao")
+    decrescente = col_direcao.toggle("Decrescente", value=decrescente_padrao, key=f"{prefixo}_decrescente")
+    tamanho = col_tamanho.selectbox("Por página", [25, 50, 100], key=f"{prefixo}_tamanho")
+
+    # Pilha de cursores: o topo é o início da página atual (None = primeira página)
+    assinatura = (busca, ordenacao, decrescente, tamanho)
+    if st.session_state.get(f"{prefixo}_assinatura") != assinatura:
+        st.session_state[f"{prefixo}_assinatura"] = assinatura
+        st.session_state[f"{prefixo}_cursores"] = [None]
+    return busca, ordenacao, decrescente, tamanho, st.session_state[f"{prefixo}_cursores"][-1]
+
+def navegacao_paginas(prefixo, total, tamanho, proximo_cursor):
+    """Desenha os botões de página anterior/próxima."""
+    cursores = st.session_state[f"{prefixo}_cursores"]
+    total_paginas = max(1, -(-total // tamanho))
+    col_ant, col_info, col_prox = st.columns([1, 2, 1])
+    if col_ant.button("⬅️ Anterior", key=f"{prefixo}_anterior", disabled=len(cursores) == 1, width='stretch'):
+        cursores.pop()
+        st.rerun()
+    col_info.markdown(f"<div style='text-align: center'>Página {len(cursores)} de {total_paginas} — {total} registro(s)</div>", unsafe_allow_html=True)
+    if col_prox.button("Próxima ➡️", key=f"{prefixo}_proxima", disabled=proximo_cursor is None, width='stretch'):
+        cursores.append(proximo_cursor)
+        st.rerun()
+
 # --- Inicialização do Estado da Sessão ---
 if 'editing_item_id' not in st.session_state:
     st.session_state.editing_item_id = None
@@ -125,21 +199,23 @@ if 'confirming_delete' not in st.session_state:
     st.session_state.confirming_delete = None
 
 # --- Abas para Gerenciamento ---
+medicao = MedicaoPagina("Gerenciar Dados")
 tab1, tab2 = st.tabs(["Equipamentos", "Manutenções"])
 
 # --- Aba de Equipamentos ---
 with tab1:
     st.subheader("Tabela de Equipamentos")
-    df_equipamentos = listar_equipamentos_df()
+    busca, ordenacao, decrescente, tamanho, cursor = controles_listagem("equip", ORDENACOES_EQUIPAMENTOS, 'Descrição', False)
+    df_equipamentos, proximo_cursor = listar_equipamentos_pagina(busca, ordenacao, decrescente, tamanho, cursor)
+    medicao.fase("renderizacao")
 
-    if df_equipamentos.empty:
-        st.info("Nenhum equipamento cadastrado ainda.")
+    if st.toggle("📋 Editar em grade", key="equip_modo_grade"):
+        grade_equipamentos(df_equipamentos)
+        navegacao_paginas("equip", contar_equipamentos(busca), tamanho, proximo_cursor)
+    elif df_equipamentos.empty:
+        st.info("Nenhum equipamento encontrado." if busca else "Nenhum equipamento cadastrado ainda.")
     else:
-        # Adiciona colunas de ação
-        df_equipamentos['Ações'] = ""
-        cols = st.columns([0.4, 0.1, 0.1])
-        
-        # Exibe os dados com botões
+        # Exibe apenas a página atual com botões
         for index, row in df_equipamentos.iterrows():
             st.markdown("---")
             col1, col2, col3 = st.columns([4, 1, 1])
@@ -156,13 +232,21 @@ with tab1:
                         'type': 'equipamento', 'id': row['id'], 'desc': row['descricao']
                     }
                     st.rerun()
+        st.markdown("---")
+        navegacao_paginas("equip", contar_equipamentos(busca), tamanho, proximo_cursor)
 
 # --- Aba de Manutenções ---
 with tab2:
     st.subheader("Tabela de Manutenções")
-    df_manutencoes = listar_manutencoes_df()
+    medicao.fase("carga")
+    busca, ordenacao, decrescente, tamanho, cursor = controles_listagem("manut", ORDENACOES_MANUTENCOES, 'Data', True)
+    df_manutencoes, proximo_cursor = listar_manutencoes_pagina(busca, ordenacao, decrescente, tamanho, cursor)
+    medicao.fase("renderizacao")
 
-    if df_manutencoes.empty:
+    if st.toggle("📋 Editar em grade", key="manut_modo_grade"):
+        grade_manutencoes(df_manutencoes)
+        navegacao_paginas("manut", contar_manutencoes(busca), tamanho, proximo_cursor)
+    elif df_manutencoes.empty:
         st.info("Nenhum registro de manutenção encontrado.")
     else:
         for index, row in df_manutencoes.iterrows():
@@ -181,15 +265,22 @@ with tab2:
                         'type': 'manutenção', 'id': row['id'], 'desc': f"Manutenção de {row['equipamento_descricao']} em {pd.to_datetime(row['data_manutencao']).strftime('%d/%m/%Y')}"
                     }
                     st.rerun()
+        st.markdown("---")
+        navegacao_paginas("manut", contar_manutencoes(busca), tamanho, proximo_cursor)
+
+medicao.concluir()
 
 # --- Lógica para Abrir Diálogos ---
 if st.session_state.editing_item_id is not None:
-    if st.session_state.editing_item_type == 'equipamento':
-        item_data = df_equipamentos[df_equipamentos['id'] == st.session_state.editing_item_id].iloc[0]
-        dialog_edit_equipamento(item_data)
+    # O item editado pertence à página exibida no momento
+    df_origem = df_equipamentos if st.session_state.editing_item_type == 'equipamento' else df_manutencoes
+    selecionado = df_origem[df_origem['id'] == st.session_state.editing_item_id] if not df_origem.empty else df_origem
+    if selecionado.empty:
+        st.session_state.editing_item_id = None
+    elif st.session_state.editing_item_type == 'equipamento':
+        dialog_edit_equipamento(selecionado.iloc[0])
     elif st.session_state.editing_item_type == 'manutencao':
-        item_data = df_manutencoes[df_manutencoes['id'] == st.session_state.editing_item_id].iloc[0]
-        dialog_edit_manutencao(item_data)
+        dialog_edit_manutencao(selecionado.iloc[0])
 
 if st.session_state.confirming_delete is not None:
     delete_info = st.session_state.confirming_delete
@@ -2,79 +2,44 @@
 
 import streamlit as st
 import pandas as pd
-from database.database_manager import listar_equipamentos_df, listar_manutencoes_df
-import datetime
-from PIL import Image # Importa a biblioteca de manipulação de imagem
-
-# ==============================================================================
-# --- VERIFICADOR DE AUTENTICAÇÃO (ADICIONAR EM TODAS AS PÁGINAS) ---
-# ==============================================================================
-if st.session_state.get("password_correct", False) == False:
-    st.error("Você não tem permissão para acessar esta página. Por favor, faça o login.")
-    st.stop()
-# ==============================================================================
-
-# --- Configuração da Página ---
-# Define o título da aba, o ícone e o layout da página.
-# Este deve ser o primeiro comando Streamlit no seu script.
-# No topo do arquivo
-st.set_page_config(
-    page_title="KPI Equipamentos - Início",
-    page_icon="🏠",  # MUDANÇA AQUI: de 📈 para 🏠
-    layout="wide"
+from database.database_manager import (
+    contar_equipamentos, obter_equipamento, listar_manutencoes_por_equipamento, consulta_historico_equipamento
 )
-# Adiciona o logo no topo da barra lateral
-
-try:
-    logo = Image.open("assets/logo.png")
-    # --- CORREÇÃO APLICADA AQUI ---
-    st.sidebar.image(logo, width='stretch') # Trocamos 'use_column_width' por 'use_container_width'
-except FileNotFoundError:
-    st.sidebar.error("Logo não encontrado. Verifique o caminho do arquivo 'assets/logo.png'.")
-
-st.sidebar.markdown("---")
-st.sidebar.header("Navegação")
+from database.instrumentacao import MedicaoPagina
+from database.carregamento import carregar_em_paralelo
+from interface.exportacao import painel_exportacao
+from interface.pagina import configurar_pagina
+from interface.seletores import seletor_equipamento
+import datetime
 
-# --- Configuração da Página ---
-st.set_page_config(
-    page_title="Detalhes do Equipamento",
-    page_icon="🔎", # MUDANÇA AQUI: de 🔬 para 🔎
-    layout="wide"
-)
+# --- Configuração da Página (inclui a verificação de login) ---
+configurar_pagina("Detalhes do Equipamento", "🔎", logo=True)
 
 st.title("🔎 Dossiê do Equipamento") # MUDANÇA AQUI
 
 # --- Carregamento de Dados ---
-@st.cache_data
-def carregar_dados():
-    equipamentos = listar_equipamentos_df()
-    manutencoes = listar_manutencoes_df()
-    if not equipamentos.empty:
-        equipamentos['data_aquisicao'] = pd.to_datetime(equipamentos['data_aquisicao'])
-        equipamentos['inicio_garantia'] = pd.to_datetime(equipamentos['inicio_garantia'])
-        equipamentos['fim_garantia'] = pd.to_datetime(equipamentos['fim_garantia'])
-    if not manutencoes.empty:
-        manutencoes['data_manutencao'] = pd.to_datetime(manutencoes['data_manutencao'])
-    return equipamentos, manutencoes
-
-df_equipamentos, df_manutencoes = carregar_dados()
+medicao = MedicaoPagina("Detalhes do Equipamento")
 
 # --- Widget de Seleção ---
-if df_equipamentos.empty:
+# A lista traz só as melhores correspondências da busca; o dossiê é consultado pelo id do equipamento escolhido
+if contar_equipamentos() == 0:
     st.warning("Nenhum equipamento cadastrado para exibir detalhes.")
 else:
-    df_equipamentos['display_name'] = df_equipamentos['descricao'] + " (S/N: " + df_equipamentos['numero_serie'] + ")"
-    equipamento_selecionado_display = st.selectbox(
-        "Selecione um equipamento para ver seu dossiê:",
-        options=df_equipamentos['display_name'],
-        index=None,
-        placeholder="Escolha um equipamento..."
+    equipamento_id = seletor_equipamento(
+        "dossie_equipamento", "Selecione um equipamento para ver seu dossiê:", placeholder="Escolha um equipamento..."
     )
     st.markdown("---")
 
-    if equipamento_selecionado_display:
-        equip_info = df_equipamentos[df_equipamentos['display_name'] == equipamento_selecionado_display].iloc[0]
-
+    equip_info, manutencoes_do_equip = None, None
+    if equipamento_id is not None:
+        # Dados cadastrais e histórico são buscados ao mesmo tempo, em conexões separadas
+        dossie, _ = carregar_em_paralelo({
+            'equipamento': (obter_equipamento, equipamento_id),
+            'manutencoes': (listar_manutencoes_por_equipamento, equipamento_id),
+        })
+        equip_info, manutencoes_do_equip = dossie['equipamento'], dossie['manutencoes']
+    medicao.fase("renderizacao")
+    if equip_info:
         st.header(f"Informações Gerais: {equip_info['descricao']}")
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -88,19 +53,18 @@ else:
             st.markdown(f"**Nº de Série:** {equip_info['numero_serie']}")
 
         st.subheader("Status da Garantia")
-        hoje = pd.Timestamp('today').normalize()
         fim_garantia = equip_info['fim_garantia']
         if pd.isna(fim_garantia):
             st.warning("Data de fim de garantia não informada.")
         else:
-            dias_restantes = (fim_garantia - hoje).days
+            # Calculado a cada exibição: o dossiê em cache guarda só a data de fim da garantia
+            dias_restantes = (fim_garantia - pd.Timestamp(datetime.date.today())).days
             if dias_restantes >= 0:
                 st.success(f"✔️ Em garantia. Expira em {dias_restantes} dias ({fim_garantia.strftime('%d/%m/%Y')}).")
             else:
                 st.error(f"❌ Garantia expirada há {-dias_restantes} dias ({fim_garantia.strftime('%d/%m/%Y')}).")
 
         st.header("Histórico e Custos de Manutenção")
-        manutencoes_do_equip = df_manutencoes[df_manutencoes['numero_serie'] == equip_info['numero_serie']]
         
         if manutencoes_do_equip.empty:
             st.info("Nenhum registro de manutenção para este equipamento.")
@@ -108,24 +72,10 @@ else:
             custo_total_manutencao = manutencoes_do_equip['custo_manutencao'].sum()
             num_manutencoes = len(manutencoes_do_equip)
             
-            m_col1, m_col2, m_col3 = st.columns([2, 2, 1])
+            m_col1, m_col2 = st.columns(2)
             m_col1.metric("Custo Total de Manutenção", f"R$ {custo_total_manutencao:,.2f}")
             m_col2.metric("Número de Manutenções", num_manutencoes)
 
-            with m_col3:
-                df_hist_export = manutencoes_do_equip[['data_manutencao', 'tipo_manutencao', 'motivo_manutencao', 'custo_manutencao']].rename(columns={
-                    'data_manutencao': 'Data', 'tipo_manutencao': 'Tipo', 'motivo_manutencao': 'Motivo', 'custo_manutencao': 'Custo (R$)'
-                })
-                csv_hist = df_hist_export.to_csv(index=False, sep=';', decimal=',').encode('utf-8-sig')
-                st.write("") 
-                st.download_button(
-                    label="📥 Baixar Histórico",
-                    data=csv_hist,
-                    file_name=f"historico_{equip_info['numero_serie']}.csv",
-                    mime="text/csv",
-                    width='stretch'
-                )
-
             st.dataframe(
                 manutencoes_do_equip[['data_manutencao', 'tipo_manutencao', 'motivo_manutencao', 'custo_manutencao']],
                 hide_index=True,
@@ -137,3 +87,13 @@ else:
                     "custo_manutencao": st.column_config.NumberColumn("Custo (R$)", format="R$ %.2f")
                 }
             )
+
+            # O arquivo só é gerado quando pedido (e mantém o formato brasileiro no CSV: ';' e vírgula decimal)
+            painel_exportacao(
+                f"historico_{equipamento_id}", "Histórico", f"historico_{equip_info['numero_serie']}",
+                *consulta_historico_equipamento(equipamento_id), tabelas=('manutencoes',),
+                renomear={'id': 'ID', 'data_manutencao': 'Data', 'tipo_manutencao': 'Tipo', 'motivo_manutencao': 'Motivo', 'custo_manutencao': 'Custo (R$)'},
+                opcoes_csv={'sep': ';', 'decimal': ',', 'encoding': 'utf-8-sig'}
+            )
+
+medicao.concluir()
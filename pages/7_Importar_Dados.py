@@ -0,0 +1,78 @@
+# kpi_equipamentos/pages/7_Importar_Dados.py
+
+import streamlit as st
+import pandas as pd
+from database.importacao import (
+    ler_planilha, normalizar_equipamentos, normalizar_manutencoes,
+    importar_equipamentos, importar_manutencoes,
+    COLUNAS_EQUIPAMENTOS, COLUNAS_MANUTENCOES
+)
+from database.instrumentacao import MedicaoPagina
+from interface.pagina import configurar_pagina
+
+# --- Configuração da Página (inclui a verificação de login) ---
+configurar_pagina("Importar Dados", "📤")
+st.title("📤 Importação em Lote")
+st.write("Carregue um arquivo CSV ou XLSX para cadastrar vários equipamentos ou manutenções de uma só vez.")
+
+tipo_importacao = st.radio("O que deseja importar?", ["Equipamentos", "Manutenções"], horizontal=True)
+
+with st.expander("📄 Formato esperado do arquivo"):
+    if tipo_importacao == "Equipamentos":
+        st.write("Colunas aceitas (obrigatórias: **numero_serie** e **descricao**):")
+        st.code(", ".join(COLUNAS_EQUIPAMENTOS))
+    else:
+        st.write("Colunas aceitas (obrigatórias: todas, exceto **custo_manutencao**). O equipamento é identificado pelo número de série:")
+        st.code(", ".join(COLUNAS_MANUTENCOES))
+    st.caption("Cabeçalhos como 'Número de Série' ou 'Data de Aquisição' também são reconhecidos. "
+               "Datas em AAAA-MM-DD ou DD/MM/AAAA; valores em 1234.56 ou 1.234,56. CSV separado por ',' ou ';'.")
+
+arquivo = st.file_uploader("Arquivo", type=["csv", "xlsx"])
+medicao = MedicaoPagina("Importar Dados", fase_inicial="leitura")
+
+if arquivo is not None:
+    try:
+        df_arquivo = ler_planilha(arquivo, arquivo.name)
+        if tipo_importacao == "Equipamentos":
+            df_validas, df_erros = normalizar_equipamentos(df_arquivo)
+        else:
+            df_validas, df_erros = normalizar_manutencoes(df_arquivo)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+
+    medicao.fase("renderizacao")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Linhas no arquivo", len(df_arquivo))
+    col2.metric("Linhas válidas", len(df_validas))
+    col3.metric("Linhas com problemas", df_erros['linha'].nunique())
+
+    if not df_erros.empty:
+        with st.expander("⚠️ Problemas encontrados (estas linhas serão ignoradas)", expanded=True):
+            st.dataframe(df_erros, hide_index=True, width='stretch')
+
+    st.subheader("Pré-visualização")
+    st.dataframe(df_validas.head(100), hide_index=True, width='stretch')
+
+    atualizar_existentes = False
+    if tipo_importacao == "Equipamentos":
+        atualizar_existentes = st.checkbox("Atualizar equipamentos cujo número de série já está cadastrado")
+
+    if st.button("✔️ Importar", type="primary", disabled=df_validas.empty):
+        try:
+            medicao.fase("importacao")
+            with st.spinner("Importando..."):
+                if tipo_importacao == "Equipamentos":
+                    resumo = importar_equipamentos(df_validas, atualizar_existentes=atualizar_existentes)
+                    st.success(f"✅ {resumo['inseridos']} equipamento(s) cadastrado(s), {resumo['atualizados']} atualizado(s) "
+                               f"e {resumo['ignorados']} ignorado(s) por já existirem.")
+                else:
+                    resumo, df_erros_carga = importar_manutencoes(df_validas)
+                    st.success(f"✅ {resumo['inseridos']} manutenção(ões) registrada(s).")
+                    if not df_erros_carga.empty:
+                        st.warning("Algumas linhas não foram importadas:")
+                        st.dataframe(df_erros_carga, hide_index=True, width='stretch')
+        except Exception as e:
+            st.error(f"❌ Ocorreu um erro durante a importação. Nenhum registro foi gravado. Erro: {e}")
+
+medicao.concluir()
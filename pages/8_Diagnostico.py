@@ -0,0 +1,134 @@
+# kpi_equipamentos/pages/8_Diagnostico.py
+
+import json
+import streamlit as st
+import pandas as pd
+from database.connection import estatisticas_pool
+from database.instrumentacao import (
+    consultas_recentes, execucoes_paginas, estatisticas_cache, limpar_registros, LIMITE_SQL_LENTO_MS
+)
+from interface.pagina import configurar_pagina
+
+# --- Configuração da Página (inclui a verificação de login e da senha de administrador) ---
+# Os comandos SQL registrados revelam a estrutura do banco e o uso da aplicação: só administradores os veem
+configurar_pagina("Diagnóstico", "🩺", admin=True)
+st.title("🩺 Diagnóstico de Desempenho")
+st.write("Tempo gasto pelo banco de dados, pelas páginas e pelos caches desde o início do processo (ou da última limpeza).")
+
+consultas = pd.DataFrame(consultas_recentes(), columns=['instante', 'sql', 'duracao_ms', 'linhas', 'pagina'])
+paginas = execucoes_paginas()
+caches = pd.DataFrame(estatisticas_cache(), columns=['funcao', 'chamadas', 'acertos', 'falhas', 'taxa_acerto'])
+pool = estatisticas_pool()
+
+col_acoes1, col_acoes2 = st.columns(2)
+relatorio = {'pool': pool, 'consultas': consultas_recentes(), 'paginas': paginas, 'cache': estatisticas_cache()}
+col_acoes1.download_button(
+    "📥 Baixar registros (JSON)", data=json.dumps(relatorio, ensure_ascii=False, indent=2, default=str).encode('utf-8'),
+    file_name="diagnostico.json", mime="application/json", width='stretch'
+)
+if col_acoes2.button("🧹 Limpar registros", width='stretch'):
+    limpar_registros()
+    st.rerun()
+
+# --- Pool de Conexões ---
+st.subheader("Pool de Conexões")
+if pool:
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Em uso / Tamanho", f"{pool['em_uso']} / {pool['tamanho_pool']}")
+    col2.metric("Overflow", pool['overflow'])
+    col3.metric("Espera média", f"{pool['espera_media_ms']:.2f} ms")
+    col4.metric("Espera máxima", f"{pool['espera_max_ms']:.2f} ms")
+else:
+    st.warning("Não foi possível obter o engine do banco de dados.")
+
+tab_sql, tab_paginas, tab_cache = st.tabs(["🗄️ Consultas SQL", "📄 Páginas", "⚡ Caches"])
+
+with tab_sql:
+    if consultas.empty:
+        st.info("Nenhuma consulta registrada ainda.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Consultas registradas", len(consultas))
+        col2.metric("Tempo total em SQL", f"{consultas['duracao_ms'].sum():,.0f} ms")
+        col3.metric(f"Lentas (≥ {LIMITE_SQL_LENTO_MS:.0f} ms)", int((consultas['duracao_ms'] >= LIMITE_SQL_LENTO_MS).sum()))
+
+        st.markdown("**Consultas que mais consomem tempo**")
+        agregadas = (
+            consultas.groupby('sql')
+            .agg(execucoes=('duracao_ms', 'size'), total_ms=('duracao_ms', 'sum'), media_ms=('duracao_ms', 'mean'),
+                 max_ms=('duracao_ms', 'max'), linhas_media=('linhas', 'mean'))
+            .sort_values('total_ms', ascending=False)
+            .reset_index()
+        )
+        st.dataframe(agregadas, hide_index=True, width='stretch', column_config={
+            "sql": st.column_config.TextColumn("SQL", width="large"),
+            "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.1f"),
+            "media_ms": st.column_config.NumberColumn("Média (ms)", format="%.1f"),
+            "max_ms": st.column_config.NumberColumn("Máx. (ms)", format="%.1f"),
+            "linhas_media": st.column_config.NumberColumn("Linhas (média)", format="%.0f"),
+        })
+
+        st.markdown("**Mais recentes**")
+        recentes = consultas.iloc[::-1].assign(instante=pd.to_datetime(consultas['instante'], unit='s'))
+        st.dataframe(recentes.head(100), hide_index=True, width='stretch', column_config={
+            "instante": st.column_config.DatetimeColumn("Instante (UTC)", format="DD/MM/YYYY HH:mm:ss"),
+            "sql": st.column_config.TextColumn("SQL", width="large"),
+            "duracao_ms": st.column_config.NumberColumn("Duração (ms)", format="%.1f"),
+        })
+
+with tab_paginas:
+    if not paginas:
+        st.info("Nenhuma execução de página registrada ainda.")
+    else:
+        fases = pd.DataFrame([
+            {'execucao': i, 'instante': execucao['instante'], 'pagina': execucao['pagina'], 'total_ms': execucao['total_ms'], **fase}
+            for i, execucao in enumerate(paginas) for fase in execucao['fases']
+        ])
+        st.markdown("**Tempo por página e fase** (o SQL está incluído no tempo da fase em que foi executado)")
+        resumo_fases = (
+            fases.groupby(['pagina', 'fase'])
+            .agg(execucoes=('duracao_ms', 'size'), media_ms=('duracao_ms', 'mean'), max_ms=('duracao_ms', 'max'),
+                 sql_media_ms=('sql_ms', 'mean'), consultas_media=('consultas', 'mean'))
+            .reset_index()
+        )
+        st.dataframe(resumo_fases, hide_index=True, width='stretch', column_config={
+            "media_ms": st.column_config.NumberColumn("Média (ms)", format="%.1f"),
+            "max_ms": st.column_config.NumberColumn("Máx. (ms)", format="%.1f"),
+            "sql_media_ms": st.column_config.NumberColumn("SQL médio (ms)", format="%.1f"),
+            "consultas_media": st.column_config.NumberColumn("Consultas (média)", format="%.1f"),
+        })
+
+        if 'tarefas' in fases.columns:
+            st.markdown("**Tarefas das cargas paralelas** (a fase dura aproximadamente o tempo da tarefa mais lenta)")
+            tarefas = pd.DataFrame([
+                {'pagina': linha.pagina, 'fase': linha.fase, 'tarefa': tarefa, 'duracao_ms': duracao}
+                for linha in fases.dropna(subset=['tarefas']).itertuples() for tarefa, duracao in linha.tarefas.items()
+            ])
+            st.dataframe(
+                tarefas.groupby(['pagina', 'fase', 'tarefa'])
+                .agg(execucoes=('duracao_ms', 'size'), media_ms=('duracao_ms', 'mean'), max_ms=('duracao_ms', 'max'))
+                .reset_index(),
+                hide_index=True, width='stretch', column_config={
+                    "media_ms": st.column_config.NumberColumn("Média (ms)", format="%.1f"),
+                    "max_ms": st.column_config.NumberColumn("Máx. (ms)", format="%.1f"),
+                }
+            )
+
+        st.markdown("**Execuções mais lentas**")
+        # Uma coluna por fase (fases repetidas na mesma execução, como em abas, são somadas)
+        execucoes = fases.pivot_table(
+            index=['execucao', 'instante', 'pagina', 'total_ms'], columns='fase', values='duracao_ms', aggfunc='sum'
+        ).reset_index().drop(columns='execucao')
+        execucoes['instante'] = pd.to_datetime(execucoes['instante'], unit='s')
+        st.dataframe(execucoes.sort_values('total_ms', ascending=False).head(50), hide_index=True, width='stretch', column_config={
+            "instante": st.column_config.DatetimeColumn("Instante (UTC)", format="DD/MM/YYYY HH:mm:ss"),
+        })
+
+with tab_cache:
+    if caches.empty:
+        st.info("Nenhuma função em cache foi chamada ainda.")
+    else:
+        st.dataframe(caches.sort_values('chamadas', ascending=False), hide_index=True, width='stretch', column_config={
+            "funcao": "Função",
+            "taxa_acerto": st.column_config.ProgressColumn("Taxa de acerto", format="percent", min_value=0, max_value=1),
+        })
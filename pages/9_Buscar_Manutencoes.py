@@ -0,0 +1,84 @@
+# kpi_equipamentos/pages/9_Buscar_Manutencoes.py
+
+import re
+import streamlit as st
+import pandas as pd
+from database.database_manager import buscar_manutencoes
+from database.instrumentacao import MedicaoPagina
+from interface.pagina import configurar_pagina
+
+# --- Configuração da Página (inclui a verificação de login) ---
+configurar_pagina("Buscar Manutenções", "🔍")
+
+st.title("🔍 Busca no Histórico de Manutenções")
+st.write("Procure falhas e soluções já registradas no motivo das manutenções. "
+         "Palavras relacionadas também são encontradas (ex.: *bomba* encontra *bombas*).")
+
+# --- Funções Auxiliares ---
+
+def trecho_markdown(trecho):
+    """Converte o trecho do banco (termos entre <b> e </b>) em markdown, escapando o restante do texto."""
+    if trecho is None or pd.isna(trecho):
+        return ""
+    partes = re.split(r'(</?b>)', trecho)
+    return "".join(
+        "**" if parte in ('<b>', '</b>') else re.sub(r'([\\`*_{}\[\]()#+\-.!$<>|~])', r'\\\1', parte)
+        for parte in partes
+    )
+
+# --- Campo de Busca ---
+col_busca, col_tamanho = st.columns([4, 1])
+termos = col_busca.text_input(
+    "Buscar", placeholder='Ex.: vazamento na bomba, "troca de lâmpada", detector -calibração',
+    help='Use aspas para uma frase exata, OR para alternativas e "-" antes de uma palavra para excluí-la.'
+).strip()
+tamanho = col_tamanho.selectbox("Por página", [10, 20, 50], index=1)
+
+# A página volta para a primeira sempre que a busca muda
+if st.session_state.get("busca_assinatura") != (termos, tamanho):
+    st.session_state.busca_assinatura = (termos, tamanho)
+    st.session_state.busca_pagina = 0
+pagina = st.session_state.busca_pagina
+
+if not termos:
+    st.info("Digite um ou mais termos para buscar.")
+    st.stop()
+
+# --- Resultados ---
+medicao = MedicaoPagina("Buscar Manutenções")
+df_resultados, total = buscar_manutencoes(termos, pagina, tamanho)
+medicao.fase("renderizacao")
+
+total_paginas = -(-total // tamanho)
+if total and pagina >= total_paginas:
+    # A página guardada passou do fim (ex.: registros excluídos desde a última execução): volta para a última
+    st.session_state.busca_pagina = total_paginas - 1
+    st.rerun()
+
+if total == 0:
+    st.warning("Nenhuma manutenção encontrada para esta busca.")
+else:
+    st.caption(f"{total} manutenção(ões) encontrada(s), da mais relevante para a menos relevante.")
+    for _, row in df_resultados.iterrows():
+        with st.container(border=True):
+            col_texto, col_dados = st.columns([3, 1])
+            with col_texto:
+                st.markdown(f"**{row['equipamento_descricao']}** (S/N: {row['numero_serie']}) — Sistema: {row['sistema_alocado'] or 'N/A'}")
+                st.markdown(trecho_markdown(row['trecho']))
+            with col_dados:
+                st.write(f"📅 {pd.to_datetime(row['data_manutencao']).strftime('%d/%m/%Y')}")
+                st.write(f"🔧 {row['tipo_manutencao']}")
+                custo = row['custo_manutencao']
+                st.write(f"💰 R$ {float(custo):,.2f}" if pd.notna(custo) else "💰 N/A")
+
+    # --- Paginação ---
+    col_ant, col_info, col_prox = st.columns([1, 2, 1])
+    if col_ant.button("⬅️ Anterior", disabled=pagina == 0, width='stretch'):
+        st.session_state.busca_pagina -= 1
+        st.rerun()
+    col_info.markdown(f"<div style='text-align: center'>Página {pagina + 1} de {total_paginas}</div>", unsafe_allow_html=True)
+    if col_prox.button("Próxima ➡️", disabled=pagina + 1 >= total_paginas, width='stretch'):
+        st.session_state.busca_pagina += 1
+        st.rerun()
+
+medicao.concluir()
@@ -0,0 +1,7 @@
+# kpi_equipamentos/tests/conftest.py
+
+import os
+import sys
+
+# Os testes importam os pacotes da aplicação (database, interface) a partir da raiz do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
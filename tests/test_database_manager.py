@@ -0,0 +1,17 @@
+# kpi_equipamentos/tests/test_database_manager.py
+
+import pytest
+from database.database_manager import _padrao_like
+
+@pytest.mark.parametrize('palavra, esperado', [
+    ('bomba', '%bomba%'),
+    ('', '%%'),
+    # Os curingas do LIKE digitados na busca são procurados literalmente
+    ('50%', '%50\\%%'),
+    ('SN_01', '%SN\\_01%'),
+    # A barra invertida é o caractere de escape (ESCAPE '\') e também precisa ser escapada
+    ('C:\\temp', '%C:\\\\temp%'),
+    ('\\%_', '%\\\\\\%\\_%'),
+])
+def test_padrao_like_escapa_curingas(palavra, esperado):
+    assert _padrao_like(palavra) == esperado
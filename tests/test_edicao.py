@@ -0,0 +1,52 @@
+# kpi_equipamentos/tests/test_edicao.py
+
+import pandas as pd
+from interface.edicao import calcular_diferencas
+
+COLUNAS = ['descricao', 'custo']
+
+def _pagina():
+    return pd.DataFrame({
+        'id': [1, 2, 3],
+        'updated_at': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+        'descricao': ['A', 'B', None],
+        'custo': [10.0, None, 30.0],
+    })
+
+def test_sem_edicoes_nao_ha_diferencas():
+    pagina = _pagina()
+    assert calcular_diferencas(pagina, pagina.copy(), COLUNAS) == ([], [], [])
+
+def test_nulos_iguais_nao_contam_como_alteracao():
+    pagina = _pagina()
+    editado = pagina.copy()
+    editado['custo'] = editado['custo'].astype('object')
+    editado.loc[1, 'custo'] = float('nan')
+    assert calcular_diferencas(pagina, editado, COLUNAS) == ([], [], [])
+
+def test_alteradas_levam_id_updated_at_e_todas_as_colunas():
+    pagina = _pagina()
+    editado = pagina.copy()
+    editado.loc[0, 'custo'] = 15.0
+    editado.loc[2, 'descricao'] = 'C'
+    alteradas, incluidas, excluidas = calcular_diferencas(pagina, editado, COLUNAS)
+    assert alteradas == [
+        {'id': 1, 'updated_at': pagina.loc[0, 'updated_at'], 'descricao': 'A', 'custo': 15.0},
+        {'id': 3, 'updated_at': pagina.loc[2, 'updated_at'], 'descricao': 'C', 'custo': 30.0},
+    ]
+    assert incluidas == [] and excluidas == []
+
+def test_incluidas_e_excluidas():
+    pagina = _pagina()
+    # A grade devolve as linhas novas sem id; a linha 2 foi removida
+    editado = pd.DataFrame({
+        'id': pd.array([1, 3, None, None], dtype='Int64'),
+        'updated_at': [pagina.loc[0, 'updated_at'], pagina.loc[2, 'updated_at'], None, None],
+        'descricao': ['A', None, 'D', ''],
+        'custo': [10.0, 30.0, None, None],
+    })
+    alteradas, incluidas, excluidas = calcular_diferencas(pagina, editado, COLUNAS)
+    assert alteradas == []
+    # A linha acrescentada e deixada em branco é ignorada
+    assert len(incluidas) == 1 and incluidas[0]['descricao'] == 'D' and pd.isna(incluidas[0]['custo'])
+    assert excluidas == [{'id': 2, 'updated_at': pagina.loc[1, 'updated_at']}]
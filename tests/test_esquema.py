@@ -0,0 +1,50 @@
+# kpi_equipamentos/tests/test_esquema.py
+
+import datetime
+import pandas as pd
+from database.esquema import (
+    adicionar_colunas_garantia, aplicar_esquema, concatenar_tipados, tipar_equipamentos,
+    ESQUEMA_EQUIPAMENTOS, ESQUEMA_MANUTENCOES
+)
+
+def _lote_manutencoes(tipos, sistemas, custos):
+    return aplicar_esquema(pd.DataFrame({
+        'data_manutencao': ['2024-01-01'] * len(tipos), 'tipo_manutencao': tipos,
+        'sistema_alocado': sistemas, 'custo_manutencao': custos,
+    }), ESQUEMA_MANUTENCOES)
+
+def test_concatenar_tipados_preserva_categorias():
+    lotes = [
+        _lote_manutencoes(['Corretiva'], ['UTI'], ['10.5']),
+        _lote_manutencoes(['Preventiva', 'Corretiva'], ['Centro Cirúrgico', 'UTI'], [None, '3']),
+    ]
+    df = concatenar_tipados(lotes, ESQUEMA_MANUTENCOES)
+    assert df['tipo_manutencao'].dtype == 'category'
+    assert df['sistema_alocado'].dtype == 'category'
+    assert set(df['sistema_alocado'].cat.categories) == {'UTI', 'Centro Cirúrgico'}
+    assert df['tipo_manutencao'].tolist() == ['Corretiva', 'Preventiva', 'Corretiva']
+    assert df['custo_manutencao'].dtype == 'float64'
+    assert df['data_manutencao'].dtype == 'datetime64[ns]'
+
+def test_concatenar_tipados_um_lote_so():
+    lote = _lote_manutencoes(['Corretiva'], ['UTI'], ['1'])
+    assert concatenar_tipados(iter([lote]), ESQUEMA_MANUTENCOES) is lote
+
+def test_tipar_equipamentos_nao_depende_da_data_atual():
+    df = tipar_equipamentos(pd.DataFrame({
+        'descricao': ['Monitor'], 'numero_serie': ['SN1'], 'status': ['Operacional'], 'sistema_alocado': ['UTI'],
+        'modelo': ['X'], 'data_aquisicao': ['2020-01-01'], 'inicio_garantia': [None], 'fim_garantia': ['2025-01-01'],
+        'custo_aquisicao': ['100'],
+    }))
+    assert df['display_name'].tolist() == ['Monitor (S/N: SN1)']
+    assert 'dias_fim_garantia' not in df.columns and 'em_garantia' not in df.columns
+    assert set(ESQUEMA_EQUIPAMENTOS['categorias']) <= {c for c in df.columns if df[c].dtype == 'category'}
+
+def test_adicionar_colunas_garantia_usa_a_data_de_referencia():
+    df = pd.DataFrame({'fim_garantia': pd.to_datetime(['2025-01-10', '2025-01-01', None])})
+    resultado = adicionar_colunas_garantia(df, hoje=datetime.date(2025, 1, 5))
+    assert resultado['dias_fim_garantia'].tolist() == [5, -4, pd.NA]
+    assert resultado['em_garantia'].tolist() == ['Sim', 'Não', 'Não Informado']
+    # No dia seguinte ao fim, a mesma linha já está fora da garantia; o DataFrame original não muda
+    assert adicionar_colunas_garantia(df, hoje=datetime.date(2025, 1, 11))['em_garantia'].iloc[0] == 'Não'
+    assert list(df.columns) == ['fim_garantia']
@@ -0,0 +1,32 @@
+# kpi_equipamentos/tests/test_graficos.py
+
+import pandas as pd
+from interface.graficos import limitar_categorias, ROTULO_OUTROS
+
+def _custos(n):
+    return pd.DataFrame({
+        'descricao': [f"Item {i}" for i in range(n)],
+        'aquisicao': [float(i) for i in range(n)],
+        'manutencao': [float(10 * (i % 3)) for i in range(n)],
+    })
+
+def test_ate_o_limite_nada_muda():
+    df = _custos(5)
+    assert limitar_categorias(df, 'descricao', ['aquisicao', 'manutencao'], limite=5) is df
+
+def test_agrupa_as_menores_em_outros():
+    df = _custos(6)
+    # Totais: 0, 11, 22, 3, 14, 25 -> ficam os itens 1, 2, 4 e 5, na ordem original
+    resultado = limitar_categorias(df, 'descricao', ['aquisicao', 'manutencao'], limite=4)
+    assert resultado['descricao'].tolist() == ['Item 1', 'Item 2', 'Item 4', 'Item 5', f"{ROTULO_OUTROS} (2)"]
+    # Cada coluna de valor é somada separadamente nos "Outros" (itens 0 e 3)
+    assert resultado.iloc[-1][['aquisicao', 'manutencao']].tolist() == [3.0, 0.0]
+    # Nenhum valor se perde no agrupamento
+    assert resultado[['aquisicao', 'manutencao']].sum().tolist() == df[['aquisicao', 'manutencao']].sum().tolist()
+
+def test_coluna_unica_de_valor():
+    df = pd.DataFrame({'sistema': list('ABCD'), 'custo': [5.0, 1.0, 7.0, 2.0]})
+    resultado = limitar_categorias(df, 'sistema', ['custo'], limite=2)
+    assert resultado.to_dict('records') == [
+        {'sistema': 'A', 'custo': 5.0}, {'sistema': 'C', 'custo': 7.0}, {'sistema': f"{ROTULO_OUTROS} (2)", 'custo': 3.0},
+    ]
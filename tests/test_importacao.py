@@ -0,0 +1,113 @@
+# kpi_equipamentos/tests/test_importacao.py
+
+import datetime
+import pandas as pd
+import pytest
+from database.importacao import _datas, _valores, normalizar_equipamentos, normalizar_manutencoes
+
+# --- Valores Monetários ---
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('1.234,56', 1234.56),
+    ('R$ 99,90', 99.90),
+    ('1,234.56', 1234.56),
+    ('1234.56', 1234.56),
+    ('1234', 1234.0),
+    ('0,5', 0.5),
+    ('1.5', 1.5),
+    # Só pontos agrupando milhares: formato brasileiro sem centavos
+    ('1.234', 1234.0),
+    ('R$ 1.500', 1500.0),
+    ('1.500.000', 1500000.0),
+    ('R$ 1.500.000,00', 1500000.0),
+    ('  R$1.234,5  ', 1234.5),
+])
+def test_valores_formatos(texto, esperado):
+    assert _valores(pd.Series([texto])).iloc[0] == pytest.approx(esperado)
+
+def test_valores_vazios_e_invalidos_viram_nulos():
+    resultado = _valores(pd.Series(['', '   ', None, 'abc', '1,2,3.4.5']))
+    assert resultado.isna().all()
+
+# --- Datas ---
+
+def test_datas_iso_e_brasileiras():
+    resultado = _datas(pd.Series(['2024-03-15', '15/03/2024', '2024-03-15 10:30:00']))
+    assert resultado.tolist() == [datetime.date(2024, 3, 15)] * 3
+
+def test_datas_invalidas_e_vazias_viram_nulos():
+    resultado = _datas(pd.Series(['31/02/2024', 'ontem', '', None]))
+    assert resultado.isna().all()
+
+# --- Equipamentos ---
+
+def test_normalizar_equipamentos_converte_e_preenche_padroes():
+    df = pd.DataFrame({
+        'numero_serie': [' SN1 '], 'descricao': ['Monitor'], 'status': [''],
+        'data_aquisicao': ['15/03/2024'], 'custo_aquisicao': ['R$ 1.500'], 'fim_garantia': ['2026-03-15'],
+    })
+    validas, erros = normalizar_equipamentos(df)
+    assert erros.empty
+    linha = validas.iloc[0]
+    assert linha['numero_serie'] == 'SN1'
+    assert linha['status'] == 'Operacional'
+    assert linha['data_aquisicao'] == datetime.date(2024, 3, 15)
+    assert linha['fim_garantia'] == datetime.date(2026, 3, 15)
+    assert linha['custo_aquisicao'] == 1500.0
+    # As colunas opcionais ausentes no arquivo são criadas como nulas
+    assert list(validas.columns)[:2] == ['numero_serie', 'descricao'] and pd.isna(linha['modelo'])
+
+def test_normalizar_equipamentos_separa_linhas_invalidas():
+    df = pd.DataFrame({
+        'numero_serie': ['SN1', 'SN2', 'SN1', None, 'SN4'],
+        'descricao': ['A', 'B', 'C', 'D', ''],
+        'data_aquisicao': ['2024-01-01', 'ontem', None, None, None],
+        'custo_aquisicao': [None, None, None, 'abc', None],
+    })
+    validas, erros = normalizar_equipamentos(df)
+    assert validas['numero_serie'].tolist() == ['SN1']
+    # Linha no arquivo = posição + 2 (cabeçalho na linha 1)
+    assert erros['linha'].tolist() == [3, 4, 5, 5, 6]
+    motivos = dict(zip(erros['linha'], erros['motivo']))
+    assert motivos[3] == "Data inválida em 'data_aquisicao'"
+    assert motivos[4] == "Número de série repetido no arquivo"
+    assert motivos[6] == "Campo obrigatório 'descricao' vazio"
+    assert set(erros.loc[erros['linha'] == 5, 'motivo']) == {
+        "Valor inválido em 'custo_aquisicao'", "Campo obrigatório 'numero_serie' vazio"
+    }
+
+def test_normalizar_equipamentos_exige_colunas_obrigatorias():
+    with pytest.raises(ValueError, match='descricao'):
+        normalizar_equipamentos(pd.DataFrame({'numero_serie': ['SN1']}))
+
+# --- Manutenções ---
+
+def test_normalizar_manutencoes_converte_e_valida():
+    df = pd.DataFrame({
+        'numero_serie': ['SN1', 'SN2', 'SN3', 'SN4'],
+        'data_manutencao': ['01/02/2024', '2024-02-02', '2024-02-03', 'amanhã'],
+        'motivo_manutencao': ['Troca de cabo', 'Calibração', 'Revisão', 'Falha'],
+        'tipo_manutencao': ['corretiva', 'PREVENTIVA', 'Emergencial', 'Corretiva'],
+        'custo_manutencao': ['1.234', None, '10', '5'],
+    })
+    validas, erros = normalizar_manutencoes(df)
+    assert validas['numero_serie'].tolist() == ['SN1', 'SN2']
+    assert validas['tipo_manutencao'].tolist() == ['Corretiva', 'Preventiva']
+    assert validas['data_manutencao'].tolist() == [datetime.date(2024, 2, 1), datetime.date(2024, 2, 2)]
+    # Custo vazio vira zero; '1.234' é mil duzentos e trinta e quatro
+    assert validas['custo_manutencao'].tolist() == [1234.0, 0.0]
+    assert erros.to_dict('records') == [
+        {'linha': 4, 'motivo': "Tipo de manutenção deve ser 'Corretiva' ou 'Preventiva'"},
+        {'linha': 5, 'motivo': "Data inválida em 'data_manutencao'"},
+        {'linha': 5, 'motivo': "Campo obrigatório 'data_manutencao' vazio"},
+    ]
+
+def test_normalizar_manutencoes_campos_obrigatorios_vazios():
+    df = pd.DataFrame({
+        'numero_serie': ['SN1'], 'data_manutencao': [''], 'motivo_manutencao': ['  '], 'tipo_manutencao': ['Corretiva'],
+    })
+    validas, erros = normalizar_manutencoes(df)
+    assert validas.empty
+    assert set(erros['motivo']) == {
+        "Campo obrigatório 'data_manutencao' vazio", "Campo obrigatório 'motivo_manutencao' vazio"
+    }
@@ -0,0 +1,20 @@
+# kpi_equipamentos/tests/test_instrumentacao.py
+
+from types import SimpleNamespace
+from database.instrumentacao import _antes_de_executar, _depois_de_executar, consultas_recentes, limpar_registros
+
+def _executar(statement, parametros):
+    conn, cursor = SimpleNamespace(info={}), SimpleNamespace(rowcount=1)
+    _antes_de_executar(conn, cursor, statement, parametros, None, False)
+    _depois_de_executar(conn, cursor, statement, parametros, None, False)
+    return consultas_recentes()[-1]
+
+def test_sql_registrado_sem_parametros_nem_literais():
+    limpar_registros()
+    registro = _executar(
+        "SELECT descricao || ' (S/N: ' || numero_serie || ')'\n  FROM equipamentos\n WHERE numero_serie = 'SN''01' AND id = %(id)s",
+        {'id': 42},
+    )
+    assert registro['sql'] == "SELECT descricao || '?' || numero_serie || '?' FROM equipamentos WHERE numero_serie = '?' AND id = %(id)s"
+    assert '42' not in str(registro)
+    assert registro['linhas'] == 1 and registro['pagina'] is None